@@ -0,0 +1,60 @@
+"""
+Latency of a running Cacheia API under many concurrent connections.
+
+Caches a value, then reads it back from 'concurrency' connections at once
+and reports the p50 and p99 latencies.
+
+Usage: python benchmarks/load_test.py [url] [concurrency] [requests]
+"""
+
+import asyncio
+import sys
+import time
+
+import httpx
+
+
+async def worker(
+    client: httpx.AsyncClient, path: str, count: int, latencies: list[float]
+) -> None:
+    for _ in range(count):
+        start = time.perf_counter()
+        r = await client.get(path)
+        latencies.append(time.perf_counter() - start)
+        r.raise_for_status()
+
+
+async def main(url: str, concurrency: int, requests: int) -> None:
+    limits = httpx.Limits(max_connections=concurrency)
+    timeout = httpx.Timeout(60.0)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as c:
+        await c.put("/cache/", json={"key": "load-test", "value": "x" * 100})
+
+        latencies: list[float] = []
+        per_worker = requests // concurrency
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                worker(c, "/cache/load-test/", per_worker, latencies)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        await c.delete("/cache/load-test/")
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"{len(latencies)} requests from {concurrency} connections")
+    print(f"p50 {p50:.1f}ms, p99 {p99:.1f}ms, {len(latencies) / elapsed:.0f} req/s")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(
+        main(
+            args[0] if args else "http://localhost:5000",
+            int(args[1]) if len(args) > 1 else 1_000,
+            int(args[2]) if len(args) > 2 else 20_000,
+        )
+    )
@@ -1,14 +1,32 @@
+from contextlib import asynccontextmanager
 from importlib.metadata import version
 
+from anyio import to_thread
+from cacheia import Cacheia
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 
+from ..settings import SETS
 from .routes import router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if SETS.CACHEIA_THREAD_LIMIT is not None:
+        limiter = to_thread.current_default_thread_limiter()
+        limiter.total_tokens = SETS.CACHEIA_THREAD_LIMIT
+    # the backend is built once, off the event loop
+    await to_thread.run_sync(Cacheia.setup, SETS.CACHEIA_BACKEND_SETTINGS)
+    yield
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Cacheia",
         version=version("cacheia"),
+        lifespan=lifespan,
     )
+    if SETS.CACHEIA_GZIP_MINIMUM_SIZE is not None:
+        app.add_middleware(GZipMiddleware, minimum_size=SETS.CACHEIA_GZIP_MINIMUM_SIZE)
     app.include_router(router)
     return app
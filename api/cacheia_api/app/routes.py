@@ -1,27 +1,64 @@
 from datetime import datetime
-from typing import Annotated, Iterable
+from typing import Annotated, Any
 from urllib.parse import unquote_plus
 
-from cacheia_schemas import CacheClient, CachedValue, DeletedResult, KeyAlreadyExists
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import UJSONResponse
-
 from cacheia import Cacheia
+from cacheia_schemas import (
+    AsyncCacheClient,
+    CacheClient,
+    CachedValue,
+    CacheManyResult,
+    CacheStats,
+    DeletedResult,
+    KeyAlreadyExists,
+)
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, UJSONResponse
 
 from ..settings import SETS
-from .schemas import Created
+from .schemas import Created, Keys, Ready
+
+AnyClient = CacheClient | AsyncCacheClient
 
 router = APIRouter(prefix="/cache")
 
 
-def get_instance() -> CacheClient:
-    Cacheia.setup(SETS.CACHEIA_BACKEND_SETTINGS)
-    return Cacheia.get()
+async def get_instance() -> AnyClient:
+    try:
+        return Cacheia.get()
+    except RuntimeError:
+        # set up by the lifespan, unless the app runs without it; building a
+        # client connects and may preload, which must not block the event loop
+        await run_in_threadpool(Cacheia.setup, SETS.CACHEIA_BACKEND_SETTINGS)
+        return Cacheia.get()
+
+
+async def call(cache: AnyClient, method: str, **kwargs) -> Any:
+    """
+    Await a method of an async backend, sync backends run in the threadpool so
+    they do not block the event loop.
+    """
+
+    if isinstance(cache, AsyncCacheClient):
+        return await getattr(cache, method)(**kwargs)
+    return await run_in_threadpool(getattr(cache, method), **kwargs)
+
+
+def jsonable(value: CachedValue) -> CachedValue:
+    """
+    Copy memory mapped binary values, e.g. large values of the file backend,
+    into bytes the JSON encoder accepts.
+    """
+
+    if isinstance(value.value, memoryview):
+        value.value = value.value.tobytes()
+    return value
 
 
 @router.put("/", status_code=201, tags=["Create"])
-def cache(
-    cache: Annotated[CacheClient, Depends(get_instance)],
+async def cache(
+    cache: Annotated[AnyClient, Depends(get_instance)],
     instance: CachedValue,
 ) -> Created:
     """
@@ -29,7 +66,7 @@ def cache(
     """
 
     try:
-        cache.cache(instance=instance)
+        await call(cache, "cache", instance=instance)
         return UJSONResponse(
             content={"id": instance.key},
             status_code=201,
@@ -43,27 +80,104 @@ def cache(
         )
 
 
+@router.put("/$many/", status_code=200, tags=["Create"])
+async def cache_many(
+    cache: Annotated[AnyClient, Depends(get_instance)],
+    instances: list[CachedValue],
+) -> CacheManyResult:
+    """
+    Creates several cache instances, reporting which keys already existed.
+    """
+
+    return await call(cache, "cache_many", instances=instances)
+
+
+@router.post("/$many/", status_code=200, tags=["Read"])
+async def get_many(
+    cache: Annotated[AnyClient, Depends(get_instance)],
+    keys: Keys,
+    allow_expired: bool = Query(False),
+) -> dict[str, CachedValue]:
+    """
+    Gets the cached values for the given keys, missing keys are left out.
+    """
+
+    values = await call(cache, "get_many", keys=keys.keys, allow_expired=allow_expired)
+    return {key: jsonable(value) for key, value in values.items()}
+
+
+@router.delete("/$many/", status_code=200, tags=["Delete"])
+async def flush_many(
+    cache: Annotated[AnyClient, Depends(get_instance)],
+    keys: Keys,
+) -> DeletedResult:
+    """
+    Flushes the given keys.
+    """
+
+    return await call(cache, "flush_many", keys=keys.keys)
+
+
 @router.get("/", status_code=200, tags=["Read"])
-def get(
-    cache: Annotated[CacheClient, Depends(get_instance)],
+async def get(
+    cache: Annotated[AnyClient, Depends(get_instance)],
     group: str | None = Query(None),
     expires_range: tuple[float, float] | None = Query(None),
     creation_range: tuple[datetime, datetime] | None = Query(None),
-) -> Iterable[CachedValue]:
+) -> list[CachedValue]:
     """
     Gets all cached values that matches the given parameters.
     """
 
-    return cache.get(
-        group=group,
-        expires_range=expires_range,
-        creation_range=creation_range,
+    filters = {
+        "group": group,
+        "expires_range": expires_range,
+        "creation_range": creation_range,
+    }
+    if isinstance(cache, AsyncCacheClient):
+        return [jsonable(value) async for value in cache.get(**filters)]
+    # iterating may query the backend too, it must not run in the event loop
+    return await run_in_threadpool(
+        lambda: [jsonable(value) for value in cache.get(**filters)]
     )
 
 
+@router.get(
+    "/$ready/",
+    status_code=200,
+    tags=["Health"],
+    responses={503: {"description": "Cache is still warming up"}},
+)
+async def ready(cache: Annotated[AnyClient, Depends(get_instance)]) -> Ready:
+    """
+    Readiness probe, fails with 503 until the cache is warm.
+    """
+
+    if not cache.ready():
+        raise HTTPException(detail="Cache is warming up", status_code=503)
+    return Ready(ready=True)
+
+
+@router.get(
+    "/$stats/",
+    status_code=200,
+    tags=["Health"],
+    responses={501: {"description": "The backend does not keep statistics"}},
+)
+async def stats(cache: Annotated[AnyClient, Depends(get_instance)]) -> CacheStats:
+    """
+    Entry counts, sizes and counters of the cache, in total and per group.
+    """
+
+    try:
+        return await call(cache, "stats")
+    except NotImplementedError as e:
+        raise HTTPException(detail=str(e), status_code=501)
+
+
 @router.get("/{key}/", status_code=200, tags=["Read"])
-def get_key(
-    cache: Annotated[CacheClient, Depends(get_instance)],
+async def get_key(
+    cache: Annotated[AnyClient, Depends(get_instance)],
     key: str,
     allow_expired: bool = Query(False),
 ) -> CachedValue:
@@ -71,11 +185,12 @@ def get_key(
     Gets the cached value for the given key.
     """
 
-    print("OOGABOOGA")
-    print(key)
     decoded_key = unquote_plus(key)
     try:
-        return cache.get_key(key=decoded_key, allow_expired=allow_expired)
+        value = await call(
+            cache, "get_key", key=decoded_key, allow_expired=allow_expired
+        )
+        return jsonable(value)
     except KeyError as e:
         raise HTTPException(
             detail=f"Key '{e}' not found",
@@ -83,9 +198,59 @@ def get_key(
         )
 
 
+@router.get(
+    "/{key}/$file/",
+    status_code=200,
+    tags=["Read"],
+    response_class=FileResponse,
+    responses={
+        404: {"description": "Key not found or not a binary value"},
+        501: {"description": "The backend does not store values as files"},
+    },
+)
+async def get_file(
+    cache: Annotated[AnyClient, Depends(get_instance)],
+    key: str,
+    allow_expired: bool = Query(False),
+) -> FileResponse:
+    """
+    Sends the bytes of a binary value straight from its file.
+    """
+
+    file_path = getattr(cache, "file_path", None)
+    if file_path is None:
+        raise HTTPException(
+            detail="The cache backend does not store values as files",
+            status_code=501,
+        )
+
+    decoded_key = unquote_plus(key)
+    try:
+        path = await run_in_threadpool(
+            file_path, decoded_key, allow_expired=allow_expired
+        )
+    except KeyError as e:
+        raise HTTPException(
+            detail=f"Key '{e}' not found",
+            status_code=404,
+        )
+    if path is None:
+        raise HTTPException(
+            detail=f"Key '{decoded_key}' is not a binary value",
+            status_code=404,
+        )
+
+    # sent as is, gzipping would read the whole file through the process
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        headers={"Content-Encoding": "identity"},
+    )
+
+
 @router.delete("/", status_code=200, tags=["Delete"])
-def flush(
-    cache: Annotated[CacheClient, Depends(get_instance)],
+async def flush(
+    cache: Annotated[AnyClient, Depends(get_instance)],
     group: str | None = None,
     expires_range: tuple[float, float] | None = None,
     creation_range: tuple[datetime, datetime] | None = None,
@@ -94,7 +259,9 @@ def flush(
     Flushes all keys in the cache that matches the given filters.
     """
 
-    return cache.flush(
+    return await call(
+        cache,
+        "flush",
         group=group,
         expires_range=expires_range,
         creation_range=creation_range,
@@ -102,17 +269,17 @@ def flush(
 
 
 @router.delete("/$clear/", status_code=204, tags=["Delete"])
-def clear(cache: Annotated[CacheClient, Depends(get_instance)]):
+async def clear(cache: Annotated[AnyClient, Depends(get_instance)]):
     """
     Delete all cached values.
     """
 
-    cache.clear()
+    await call(cache, "clear")
 
 
 @router.delete("/{key}/", status_code=200, tags=["Delete"])
-def flush_key(
-    cache: Annotated[CacheClient, Depends(get_instance)],
+async def flush_key(
+    cache: Annotated[AnyClient, Depends(get_instance)],
     key: str,
 ) -> DeletedResult:
     """
@@ -120,4 +287,4 @@ def flush_key(
     """
 
     decoded_key = unquote_plus(key)
-    return cache.flush_key(key=decoded_key)
+    return await call(cache, "flush_key", key=decoded_key)
@@ -3,3 +3,11 @@ from pydantic import BaseModel
 
 class Created(BaseModel):
     id: str
+
+
+class Ready(BaseModel):
+    ready: bool
+
+
+class Keys(BaseModel):
+    keys: list[str]
@@ -9,6 +9,10 @@ class Settings(BaseSettings):
     CACHEIA_PORT: int = 5000
     CACHEIA_RELOAD: bool = True
     CACHEIA_WORKERS: int = 1
+    # Responses of at least this many bytes are gzipped, None disables it
+    CACHEIA_GZIP_MINIMUM_SIZE: int | None = 1024
+    # Threads running sync backends, None keeps anyio's default of 40
+    CACHEIA_THREAD_LIMIT: int | None = None
 
     # Cache config
     CACHEIA_BACKEND_SETTINGS_JSON: str | None = None
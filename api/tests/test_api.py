@@ -1,4 +1,9 @@
+import asyncio
+
 import pytest
+from cacheia import Cacheia
+from cacheia.backends import FileCacheClient, FileCacheClientSettings
+from cacheia_schemas import CachedValue
 from fastapi.testclient import TestClient
 
 from .utils import create, flush_all, flush_key, flush_some, get, get_all, ts_now
@@ -84,3 +89,106 @@ def test_flush_key(client: TestClient):
     r = flush_key(client=client, key="test1")
     assert isinstance(r, int), r
     assert r == 1, f"Expected 1, got {r}"
+
+
+def test_ready(client: TestClient):
+    r = client.get("/cache/$ready/")
+    assert r.status_code == 200
+    assert r.json() == {"ready": True}
+
+
+def test_setup_off_event_loop(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    setup = Cacheia.setup
+    in_loop = []
+
+    def record(settings=None):
+        try:
+            asyncio.get_running_loop()
+            in_loop.append(True)
+        except RuntimeError:
+            in_loop.append(False)
+        setup(settings)
+
+    monkeypatch.setattr(Cacheia, "_cache", None)
+    monkeypatch.setattr(Cacheia, "setup", record)
+    assert client.get("/cache/$ready/").status_code == 200
+    assert client.get("/cache/$ready/").status_code == 200
+    assert in_loop == [False]
+
+
+def test_stats(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    r = create(client=client, key="a", value="a", group="g")
+    if isinstance(r, str):
+        assert False, f"Test failed due to a failure during cache creation:\n{r}"
+
+    r = client.get("/cache/$stats/")
+    assert r.status_code == 200
+    assert r.json()["entries"] == 1
+    assert r.json()["groups"]["g"]["entries"] == 1
+
+    def no_stats():
+        raise NotImplementedError("no statistics")
+
+    monkeypatch.setattr(Cacheia.get(), "stats", no_stats)
+    assert client.get("/cache/$stats/").status_code == 501
+
+
+def test_many(client: TestClient):
+    r = create(client=client, key="a", value="a")
+    if isinstance(r, str):
+        assert False, f"Test failed due to a failure during cache creation:\n{r}"
+
+    r = client.put(
+        "/cache/$many/",
+        json=[{"key": k, "value": k} for k in ("a", "b", "c")],
+    )
+    assert r.status_code == 200
+    assert r.json() == {"created": ["b", "c"], "existing": ["a"]}
+
+    r = client.post("/cache/$many/", json={"keys": ["a", "c", "missing"]})
+    assert r.status_code == 200
+    assert {k: v["value"] for k, v in r.json().items()} == {"a": "a", "c": "c"}
+
+    r = client.request("DELETE", "/cache/$many/", json={"keys": ["a", "b", "x"]})
+    assert r.json() == {"deleted_count": 2}
+    assert [v.key for v in get_all(client)] == ["c"]
+
+
+def test_gzip(client: TestClient):
+    r = create(client=client, key="large", value="x" * 10_000)
+    if isinstance(r, str):
+        assert False, f"Test failed due to a failure during cache creation:\n{r}"
+
+    r = client.get("/cache/large/", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.json()["value"] == "x" * 10_000
+
+
+def test_file(client: TestClient, tmp_path, monkeypatch: pytest.MonkeyPatch):
+    r = create(client=client, key="a", value="a")
+    r = client.get("/cache/a/$file/")
+    assert r.status_code == 501
+
+    files = FileCacheClient(
+        FileCacheClientSettings(
+            CACHE_FS_PATH=str(tmp_path), CACHE_FS_MMAP_THRESHOLD=1024
+        )
+    )
+    monkeypatch.setattr(Cacheia, "_cache", files)
+    files.cache(CachedValue(key="data", value=b"\x00" * 10_000))
+    files.cache(CachedValue(key="text", value="text"))
+
+    # memory mapped values are sent as JSON too
+    r = client.get("/cache/data/")
+    assert r.status_code == 200
+    assert r.json()["value"] == "\x00" * 10_000
+    r = client.post("/cache/$many/", json={"keys": ["data"]})
+    assert r.json()["data"]["value"] == "\x00" * 10_000
+
+    r = client.get("/cache/data/$file/", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/octet-stream"
+    assert r.content == b"\x00" * 10_000
+    assert client.get("/cache/text/$file/").status_code == 404
+    assert client.get("/cache/missing/$file/").status_code == 404
+    files.close()
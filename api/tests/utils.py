@@ -12,7 +12,7 @@ def ts_now() -> float:
 def create(client: TestClient, **data) -> bool | str:
     info = {"key": "a", "value": "a", **data}
     try:
-        r = client.post("/cache/", json=info)
+        r = client.put("/cache/", json=info)
         r.raise_for_status()
         return True
     except Exception as e:
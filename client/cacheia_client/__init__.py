@@ -1,2 +1,12 @@
-from .client import Client, cache, configure, flush_key, get, get_key
+from .client import (
+    Client,
+    cache,
+    cache_many,
+    configure,
+    flush_key,
+    flush_many,
+    get,
+    get_key,
+    get_many,
+)
 from .exceptions import InvalidInputData
@@ -3,7 +3,12 @@ from typing import Iterable
 from urllib.parse import quote_plus
 
 import httpx
-from cacheia_schemas import CachedValue, DeletedResult, KeyAlreadyExists
+from cacheia_schemas import (
+    CachedValue,
+    CacheManyResult,
+    DeletedResult,
+    KeyAlreadyExists,
+)
 
 from .exceptions import InvalidInputData
 
@@ -77,6 +82,35 @@ def flush_key(key: str) -> DeletedResult:
     return c.flush_key(key=key)
 
 
+def cache_many(instances: Iterable[CachedValue]) -> CacheManyResult:
+    """
+    Creates several cache instances in a single request.
+    """
+
+    c = Client()
+    return c.cache_many(instances=instances)
+
+
+def get_many(
+    keys: Iterable[str], allow_expired: bool = False
+) -> dict[str, CachedValue]:
+    """
+    Gets the cached values for the given keys in a single request.
+    """
+
+    c = Client()
+    return c.get_many(keys=keys, allow_expired=allow_expired)
+
+
+def flush_many(keys: Iterable[str]) -> DeletedResult:
+    """
+    Flushes the given keys in a single request.
+    """
+
+    c = Client()
+    return c.flush_many(keys=keys)
+
+
 class Client:
     def __init__(self, url: str | None = None) -> None:
         if url is None:
@@ -99,6 +133,22 @@ class Client:
             case 409:
                 raise KeyAlreadyExists(response.json())
 
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        """
+        Creates several cache instances in a single request.
+        """
+
+        response = httpx.put(
+            url=f"{self._url}/cache/$many/",
+            json=[instance.model_dump(mode="json") for instance in instances],
+        )
+
+        match response.status_code:
+            case 422:
+                raise InvalidInputData(response.json())
+            case _:
+                return CacheManyResult.model_construct(**response.json())
+
     def get(
         self,
         group: str | None = None,
@@ -127,6 +177,14 @@ class Client:
             case _:
                 return map(lambda v: CachedValue.model_construct(**v), response.json())
 
+    def ready(self) -> bool:
+        """
+        Whether the server cache is warm and serving from memory.
+        """
+
+        response = httpx.get(url=f"{self._url}/cache/$ready/")
+        return response.status_code == 200
+
     def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
         """
         Gets the cached value for the given key.
@@ -146,6 +204,29 @@ class Client:
             case _:
                 return CachedValue.model_construct(**response.json())
 
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        """
+        Gets the cached values for the given keys in a single request, missing
+        keys are left out.
+        """
+
+        response = httpx.post(
+            url=f"{self._url}/cache/$many/",
+            json={"keys": list(keys)},
+            params={"allow_expired": allow_expired},
+        )
+
+        match response.status_code:
+            case 422:
+                raise InvalidInputData(response.json())
+            case _:
+                return {
+                    k: CachedValue.model_construct(**v)
+                    for k, v in response.json().items()
+                }
+
     def flush(
         self,
         group: str | None = None,
@@ -188,6 +269,23 @@ class Client:
             case _:
                 return DeletedResult.model_construct(**response.json())
 
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        """
+        Flushes the given keys in a single request.
+        """
+
+        response = httpx.request(
+            "DELETE",
+            url=f"{self._url}/cache/$many/",
+            json={"keys": list(keys)},
+        )
+
+        match response.status_code:
+            case 422:
+                raise InvalidInputData(response.json())
+            case _:
+                return DeletedResult.model_construct(**response.json())
+
     def clear(self) -> None:
         """
         Clears the entire cache.
@@ -0,0 +1,82 @@
+"""
+Write and read throughput of the memory, SQLite and Mongo backends.
+
+Mongo is only measured when a URI is given, with its local mirror disabled so
+reads reach the database.
+
+Usage: python benchmarks/bench_backends.py [size] [mongo uri]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from cacheia_schemas import CacheClient, CachedValue
+
+from cacheia.backends import (
+    MemoryCacheClient,
+    MemoryCacheClientSettings,
+    MongoCacheClient,
+    MongoCacheClientSettings,
+    SQLiteCacheClient,
+    SQLiteCacheClientSettings,
+)
+
+
+def measure(client: CacheClient, size: int) -> tuple[float, float, float]:
+    client.clear()
+    values = [
+        CachedValue(key=str(i), value={"n": i, "s": "x" * 100}) for i in range(size)
+    ]
+
+    start = time.perf_counter()
+    for value in values[: size // 2]:
+        client.cache(value)
+    client.cache_many(values[size // 2 :])
+    writes = size / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(size):
+        client.get_key(str(i))
+    reads = size / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    client.get_many(str(i) for i in range(size))
+    bulk_reads = size / (time.perf_counter() - start)
+
+    client.clear()
+    return writes, reads, bulk_reads
+
+
+def main(size: int, uri: str | None) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        clients = {
+            "memory": MemoryCacheClient(MemoryCacheClientSettings()),
+            "sqlite": SQLiteCacheClient(
+                SQLiteCacheClientSettings(CACHE_SQLITE_PATH=str(Path(tmp) / "bench.db"))
+            ),
+        }
+        if uri is not None:
+            clients["mongo"] = MongoCacheClient(
+                MongoCacheClientSettings(
+                    CACHE_DB_URI=uri,
+                    CACHE_COLLECTION="bench_backends",
+                    CACHE_USE_LOCAL_MEM=False,
+                    CACHE_PRELOAD=False,
+                )
+            )
+
+        print(f"{size} values, operations per second")
+        print(f"{'':>8} {'writes':>10} {'reads':>10} {'get_many':>10}")
+        for name, client in clients.items():
+            writes, reads, bulk_reads = measure(client, size)
+            print(f"{name:>8} {writes:>10.0f} {reads:>10.0f} {bulk_reads:>10.0f}")
+        clients["sqlite"].close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+        sys.argv[2] if len(sys.argv) > 2 else None,
+    )
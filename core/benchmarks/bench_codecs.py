@@ -0,0 +1,71 @@
+"""
+Encode and decode throughput and compression ratio of the value codecs.
+
+Throughput is measured on the encoded payload size before compression,
+the ratio is the uncompressed payload size over the stored size.
+
+Usage: python benchmarks/bench_codecs.py [repeat]
+"""
+
+import random
+import sys
+import time
+
+from cacheia.backends.codecs import ValueCodec
+
+CODECS = ["pickle", "msgpack", "orjson"]
+COMPRESSIONS = [None, "zlib", "zstd", "lz4"]
+
+
+def payloads() -> dict:
+    rng = random.Random(0)
+    words = ["cache", "cacheia", "value", "group", "expires", "render", "page"]
+    html = "".join(
+        f"<div class='row'><span>{rng.choice(words)}</span>{i}</div>"
+        for i in range(6_000)
+    )
+    return {
+        "html": html,
+        "embedding": [rng.uniform(-1, 1) for _ in range(1536)],
+        "records": [
+            {"id": i, "name": rng.choice(words), "score": rng.random(), "tags": words}
+            for i in range(2_000)
+        ],
+    }
+
+
+def measure(
+    codec: ValueCodec, raw: int, value, repeat: int
+) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        payload, tag = codec.encode(value)
+    encode = raw * repeat / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        codec.decode(payload, tag)
+    decode = raw * repeat / (time.perf_counter() - start)
+    return encode / 2**20, decode / 2**20, raw / len(payload)
+
+
+def main(repeat: int) -> None:
+    for name, value in payloads().items():
+        size = len(ValueCodec("pickle").encode(value)[0])
+        print(f"\n{name} ({size / 1024:.0f} KiB pickled)")
+        print(f"{'codec':>14} {'encode MiB/s':>13} {'decode MiB/s':>13} {'ratio':>7}")
+        for codec in CODECS:
+            raw = len(ValueCodec(codec).encode(value)[0])
+            for compression in COMPRESSIONS:
+                try:
+                    c = ValueCodec(codec, compression, threshold=0)
+                except ImportError as e:
+                    print(f"{codec}+{compression}: skipped, {e}")
+                    continue
+                tag = codec if compression is None else f"{codec}+{compression}"
+                encode, decode, ratio = measure(c, raw, value, repeat)
+                print(f"{tag:>14} {encode:>13.0f} {decode:>13.0f} {ratio:>7.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
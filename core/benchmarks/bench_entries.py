@@ -0,0 +1,68 @@
+"""
+Memory per entry and throughput of CachedValue against the backend Entry.
+
+Usage: python benchmarks/bench_entries.py [size]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from cacheia_schemas import CachedValue
+
+from cacheia.backends.entry import Entry
+
+
+def build_values(size: int) -> dict:
+    now = datetime.now()
+    return {
+        str(i): CachedValue(key=str(i), value=i, created_at=now) for i in range(size)
+    }
+
+
+def build_entries(size: int) -> dict:
+    now = datetime.now().timestamp()
+    return {str(i): Entry(str(i), i, None, None, now) for i in range(size)}
+
+
+def measure(build, size: int) -> tuple[float, float]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = build(size)
+    elapsed = time.perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del store
+    return used / size, size / elapsed
+
+
+def reads(store: dict, convert) -> float:
+    start = time.perf_counter()
+    for key in store:
+        convert(store[key])
+    return len(store) / (time.perf_counter() - start)
+
+
+def main(size: int) -> None:
+    value_bytes, value_ops = measure(build_values, size)
+    entry_bytes, entry_ops = measure(build_entries, size)
+
+    values = build_values(size)
+    value_reads = reads(values, lambda v: v)
+    del values
+    entries = build_entries(size)
+    entry_reads = reads(entries, Entry.to_value)
+
+    print(f"{size} entries")
+    print(f"{'':>12} {'bytes/entry':>12} {'writes/s':>12} {'reads/s':>12}")
+    print(
+        f"{'CachedValue':>12} {value_bytes:>12.0f} {value_ops:>12.0f} {value_reads:>12.0f}"
+    )
+    print(f"{'Entry':>12} {entry_bytes:>12.0f} {entry_ops:>12.0f} {entry_reads:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
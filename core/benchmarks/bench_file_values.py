@@ -0,0 +1,69 @@
+"""
+Read latency and resident memory of large binary values in the file backend,
+returned as memoryviews over mmap or copied into bytes.
+
+RSS is measured while holding the value returned by 'get_key', before any of
+its pages are touched. Linux only, it reads /proc/self/statm.
+
+Usage: python benchmarks/bench_file_values.py [repeat]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+
+from cacheia_schemas import CachedValue
+
+from cacheia.backends import FileCacheClient, FileCacheClientSettings
+
+SIZES_MB = (1, 10, 100)
+
+
+def rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(client: FileCacheClient, key: str, repeat: int) -> tuple[float, float]:
+    timings = []
+    growth = []
+    for _ in range(repeat):
+        gc.collect()
+        before = rss()
+        start = time.perf_counter()
+        value = client.get_key(key).value
+        timings.append(time.perf_counter() - start)
+        growth.append(rss() - before)
+        del value
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, max(growth) / 2**20
+
+
+def main(repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        mapped = FileCacheClient(FileCacheClientSettings(CACHE_FS_PATH=tmp))
+        for mb in SIZES_MB:
+            mapped.cache(CachedValue(key=str(mb), value=os.urandom(mb * 2**20)))
+        mapped.close()
+
+        clients = {
+            "mmap": FileCacheClient(FileCacheClientSettings(CACHE_FS_PATH=tmp)),
+            "copy": FileCacheClient(
+                FileCacheClientSettings(
+                    CACHE_FS_PATH=tmp, CACHE_FS_MMAP_THRESHOLD=sys.maxsize
+                )
+            ),
+        }
+
+        print(f"median of {repeat} reads")
+        print(f"{'':>6} {'size':>6} {'ms':>10} {'RSS MB':>10}")
+        for mb in SIZES_MB:
+            for name, client in clients.items():
+                latency, growth = measure(client, str(mb), repeat)
+                print(f"{name:>6} {mb:>4}MB {latency:>10.3f} {growth:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,68 @@
+"""
+Mirror hit rate of the Mongo backend under reads mixed with group flushes.
+
+Values are spread over groups, reads pick random keys and every so often a
+random group is flushed and rebuilt. 'scoped' is the current behaviour, only
+the flushed keys leave the mirror. 'clear' emulates the previous behaviour of
+wiping the whole mirror on every flush. Needs a running Mongo.
+
+Usage: python benchmarks/bench_group_flush.py [uri] [keys] [groups] [reads]
+"""
+
+import random
+import sys
+
+from cacheia_schemas import CachedValue
+
+from cacheia.backends import MongoCacheClient, MongoCacheClientSettings
+
+FLUSH_EVERY = 1_000
+
+
+def run(name: str, uri: str, keys: int, groups: int, reads: int) -> None:
+    client = MongoCacheClient(
+        MongoCacheClientSettings(CACHE_DB_URI=uri, CACHE_COLLECTION="bench_flush")
+    )
+    client.clear()
+    client.cache_many(
+        CachedValue(key=str(i), value=i, group=str(i % groups)) for i in range(keys)
+    )
+
+    rng = random.Random(0)
+    for i in range(1, reads + 1):
+        key = rng.randrange(keys)
+        try:
+            client.get_key(str(key))
+        except KeyError:
+            pass
+
+        if i % FLUSH_EVERY == 0:
+            group = rng.randrange(groups)
+            client.flush(group=str(group))
+            if name == "clear":
+                client._mem.clear()
+            client.cache_many(
+                CachedValue(key=str(k), value=k, group=str(group))
+                for k in range(group, keys, groups)
+            )
+            # rebuilt values are read back from Mongo, not preloaded
+            client._mem.flush_many(str(k) for k in range(group, keys, groups))
+
+    counters = client.stats().counters
+    hits, misses = counters["mirror_hits"], counters["mirror_misses"]
+    print(f"{name:>8} hit rate {hits / (hits + misses):.3f} ({misses} misses)")
+    client.clear()
+    client.close()
+
+
+def main(uri: str, keys: int, groups: int, reads: int) -> None:
+    print(f"{keys} keys in {groups} groups, flush every {FLUSH_EVERY} reads")
+    for name in ("scoped", "clear"):
+        run(name, uri, keys, groups, reads)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    uri = args[0] if args else "mongodb://localhost:27017"
+    numbers = [int(a) for a in args[1:]]
+    main(uri, *(numbers + [20_000, 50, 100_000][len(numbers) :]))
@@ -0,0 +1,64 @@
+"""
+Range query latency of the memory backend against a full scan.
+
+Usage: python benchmarks/bench_range_queries.py [sizes...]
+"""
+
+import sys
+import time
+from datetime import datetime
+
+from cacheia_schemas import CachedValue
+
+from cacheia.backends import MemoryCacheClient, MemoryCacheClientSettings
+
+MATCHES = 100
+ROUNDS = 20
+
+
+def fill(client: MemoryCacheClient, size: int) -> float:
+    now = time.time()
+    for i in range(size):
+        client.cache(
+            CachedValue.model_construct(
+                key=str(i),
+                value=i,
+                group=None,
+                created_at=datetime.fromtimestamp(now - size + i),
+                expires_at=now + 3600 + i,
+            )
+        )
+    return now
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'entries':>10} {'creation':>12} {'expires':>12} {'full scan':>12}")
+    for size in sizes:
+        client = MemoryCacheClient(MemoryCacheClientSettings())
+        now = fill(client, size)
+
+        middle = now - size / 2
+        creation_range = (
+            datetime.fromtimestamp(middle),
+            datetime.fromtimestamp(middle + MATCHES - 1),
+        )
+        expires_range = (now + 3600 + size / 2, now + 3600 + size / 2 + MATCHES - 1)
+        lo, hi = middle, middle + MATCHES - 1
+
+        creation = timed(lambda: list(client.get(creation_range=creation_range)))
+        expires = timed(lambda: list(client.get(expires_range=expires_range)))
+        scan = timed(
+            lambda: [v for v in client._mem.values() if lo <= v.created_at <= hi]
+        )
+        print(f"{size:>10} {creation:>10.3f}ms {expires:>10.3f}ms {scan:>10.3f}ms")
+
+
+if __name__ == "__main__":
+    main([int(s) for s in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,87 @@
+"""
+Multi-threaded stress test of the memory backends.
+
+Every thread runs a mix of cache, get_key and flush_key over a shared key
+space, then the cache is checked for consistency. On a free-threaded build
+(e.g. python3.13t) threads run in parallel.
+
+Usage: python benchmarks/bench_threads.py [threads] [ops per thread]
+"""
+
+import random
+import sys
+import threading
+import time
+
+from cacheia_schemas import CacheClient, CachedValue, KeyAlreadyExists
+
+from cacheia.backends import (
+    MemoryCacheClient,
+    MemoryCacheClientSettings,
+    StripedMemoryCacheClient,
+    StripedMemoryCacheClientSettings,
+)
+
+KEYS = 10_000
+
+
+def worker(client: CacheClient, ops: int, seed: int, errors: list) -> None:
+    rng = random.Random(seed)
+    for _ in range(ops):
+        key = str(rng.randrange(KEYS))
+        op = rng.random()
+        try:
+            if op < 0.2:
+                client.cache(CachedValue(key=key, value=key, group=key[-1]))
+            elif op < 0.9:
+                client.get_key(key)
+            else:
+                client.flush_key(key)
+        except (KeyAlreadyExists, KeyError):
+            pass
+        except Exception as e:
+            errors.append(e)
+
+
+def consistent(client: CacheClient) -> bool:
+    segments = getattr(client, "_segments", [client])
+    return all(
+        len(s._mem) == len(s._meta) == len(s._created) == len(s._expires)
+        for s in segments
+    )
+
+
+def run(name: str, client: CacheClient, threads: int, ops: int) -> None:
+    errors: list[Exception] = []
+    pool = [
+        threading.Thread(target=worker, args=(client, ops, seed, errors))
+        for seed in range(threads)
+    ]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{name:>8} {threads * ops / elapsed:>12.0f} ops/s "
+        f"errors={len(errors)} consistent={consistent(client)}"
+    )
+
+
+def main(threads: int, ops: int) -> None:
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]} gil={gil} threads={threads}")
+    run("memory", MemoryCacheClient(MemoryCacheClientSettings()), threads, ops)
+    run(
+        "striped",
+        StripedMemoryCacheClient(StripedMemoryCacheClientSettings()),
+        threads,
+        ops,
+    )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [8, 50_000][len(args) :]))
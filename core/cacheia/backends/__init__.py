@@ -1,2 +1,11 @@
+from .async_mongo import AsyncMongoCacheClient, AsyncMongoCacheClientSettings
+from .files import FileCacheClient, FileCacheClientSettings
 from .memory import MemoryCacheClient, MemoryCacheClientSettings
 from .mongo import MongoCacheClient, MongoCacheClientSettings
+from .redis import RedisCacheClient, RedisCacheClientSettings
+from .s3 import S3CacheClient, S3CacheClientSettings
+from .sharded import ShardedCacheClient, ShardedCacheClientSettings
+from .shared import SharedMemoryCacheClient, SharedMemoryCacheClientSettings
+from .sqlite import SQLiteCacheClient, SQLiteCacheClientSettings
+from .striped import StripedMemoryCacheClient, StripedMemoryCacheClientSettings
+from .tiered import TieredCacheClient, TieredCacheClientSettings
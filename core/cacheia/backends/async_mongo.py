@@ -0,0 +1,196 @@
+from datetime import datetime
+from typing import AsyncIterator, Iterable
+
+from cacheia_schemas import (
+    AsyncCacheClient,
+    CacheClientSettings,
+    CachedValue,
+    CacheManyResult,
+    CacheStats,
+    DeletedResult,
+    KeyAlreadyExists,
+)
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from .codecs import codec_from_settings
+from .mongo import (
+    BACKFILL_FILTER,
+    BACKFILL_UPDATE,
+    INDEXES,
+    LEGACY_INDEX,
+    TTL_FIELD,
+    build_filters,
+    from_document,
+    stats_from_groups,
+    stats_pipeline,
+    to_document,
+)
+from .utils import duplicate_indexes, ts_now
+
+
+async def migrate(coll: AsyncCollection) -> None:
+    """
+    Async counterpart of 'cacheia.backends.mongo.migrate'.
+    """
+
+    if LEGACY_INDEX in await coll.index_information():
+        await coll.drop_index(LEGACY_INDEX)
+    await coll.update_many(BACKFILL_FILTER, BACKFILL_UPDATE)
+
+
+class AsyncMongoCacheClientSettings(CacheClientSettings):
+    CACHE_DB_URI: str = "mongodb://localhost:27017"
+    CACHE_DB_NAME: str = "cacheia"
+    CACHE_COLLECTION: str = "values"
+    CACHE_MAX_POOL_SIZE: int = 100
+
+
+class AsyncMongoCacheClient(AsyncCacheClient):
+    """
+    Mongo backend on top of PyMongo's asyncio client.
+
+    There is no local mirror, every operation is a round trip to Mongo that
+    does not hold a thread while waiting.
+    """
+
+    def __init__(self, settings: AsyncMongoCacheClientSettings) -> None:
+        self._client = AsyncMongoClient(
+            settings.CACHE_DB_URI,
+            maxPoolSize=settings.CACHE_MAX_POOL_SIZE,
+        )
+        self._database = self._client[settings.CACHE_DB_NAME]
+        self._coll = self._database[settings.CACHE_COLLECTION]
+        self._codec = codec_from_settings(settings)
+        self._indexed = False
+
+    async def _ensure_indexes(self) -> None:
+        # indexes can not be created in '__init__', they are created by the
+        # first operation of any kind, concurrent first calls are harmless as
+        # creating them is idempotent
+        if self._indexed:
+            return
+
+        try:
+            if LEGACY_INDEX in await self._coll.index_information():
+                await migrate(self._coll)
+            await self._coll.create_indexes(INDEXES)
+        except OperationFailure:
+            pass
+        self._indexed = True
+
+    async def cache(self, instance: CachedValue) -> None:
+        await self._ensure_indexes()
+        try:
+            await self._coll.insert_one(to_document(instance, self._codec))
+        except DuplicateKeyError:
+            raise KeyAlreadyExists(instance.key)
+
+    async def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        await self._ensure_indexes()
+        instances = list(instances)
+        result = CacheManyResult()
+        if not instances:
+            return result
+
+        existing: set[int] = set()
+        try:
+            await self._coll.insert_many(
+                [to_document(instance, self._codec) for instance in instances],
+                ordered=False,
+            )
+        except BulkWriteError as e:
+            existing = duplicate_indexes(e)
+
+        for index, instance in enumerate(instances):
+            if index in existing:
+                result.existing.append(instance.key)
+            else:
+                result.created.append(instance.key)
+        return result
+
+    async def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> AsyncIterator[CachedValue]:
+        await self._ensure_indexes()
+        filters = build_filters(group, expires_range, creation_range)
+        async for doc in self._coll.find(filters):
+            yield from_document(doc, self._codec)
+
+    async def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        await self._ensure_indexes()
+        now = ts_now()
+        doc = await self._coll.find_one({"_id": key})
+        if not doc:
+            raise KeyError(key)
+
+        if not allow_expired:
+            if doc["expires_at"] is not None and doc["expires_at"] <= now:
+                await self._coll.delete_one({"_id": key})
+                raise KeyError(key)
+
+        return from_document(doc, self._codec)
+
+    async def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        await self._ensure_indexes()
+        keys = list(keys)
+        now = ts_now()
+        found = {}
+        expired = []
+        cursor = self._coll.find({"_id": {"$in": keys}}, projection={TTL_FIELD: False})
+        async for doc in cursor:
+            if not allow_expired:
+                if doc["expires_at"] is not None and doc["expires_at"] <= now:
+                    expired.append(doc["_id"])
+                    continue
+
+            value = from_document(doc, self._codec)
+            found[value.key] = value
+
+        if expired:
+            await self._coll.delete_many({"_id": {"$in": expired}})
+        return {key: found[key] for key in keys if key in found}
+
+    async def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        await self._ensure_indexes()
+        filters = build_filters(group, expires_range, creation_range)
+        r = await self._coll.delete_many(filters)
+        return DeletedResult(deleted_count=r.deleted_count)
+
+    async def flush_key(self, key: str) -> DeletedResult:
+        await self._ensure_indexes()
+        r = await self._coll.delete_one({"_id": key})
+        return DeletedResult(deleted_count=r.deleted_count)
+
+    async def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        await self._ensure_indexes()
+        r = await self._coll.delete_many({"_id": {"$in": list(keys)}})
+        return DeletedResult(deleted_count=r.deleted_count)
+
+    async def clear(self) -> None:
+        await self._ensure_indexes()
+        await self._coll.delete_many({})
+
+    async def stats(self) -> CacheStats:
+        """
+        Statistics of the stored values, counted by an aggregation over the
+        collection.
+        """
+
+        await self._ensure_indexes()
+        cursor = await self._coll.aggregate(stats_pipeline(ts_now()))
+        return stats_from_groups([doc async for doc in cursor])
+
+    async def close(self) -> None:
+        await self._client.close()
@@ -0,0 +1,59 @@
+import math
+import threading
+from hashlib import blake2b
+
+
+class BloomFilter:
+    """
+    Set of keys answering membership with no false negatives and a bounded
+    rate of false positives.
+
+    Keys can not be removed, removed keys keep answering as present until the
+    filter is rebuilt. Adding is thread safe, lookups take no lock.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(capacity, 1)
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self._bits = bytearray((bits + 7) // 8)
+        self._size = len(self._bits) * 8
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key: str) -> list[int]:
+        # double hashing, k positions derived from two 64 bit hashes
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._size for i in range(self._hashes)]
+
+    def add(self, key: str) -> None:
+        positions = self._positions(key)
+        with self._lock:
+            for p in positions:
+                self._bits[p >> 3] |= 1 << (p & 7)
+            self._count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def __len__(self) -> int:
+        """
+        Number of keys added, keys added more than once are counted again.
+        """
+
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def error_rate(self) -> float:
+        """
+        Expected false positive rate for the keys added so far.
+        """
+
+        return (1 - math.exp(-self._hashes * self._count / self._size)) ** self._hashes
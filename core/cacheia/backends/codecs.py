@@ -0,0 +1,133 @@
+import importlib
+import pickle
+import threading
+import zlib
+from functools import cache
+from typing import Any, Callable
+
+from cacheia_schemas import CacheClientSettings, CodecName, CompressionName
+
+Dumps = Callable[[Any], bytes]
+Loads = Callable[[bytes], Any]
+
+# name -> (module, extra that installs it)
+_OPTIONAL = {
+    "msgpack": ("msgpack", "msgpack"),
+    "orjson": ("orjson", "orjson"),
+    "zstd": ("zstandard", "zstd"),
+    "lz4": ("lz4.frame", "lz4"),
+}
+
+
+def _import(name: str):
+    module, extra = _OPTIONAL[name]
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise ImportError(
+            f"The '{name}' codec needs '{module}', install it with "
+            f"'pip install cacheia[{extra}]'"
+        ) from e
+
+
+@cache
+def serializer(name: str) -> tuple[Dumps, Loads]:
+    match name:
+        case "pickle":
+            return (
+                lambda v: pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL),
+                pickle.loads,
+            )
+        case "msgpack":
+            msgpack = _import(name)
+            return msgpack.packb, lambda b: msgpack.unpackb(b, strict_map_key=False)
+        case "orjson":
+            orjson = _import(name)
+            return orjson.dumps, orjson.loads
+    raise ValueError(f"Unknown codec '{name}'")
+
+
+@cache
+def compressor(name: str) -> tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    match name:
+        case "zlib":
+            return zlib.compress, zlib.decompress
+        case "zstd":
+            zstandard = _import(name)
+            # zstandard contexts are not thread safe, each thread gets its own
+            local = threading.local()
+
+            def compress(data: bytes) -> bytes:
+                if (c := getattr(local, "compressor", None)) is None:
+                    c = local.compressor = zstandard.ZstdCompressor()
+                return c.compress(data)
+
+            def decompress(data: bytes) -> bytes:
+                if (d := getattr(local, "decompressor", None)) is None:
+                    d = local.decompressor = zstandard.ZstdDecompressor()
+                return d.decompress(data)
+
+            return compress, decompress
+        case "lz4":
+            frame = _import(name)
+            return frame.compress, frame.decompress
+    raise ValueError(f"Unknown compression '{name}'")
+
+
+class ValueCodec:
+    """
+    Turns values into binary payloads and back.
+
+    Each payload comes with a tag naming how it was encoded, e.g. 'msgpack' or
+    'msgpack+zstd', which must be stored next to it. Decoding relies on the
+    tag for the compression, so values written with other compression
+    settings can still be read, but payloads of another codec are rejected:
+    whoever writes the store must not choose how it is deserialized.
+    """
+
+    def __init__(
+        self,
+        codec: CodecName,
+        compression: CompressionName | None = None,
+        threshold: int = 0,
+    ) -> None:
+        # fail on missing optional dependencies now, not on the first write
+        self._dumps, self._loads = serializer(codec)
+        self._compress = compressor(compression)[0] if compression else None
+        self._codec = codec
+        self._compressed_tag = f"{codec}+{compression}"
+        self._threshold = threshold
+
+    def encode(self, value: Any) -> tuple[bytes, str]:
+        payload = self._dumps(value)
+        if self._compress is not None and len(payload) >= self._threshold:
+            return self._compress(payload), self._compressed_tag
+        return payload, self._codec
+
+    def decode(self, payload: bytes, tag: str) -> Any:
+        codec, _, compression = tag.partition("+")
+        if codec != self._codec:
+            raise ValueError(
+                f"Payload encoded with '{codec}', the configured codec is "
+                f"'{self._codec}'"
+            )
+        if compression:
+            payload = compressor(compression)[1](payload)
+        return self._loads(payload)
+
+
+def codec_from_settings(settings: CacheClientSettings) -> ValueCodec | None:
+    """
+    Codec configured by the settings, None when values are stored as they are.
+
+    Compression without a codec encodes values with pickle.
+    """
+
+    if settings.CACHE_CODEC is None and settings.CACHE_COMPRESSION is None:
+        return None
+
+    return ValueCodec(
+        settings.CACHE_CODEC or "pickle",
+        settings.CACHE_COMPRESSION,
+        settings.CACHE_COMPRESSION_THRESHOLD,
+    )
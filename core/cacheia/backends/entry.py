@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Any
+
+from cacheia_schemas import CachedValue
+
+
+class Entry:
+    """
+    Compact representation of a cached value used inside the backends.
+
+    'created_at' is kept as a timestamp, values are converted back to
+    CachedValue only when returned to the caller.
+    """
+
+    __slots__ = ("key", "value", "group", "expires_at", "created_at")
+
+    def __init__(
+        self,
+        key: str,
+        value: Any,
+        group: str | None,
+        expires_at: float | None,
+        created_at: float,
+    ) -> None:
+        self.key = key
+        self.value = value
+        self.group = group
+        self.expires_at = expires_at
+        self.created_at = created_at
+
+    @classmethod
+    def from_value(cls, instance: CachedValue) -> "Entry":
+        return cls(
+            instance.key,
+            instance.value,
+            instance.group,
+            instance.expires_at,
+            instance.created_at.timestamp(),
+        )
+
+    def to_value(self) -> CachedValue:
+        return CachedValue(
+            key=self.key,
+            value=self.value,
+            group=self.group,
+            expires_at=self.expires_at,
+            created_at=datetime.fromtimestamp(self.created_at),
+        )
@@ -0,0 +1,142 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Literal
+
+EvictionPolicyName = Literal["lru", "lfu", "fifo"]
+
+
+class EvictionPolicy(ABC):
+    """
+    Tracks which key should be evicted next.
+
+    All operations are expected to run in O(1).
+    """
+
+    @abstractmethod
+    def insert(self, key: str) -> None: ...
+
+    @abstractmethod
+    def touch(self, key: str) -> None: ...
+
+    @abstractmethod
+    def remove(self, key: str) -> None: ...
+
+    @abstractmethod
+    def victim(self) -> str:
+        """
+        Return the next key to be evicted without removing it.
+
+        :raises KeyError: if there are no tracked keys
+        """
+        ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+class LRUPolicy(EvictionPolicy):
+    def __init__(self) -> None:
+        self._order: OrderedDict[str, None] = OrderedDict()
+
+    def insert(self, key: str) -> None:
+        self._order[key] = None
+
+    def touch(self, key: str) -> None:
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def remove(self, key: str) -> None:
+        self._order.pop(key, None)
+
+    def victim(self) -> str:
+        for key in self._order:
+            return key
+        raise KeyError("victim from empty policy")
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class FIFOPolicy(LRUPolicy):
+    def touch(self, key: str) -> None:
+        pass
+
+
+class _FrequencyNode:
+    __slots__ = ("freq", "keys", "prev", "next")
+
+    def __init__(self, freq: int) -> None:
+        self.freq = freq
+        self.keys: dict[str, None] = {}
+        self.prev: _FrequencyNode = self
+        self.next: _FrequencyNode = self
+
+
+class LFUPolicy(EvictionPolicy):
+    """
+    Constant time LFU: keys are grouped in a linked list of frequency nodes
+    sorted by frequency, ties are broken by insertion order (oldest first).
+    """
+
+    def __init__(self) -> None:
+        self._head = _FrequencyNode(0)
+        self._nodes: dict[str, _FrequencyNode] = {}
+
+    def _insert_after(self, node: _FrequencyNode, freq: int) -> _FrequencyNode:
+        new = _FrequencyNode(freq)
+        new.prev = node
+        new.next = node.next
+        node.next.prev = new
+        node.next = new
+        return new
+
+    def _unlink_if_empty(self, node: _FrequencyNode) -> None:
+        if node.keys or node is self._head:
+            return
+        node.prev.next = node.next
+        node.next.prev = node.prev
+
+    def insert(self, key: str) -> None:
+        first = self._head.next
+        if first is self._head or first.freq != 1:
+            first = self._insert_after(self._head, 1)
+        first.keys[key] = None
+        self._nodes[key] = first
+
+    def touch(self, key: str) -> None:
+        node = self._nodes.get(key)
+        if node is None:
+            return
+
+        nxt = node.next
+        if nxt is self._head or nxt.freq != node.freq + 1:
+            nxt = self._insert_after(node, node.freq + 1)
+
+        del node.keys[key]
+        nxt.keys[key] = None
+        self._nodes[key] = nxt
+        self._unlink_if_empty(node)
+
+    def remove(self, key: str) -> None:
+        node = self._nodes.pop(key, None)
+        if node is None:
+            return
+        del node.keys[key]
+        self._unlink_if_empty(node)
+
+    def victim(self) -> str:
+        first = self._head.next
+        for key in first.keys:
+            return key
+        raise KeyError("victim from empty policy")
+
+    def clear(self) -> None:
+        self._head = _FrequencyNode(0)
+        self._nodes.clear()
+
+
+POLICIES: dict[EvictionPolicyName, type[EvictionPolicy]] = {
+    "lru": LRUPolicy,
+    "lfu": LFUPolicy,
+    "fifo": FIFOPolicy,
+}
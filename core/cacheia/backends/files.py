@@ -0,0 +1,293 @@
+import json
+import mmap
+import operator
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Iterable, NamedTuple
+
+from cacheia_schemas import (
+    CacheClient,
+    CacheClientSettings,
+    CachedValue,
+    CacheStats,
+    DeletedResult,
+    KeyAlreadyExists,
+)
+
+from .codecs import ValueCodec, codec_from_settings
+from .entry import Entry
+from .utils import count_value, ts_now
+
+# Tag of values stored as their own bytes, without a codec
+RAW = "raw"
+
+# The index log is rewritten once it holds this many records per live value
+COMPACT_RATIO = 4
+COMPACT_MIN_RECORDS = 1_000
+
+
+class FileCacheClientSettings(CacheClientSettings):
+    CACHE_FS_PATH: str = "cacheia-files"
+    # Binary values of at least this many bytes are read as memoryviews over a
+    # memory map of their file instead of being copied.
+    CACHE_FS_MMAP_THRESHOLD: int = 2**20
+
+
+class _Indexed(NamedTuple):
+    tag: str
+    group: str | None
+    created_at: float
+    expires_at: float | None
+    size: int
+
+
+class FileCacheClient(CacheClient):
+    """
+    Directory backed cache storing each value in its own file.
+
+    Binary values (bytes, bytearray, memoryview) are written as they are,
+    other values are encoded with 'CACHE_CODEC', pickle when unset. Large
+    binary values are returned as read only memoryviews over a memory map, so
+    reading them copies nothing and only touched pages are loaded.
+
+    The index of keys, groups and timestamps lives in memory and is persisted
+    as an append only log, rewritten when it grows much larger than the
+    index. A directory must only be used by one process at a time.
+    """
+
+    def __init__(self, settings: FileCacheClientSettings) -> None:
+        self._root = Path(settings.CACHE_FS_PATH)
+        self._values = self._root / "values"
+        self._values.mkdir(parents=True, exist_ok=True)
+        self._log_path = self._root / "index.log"
+        self._threshold = settings.CACHE_FS_MMAP_THRESHOLD
+        self._codec = codec_from_settings(settings) or ValueCodec("pickle")
+        self._lock = threading.Lock()
+        # keys whose files are being written, reserved against concurrent writers
+        self._writing: set[str] = set()
+        self._index: dict[str, _Indexed] = {}
+        self._records = self._replay()
+        self._log = self._log_path.open("a", encoding="utf-8")
+
+    def _replay(self) -> int:
+        if not self._log_path.exists():
+            return 0
+
+        records = 0
+        with self._log_path.open(encoding="utf-8") as log:
+            for line in log:
+                try:
+                    op, key, *fields = json.loads(line)
+                except ValueError:
+                    # a record cut short by a crash
+                    continue
+                if op == "put":
+                    self._index[key] = _Indexed(*fields)
+                else:
+                    self._index.pop(key, None)
+                records += 1
+        return records
+
+    def _append(self, record: list) -> None:
+        self._log.write(json.dumps(record) + "\n")
+        self._log.flush()
+        self._records += 1
+        if self._records > max(COMPACT_MIN_RECORDS, COMPACT_RATIO * len(self._index)):
+            self._compact()
+
+    def _compact(self) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self._root, prefix="index.")
+        with os.fdopen(fd, "w", encoding="utf-8") as log:
+            for key, indexed in self._index.items():
+                log.write(json.dumps(["put", key, *indexed]) + "\n")
+        self._log.close()
+        os.replace(tmp, self._log_path)
+        self._log = self._log_path.open("a", encoding="utf-8")
+        self._records = len(self._index)
+
+    def _path(self, key: str) -> Path:
+        name = sha256(key.encode()).hexdigest()
+        return self._values / name[:2] / name
+
+    def file_path(self, key: str, allow_expired: bool = False) -> Path | None:
+        """
+        File holding the bytes of a binary value, e.g. to send it as is.
+
+        :return: the path, None if the value is not stored as raw bytes
+        :raises KeyError: if key does not exist or is expired
+        """
+
+        indexed = self._lookup(key, allow_expired)
+        return self._path(key) if indexed.tag == RAW else None
+
+    def _lookup(self, key: str, allow_expired: bool) -> _Indexed:
+        indexed = self._index.get(key)
+        if indexed is None:
+            raise KeyError(key)
+
+        expires_at = indexed.expires_at
+        if not allow_expired and expires_at is not None and expires_at <= ts_now():
+            self._remove(key)
+            raise KeyError(key)
+        return indexed
+
+    def _read(self, key: str, indexed: _Indexed) -> Any:
+        path = self._path(key)
+        if indexed.tag != RAW:
+            return self._codec.decode(path.read_bytes(), indexed.tag)
+
+        if 0 < indexed.size and indexed.size >= self._threshold:
+            with path.open("rb") as f:
+                # the map outlives the file object and even the file's removal
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return path.read_bytes()
+
+    def _entry(self, key: str, indexed: _Indexed) -> Entry:
+        try:
+            value = self._read(key, indexed)
+        except FileNotFoundError:
+            # flushed since it was looked up
+            raise KeyError(key) from None
+        return Entry(key, value, indexed.group, indexed.expires_at, indexed.created_at)
+
+    def _remove(self, key: str) -> bool:
+        with self._lock:
+            if self._index.pop(key, None) is None:
+                return False
+            self._append(["del", key])
+            # under the lock, or the file of a concurrent 'cache' of the key
+            # could be the one removed
+            self._path(key).unlink(missing_ok=True)
+        return True
+
+    def cache(self, instance: CachedValue) -> None:
+        key = instance.key
+        with self._lock:
+            if key in self._index or key in self._writing:
+                raise KeyAlreadyExists(key)
+            self._writing.add(key)
+
+        try:
+            value = instance.value
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                payload, tag = value, RAW
+            else:
+                payload, tag = self._codec.encode(value)
+
+            path = self._path(key)
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp.")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+
+            indexed = _Indexed(
+                tag,
+                instance.group,
+                instance.created_at.timestamp(),
+                instance.expires_at,
+                memoryview(payload).nbytes,
+            )
+            with self._lock:
+                self._index[key] = indexed
+                self._append(["put", key, *indexed])
+        finally:
+            with self._lock:
+                self._writing.discard(key)
+
+    def _select(
+        self,
+        group: str | None,
+        expires_range: tuple[float, float] | None,
+        creation_range: tuple[datetime, datetime] | None,
+        inclusive: tuple[bool, bool],
+    ) -> list[str]:
+        created = None
+        if creation_range is not None:
+            created = (creation_range[0].timestamp(), creation_range[1].timestamp())
+
+        lo_ok = operator.le if inclusive[0] else operator.lt
+        hi_ok = operator.le if inclusive[1] else operator.lt
+        now = ts_now()
+        selected = []
+        for key, indexed in list(self._index.items()):
+            if group is not None and indexed.group != group:
+                continue
+            if created is not None:
+                ts = indexed.created_at
+                if not (lo_ok(created[0], ts) and hi_ok(ts, created[1])):
+                    continue
+            if indexed.expires_at is not None:
+                ts = indexed.expires_at
+                if expires_range is not None:
+                    if not (
+                        lo_ok(expires_range[0], ts) and hi_ok(ts, expires_range[1])
+                    ):
+                        continue
+                elif ts <= now:
+                    continue
+            selected.append(key)
+        return selected
+
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> Iterable[CachedValue]:
+        for key in self._select(group, expires_range, creation_range, (True, True)):
+            indexed = self._index.get(key)
+            if indexed is None:
+                continue
+            try:
+                entry = self._entry(key, indexed)
+            except KeyError:
+                continue
+            yield entry.to_value()
+
+    def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        indexed = self._lookup(key, allow_expired)
+        return self._entry(key, indexed).to_value()
+
+    def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        keys = self._select(group, expires_range, creation_range, (False, False))
+        return self.flush_many(keys)
+
+    def flush_key(self, key: str) -> DeletedResult:
+        return DeletedResult(deleted_count=int(self._remove(key)))
+
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        return DeletedResult(deleted_count=sum(self._remove(key) for key in keys))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index.clear()
+            self._compact()
+            shutil.rmtree(self._values, ignore_errors=True)
+            self._values.mkdir(exist_ok=True)
+
+    def stats(self) -> CacheStats:
+        """
+        Statistics of the stored values, sizes are the sizes of their files.
+        """
+
+        stats = CacheStats()
+        now = ts_now()
+        for indexed in list(self._index.values()):
+            expired = indexed.expires_at is not None and indexed.expires_at <= now
+            count_value(stats, indexed.group, indexed.size, expired)
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._log.close()
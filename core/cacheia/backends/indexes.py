@@ -0,0 +1,134 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterator
+
+Item = tuple[float, str]
+
+
+def _score(item: Item) -> float:
+    return item[0]
+
+
+class SortedIndex:
+    """
+    Sorted (score, key) pairs stored as a list of bounded sorted sublists.
+
+    Inserts and deletes cost O(log n) searches plus a memmove bounded by the
+    sublist size, range queries cost O(log n + k).
+    """
+
+    def __init__(self, load: int = 1000) -> None:
+        self._load = load
+        self._lists: list[list[Item]] = []
+        self._maxes: list[Item] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, item: Item) -> None:
+        lists, maxes = self._lists, self._maxes
+        if not maxes:
+            lists.append([item])
+            maxes.append(item)
+            self._len += 1
+            return
+
+        pos = bisect_left(maxes, item)
+        if pos == len(maxes):
+            pos -= 1
+            lists[pos].append(item)
+            maxes[pos] = item
+        else:
+            insort(lists[pos], item)
+
+        self._len += 1
+        if len(lists[pos]) > 2 * self._load:
+            lst = lists[pos]
+            half = lst[self._load :]
+            del lst[self._load :]
+            maxes[pos] = lst[-1]
+            lists.insert(pos + 1, half)
+            maxes.insert(pos + 1, half[-1])
+
+    def discard(self, item: Item) -> bool:
+        lists, maxes = self._lists, self._maxes
+        pos = bisect_left(maxes, item)
+        if pos == len(maxes):
+            return False
+
+        lst = lists[pos]
+        idx = bisect_left(lst, item)
+        if idx == len(lst) or lst[idx] != item:
+            return False
+
+        del lst[idx]
+        self._len -= 1
+        if lst:
+            maxes[pos] = lst[-1]
+        else:
+            del lists[pos]
+            del maxes[pos]
+        return True
+
+    def first(self) -> Item | None:
+        if not self._lists:
+            return None
+        return self._lists[0][0]
+
+    def _start(self, lo: float, inclusive: bool) -> tuple[int, int]:
+        search = bisect_left if inclusive else bisect_right
+        pos = search(self._maxes, lo, key=_score)
+        if pos == len(self._maxes):
+            return pos, 0
+        return pos, search(self._lists[pos], lo, key=_score)
+
+    def _stop(self, hi: float, inclusive: bool) -> tuple[int, int]:
+        search = bisect_right if inclusive else bisect_left
+        pos = search(self._maxes, hi, key=_score)
+        if pos == len(self._maxes):
+            return pos, 0
+        return pos, search(self._lists[pos], hi, key=_score)
+
+    def irange(
+        self,
+        lo: float,
+        hi: float,
+        inclusive: tuple[bool, bool] = (True, True),
+    ) -> Iterator[str]:
+        """
+        Yield the keys whose score is between 'lo' and 'hi'.
+
+        The index must not be modified while iterating.
+        """
+
+        start_pos, start_idx = self._start(lo, inclusive[0])
+        stop_pos, stop_idx = self._stop(hi, inclusive[1])
+        for pos in range(start_pos, min(stop_pos + 1, len(self._lists))):
+            lst = self._lists[pos]
+            begin = start_idx if pos == start_pos else 0
+            end = stop_idx if pos == stop_pos else len(lst)
+            for i in range(begin, end):
+                yield lst[i][1]
+
+    def count(
+        self,
+        lo: float,
+        hi: float,
+        inclusive: tuple[bool, bool] = (True, True),
+    ) -> int:
+        start_pos, start_idx = self._start(lo, inclusive[0])
+        stop_pos, stop_idx = self._stop(hi, inclusive[1])
+        if (start_pos, start_idx) >= (stop_pos, stop_idx):
+            return 0
+        if start_pos == stop_pos:
+            return stop_idx - start_idx
+
+        total = len(self._lists[start_pos]) - start_idx + stop_idx
+        for pos in range(start_pos + 1, stop_pos):
+            total += len(self._lists[pos])
+        return total
+
+    def clear(self) -> None:
+        self._lists.clear()
+        self._maxes.clear()
+        self._len = 0
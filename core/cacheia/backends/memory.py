@@ -1,73 +1,357 @@
+import operator
+import sys
 from datetime import datetime
+from math import inf
 from multiprocessing import Manager
-from typing import Iterable
+from typing import Callable, Iterable
 
 from cacheia_schemas import (
     CacheClient,
     CacheClientSettings,
     CachedValue,
+    CacheManyResult,
+    CacheStats,
     DeletedResult,
+    GroupStats,
     KeyAlreadyExists,
 )
 
-from .utils import ts_now
+from .entry import Entry
+from .eviction import POLICIES, EvictionPolicyName
+from .indexes import SortedIndex
+from .utils import estimate_size, ts_now
+
+_LARGEST = sys.float_info.max
 
 
 class MemoryCacheClientSettings(CacheClientSettings):
-    pass
+    CACHE_MAX_ENTRIES: int | None = None
+    CACHE_MAX_BYTES: int | None = None
+    CACHE_EVICTION_POLICY: EvictionPolicyName = "lru"
+    CACHE_EXPIRATION_BUDGET: int = 32
 
 
 class MemoryCacheClient(CacheClient):
     def __init__(self, settings: MemoryCacheClientSettings) -> None:
         if settings.CACHE_USE_MULTIPROCESSING:
             self._manager = Manager()
-            self._mem: dict[str, CachedValue] = self._manager.dict()  # type: ignore - SAFETY: multiprocessing.Manager.dict implements all dict operations
+            self._mem: dict[str, Entry] = self._manager.dict()  # type: ignore - SAFETY: multiprocessing.Manager.dict implements all dict operations
         else:
-            self._mem: dict[str, CachedValue] = {}
+            self._manager = None
+            self._mem: dict[str, Entry] = {}
 
-    def cache(self, instance: CachedValue) -> None:
-        if instance.key in self._mem:
-            raise KeyAlreadyExists(instance.key)
+        # group -> keys index, shared through the manager alongside the values
+        self._groups: dict[str, dict[str, None]] = self._new_dict()
 
-        self._mem[instance.key] = instance
+        # Eviction, time indexes and statistics are kept in this process, even
+        # when values live in a multiprocessing manager.
+        # key -> (size, created_at, expires_at, group)
+        self._meta: dict[str, tuple[int, float, float, str | None]] = {}
+        self._max_entries = settings.CACHE_MAX_ENTRIES
+        self._max_bytes = settings.CACHE_MAX_BYTES
+        self._policy = POLICIES[settings.CACHE_EVICTION_POLICY]()
+        self._bytes = 0
+        self._evictions = 0
+        self._expirations = 0
+        # group -> [entries, bytes]
+        self._group_stats: dict[str, list[int]] = {}
 
-    def get(
+        # Values without expiration are indexed with an infinite 'expires_at'
+        self._created = SortedIndex()
+        self._expires = SortedIndex()
+        self._expiration_budget = settings.CACHE_EXPIRATION_BUDGET
+
+    def _new_dict(self) -> dict:
+        if self._manager is not None:
+            return self._manager.dict()  # type: ignore
+        return {}
+
+    def _index(self, instance: Entry) -> None:
+        if instance.group is None:
+            return
+
+        keys = self._groups.get(instance.group)
+        if keys is None:
+            keys = self._new_dict()
+            self._groups[instance.group] = keys
+            # proxies must be read back from the manager to share the nested dict
+            keys = self._groups[instance.group]
+        keys[instance.key] = None
+
+    def _unindex(self, instance: Entry) -> None:
+        if instance.group is None:
+            return
+
+        keys = self._groups.get(instance.group)
+        if keys is None:
+            return
+
+        keys.pop(instance.key, None)
+        if not len(keys):
+            self._groups.pop(instance.group, None)
+
+    def _candidates(
         self,
-        group: str | None = None,
-        expires_range: tuple[float, float] | None = None,
-        creation_range: tuple[datetime, datetime] | None = None,
-    ) -> Iterable[CachedValue]:
-        date_now = datetime.now()
-        timestamp_now = date_now.timestamp()
-        for value in self._mem.values():
+        group: str | None,
+        expires_range: tuple[float, float] | None,
+        creation_range: tuple[float, float] | None,
+        inclusive: tuple[bool, bool],
+    ) -> list[Entry]:
+        """
+        Pick the smallest set of values that may match the filters.
+        """
+
+        plans: list[tuple[int, Callable[[], Iterable[str]]]] = []
+        if group is not None:
+            keys = self._groups.get(group)
+            if keys is None:
+                return []
+            plans.append((len(keys), lambda: list(keys.keys())))
+
+        if self._manager is None and creation_range is not None:
+            lo, hi = creation_range
+            plans.append(
+                (
+                    self._created.count(lo, hi, inclusive),
+                    lambda: list(self._created.irange(lo, hi, inclusive)),
+                )
+            )
+
+        if self._manager is None and expires_range is not None:
+            # values that never expire match any expiration range
+            lo, hi = expires_range[0], min(expires_range[1], _LARGEST)
+            plans.append(
+                (
+                    self._expires.count(lo, hi, inclusive)
+                    + self._expires.count(inf, inf),
+                    lambda: [
+                        *self._expires.irange(lo, hi, inclusive),
+                        *self._expires.irange(inf, inf),
+                    ],
+                )
+            )
+
+        if not plans:
+            return list(self._mem.values())
+
+        _, keys_of = min(plans, key=lambda p: p[0])
+        values = (self._mem.get(key) for key in keys_of())
+        return [v for v in values if v is not None]
+
+    def _select(
+        self,
+        group: str | None,
+        expires_range: tuple[float, float] | None,
+        creation_range: tuple[datetime, datetime] | None,
+        inclusive: tuple[bool, bool],
+    ) -> list[Entry]:
+        created = None
+        if creation_range is not None:
+            created = (creation_range[0].timestamp(), creation_range[1].timestamp())
+
+        lo_ok = operator.le if inclusive[0] else operator.lt
+        hi_ok = operator.le if inclusive[1] else operator.lt
+        timestamp_now = ts_now()
+        selected = []
+        for value in self._candidates(group, expires_range, created, inclusive):
             if group is not None and value.group != group:
                 continue
 
-            if creation_range is not None:
-                if not (creation_range[0] <= date_now <= creation_range[1]):
+            if created is not None:
+                ts = value.created_at
+                if not (lo_ok(created[0], ts) and hi_ok(ts, created[1])):
                     continue
 
             if value.expires_at:
                 if expires_range is not None:
-                    if not (expires_range[0] <= timestamp_now <= expires_range[1]):
+                    ts = value.expires_at
+                    if not (
+                        lo_ok(expires_range[0], ts) and hi_ok(ts, expires_range[1])
+                    ):
                         continue
                 elif value.expires_at <= timestamp_now:
+                    # only values cached by other processes are not reclaimed
                     continue
 
-            yield value
+            selected.append(value)
+
+        return selected
+
+    @property
+    def evictions(self) -> int:
+        """
+        Number of values removed to keep the cache within its bounds.
+        """
+
+        return self._evictions
+
+    def _reclaim(self, budget: int | None = None) -> int:
+        """
+        Remove up to 'budget' expired values, all of them if 'budget' is None.
+        """
+
+        count = 0
+        now = ts_now()
+        while (first := self._expires.first()) is not None and first[0] <= now:
+            if budget is not None and count >= budget:
+                break
+
+            count += self._remove_indexed(first[1])
+
+        self._expirations += count
+        return count
+
+    def _over_budget(self, size: int) -> bool:
+        if self._max_entries is not None and len(self._meta) >= self._max_entries:
+            return True
+        if self._max_bytes is not None and self._bytes + size > self._max_bytes:
+            return True
+        return False
+
+    def _make_room(self, size: int) -> None:
+        if self._over_budget(size):
+            self._reclaim()
+
+        # A single value bigger than the whole budget is kept on its own.
+        while self._meta and self._over_budget(size):
+            self._evictions += self._remove_indexed(self._policy.victim())
+
+    def _remove_indexed(self, key: str) -> bool:
+        """
+        Remove a value picked from the indexes of this process, unless another
+        process sharing the manager replaced it since, then only forget it.
+        """
+
+        meta = self._meta.get(key)
+        entry = self._mem.get(key)
+        if (
+            meta is not None
+            and entry is not None
+            and (entry.created_at, entry.expires_at or inf) != (meta[1], meta[2])
+        ):
+            self._forget(key)
+            return False
+        return self._remove(key)
+
+    def _remove(self, key: str) -> bool:
+        value = self._mem.pop(key, None)
+        if value is not None:
+            self._unindex(value)
+
+        self._forget(key)
+        return value is not None
+
+    def _forget(self, key: str) -> None:
+        # values may have been removed by another process sharing the manager
+        meta = self._meta.pop(key, None)
+        if meta is not None:
+            size, created_at, expires_at, group = meta
+            self._policy.remove(key)
+            self._bytes -= size
+            if group is not None:
+                stats = self._group_stats[group]
+                stats[0] -= 1
+                stats[1] -= size
+                if not stats[0]:
+                    del self._group_stats[group]
+            self._created.discard((created_at, key))
+            self._expires.discard((expires_at, key))
+
+    def _insert(self, entry: Entry) -> None:
+        self._reclaim(self._expiration_budget)
+        size = estimate_size(entry)
+        self._make_room(size)
+
+        key = entry.key
+        created_at = entry.created_at
+        expires_at = entry.expires_at or inf
+        self._mem[key] = entry
+        self._index(entry)
+        self._meta[key] = (size, created_at, expires_at, entry.group)
+        self._bytes += size
+        if entry.group is not None:
+            stats = self._group_stats.setdefault(entry.group, [0, 0])
+            stats[0] += 1
+            stats[1] += size
+        self._policy.insert(key)
+        self._created.add((created_at, key))
+        self._expires.add((expires_at, key))
+
+    def cache(self, instance: CachedValue) -> None:
+        if instance.key in self._mem:
+            raise KeyAlreadyExists(instance.key)
+
+        self._insert(Entry.from_value(instance))
+
+    def load(self, entry: Entry) -> bool:
+        """
+        Insert an already built entry unless its key is cached, skipping the
+        validation of CachedValue. Used to warm the cache from another store.
+
+        :return: whether the entry was inserted
+        """
+
+        if entry.key in self._mem:
+            return False
+
+        self._insert(entry)
+        return True
+
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> Iterable[CachedValue]:
+        self._reclaim()
+        for entry in self._select(group, expires_range, creation_range, (True, True)):
+            yield entry.to_value()
+
+    def _lookup(self, key: str, allow_expired: bool, now: float) -> Entry | None:
+        entry = self._mem.get(key)
+        if entry is None:
+            return None
+
+        if not allow_expired and entry.expires_at and entry.expires_at <= now:
+            self._remove(key)
+            self._expirations += 1
+            return None
+
+        self._policy.touch(key)
+        return entry
 
     def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
-        if data := self._mem.get(key):
-            if allow_expired or not data.expires_at:
-                return data
+        if not allow_expired:
+            self._reclaim(self._expiration_budget)
+
+        entry = self._lookup(key, allow_expired, ts_now())
+        if entry is None:
+            raise KeyError(key)
+        return entry.to_value()
 
-            if data.expires_at <= ts_now():
-                self._mem.pop(key, None)
-                raise KeyError(key)
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        result = CacheManyResult()
+        for instance in instances:
+            if instance.key in self._mem:
+                result.existing.append(instance.key)
+            else:
+                self._insert(Entry.from_value(instance))
+                result.created.append(instance.key)
+        return result
 
-            return data
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        if not allow_expired:
+            self._reclaim(self._expiration_budget)
 
-        raise KeyError(key)
+        now = ts_now()
+        values = {}
+        for key in keys:
+            entry = self._lookup(key, allow_expired, now)
+            if entry is not None:
+                values[key] = entry.to_value()
+        return values
 
     def flush(
         self,
@@ -75,34 +359,62 @@ class MemoryCacheClient(CacheClient):
         expires_range: tuple[float, float] | None = None,
         creation_range: tuple[datetime, datetime] | None = None,
     ) -> DeletedResult:
+        self._reclaim()
         count = 0
-        date_now = datetime.now()
-        timestamp_now = date_now.timestamp()
-        for value in list(self._mem.values()):
-            if group is not None and value.group != group:
-                continue
-
-            if creation_range is not None:
-                if not (creation_range[0] < date_now < creation_range[1]):
-                    continue
-
-            if value.expires_at:
-                if expires_range is not None:
-                    if not (expires_range[0] < timestamp_now < expires_range[1]):
-                        continue
-                elif value.expires_at <= timestamp_now:
-                    continue
-
-            count += 1
-            del self._mem[value.key]
+        for value in self._select(group, expires_range, creation_range, (False, False)):
+            if self._remove(value.key):
+                count += 1
 
         return DeletedResult(deleted_count=count)
 
     def flush_key(self, key: str) -> DeletedResult:
-        if key in self._mem:
-            del self._mem[key]
+        if self._remove(key):
             return DeletedResult(deleted_count=1)
         return DeletedResult(deleted_count=0)
 
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        count = 0
+        for key in keys:
+            if self._remove(key):
+                count += 1
+        return DeletedResult(deleted_count=count)
+
     def clear(self) -> None:
         self._mem.clear()
+        self._groups.clear()
+        self._meta.clear()
+        self._policy.clear()
+        self._created.clear()
+        self._expires.clear()
+        self._group_stats.clear()
+        self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        """
+        Statistics of the values cached by this process.
+
+        Totals are maintained on every write, expired values are counted from
+        the expiration index.
+        """
+
+        groups = {
+            group: GroupStats(entries=entries, bytes=size)
+            for group, (entries, size) in self._group_stats.items()
+        }
+        expired = 0
+        for key in self._expires.irange(-inf, ts_now()):
+            expired += 1
+            group = self._meta[key][3]
+            if group is not None:
+                groups[group].expired += 1
+
+        return CacheStats(
+            entries=len(self._meta),
+            bytes=self._bytes,
+            expired=expired,
+            groups=groups,
+            counters={
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            },
+        )
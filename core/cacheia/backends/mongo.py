@@ -1,19 +1,39 @@
-from datetime import datetime
-from typing import Iterable
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping
 
-import pymongo
 from cacheia_schemas import (
     CacheClient,
     CacheClientSettings,
     CachedValue,
+    CacheManyResult,
+    CacheStats,
     DeletedResult,
+    GroupStats,
     KeyAlreadyExists,
 )
-from pymongo import MongoClient
-from pymongo.errors import DuplicateKeyError, OperationFailure
+from pydantic import model_validator
+from pymongo import ASCENDING, IndexModel, MongoClient
+from pymongo.collection import Collection
+from pymongo.errors import (
+    BulkWriteError,
+    DuplicateKeyError,
+    OperationFailure,
+    PyMongoError,
+)
 
+from .bloom import BloomFilter
+from .codecs import ValueCodec, codec_from_settings
+from .entry import Entry
 from .memory import MemoryCacheClient, MemoryCacheClientSettings
-from .utils import ts_now
+from .striped import StripedMemoryCacheClient, StripedMemoryCacheClientSettings
+from .utils import duplicate_indexes, ts_now
+from .watcher import ChangeStreamWatcher
+from .write_behind import MongoBatchWriter, WriteBehindQueue
+
+logger = logging.getLogger(__name__)
 
 
 class MongoCacheClientSettings(CacheClientSettings):
@@ -22,6 +42,183 @@ class MongoCacheClientSettings(CacheClientSettings):
     CACHE_COLLECTION: str = "values"
     CACHE_USE_LOCAL_MEM: bool = True
     CACHE_PRELOAD: bool = True
+    CACHE_PRELOAD_IN_BACKGROUND: bool = False
+    CACHE_PRELOAD_BATCH_SIZE: int = 10_000
+    CACHE_WRITE_BEHIND: bool = False
+    CACHE_WRITE_BEHIND_BATCH_SIZE: int = 1_000
+    CACHE_WRITE_BEHIND_INTERVAL: float = 0.05
+    CACHE_WRITE_BEHIND_MAX_PENDING: int = 100_000
+    CACHE_WATCH_CHANGES: bool = False
+    CACHE_NEGATIVE_TTL: float = 1.0
+    CACHE_NEGATIVE_MAX_ENTRIES: int = 100_000
+    CACHE_BLOOM_FILTER: bool = False
+    CACHE_BLOOM_CAPACITY: int = 1_000_000
+    CACHE_BLOOM_ERROR_RATE: float = 0.01
+    CACHE_BLOOM_REFRESH_INTERVAL: float | None = 60.0
+
+    @model_validator(mode="after")
+    def _mirror_options_need_mirror(self) -> "MongoCacheClientSettings":
+        if self.CACHE_USE_LOCAL_MEM and self.CACHE_PRELOAD:
+            return self
+
+        if self.CACHE_WRITE_BEHIND:
+            raise ValueError(
+                "CACHE_WRITE_BEHIND requires CACHE_USE_LOCAL_MEM and CACHE_PRELOAD"
+            )
+        # without a mirror, watching only keeps the Bloom filter current
+        if self.CACHE_WATCH_CHANGES and not self.CACHE_BLOOM_FILTER:
+            raise ValueError(
+                "CACHE_WATCH_CHANGES requires CACHE_USE_LOCAL_MEM and CACHE_PRELOAD,"
+                " or CACHE_BLOOM_FILTER"
+            )
+        return self
+
+
+# Mongo only reaps documents through a TTL index on a date field, 'expires_at' is a
+# timestamp so a date copy is kept next to it. Values that never expire have no
+# date copy and are never reaped.
+TTL_FIELD = "expires_at_date"
+INDEXES = [
+    IndexModel([("group", ASCENDING)]),
+    IndexModel([("group", ASCENDING), ("expires_at", ASCENDING)]),
+    IndexModel([("group", ASCENDING), ("created_at", ASCENDING)]),
+    IndexModel([(TTL_FIELD, ASCENDING)], expireAfterSeconds=0),
+]
+
+# Keys deleted per request when a filtered flush deletes them by key
+FLUSH_BATCH_SIZE = 10_000
+
+# Values encoded by a ValueCodec are stored as binary with the codec tag here
+CODEC_FIELD = "codec"
+
+# Collections created by older versions have a text index on 'group' and
+# documents without the date copy.
+LEGACY_INDEX = "group_text"
+BACKFILL_FILTER = {"expires_at": {"$ne": None}, TTL_FIELD: {"$exists": False}}
+BACKFILL_UPDATE = [
+    {"$set": {TTL_FIELD: {"$toDate": {"$multiply": ["$expires_at", 1000]}}}}
+]
+
+
+def build_filters(
+    group: str | None,
+    expires_range: tuple[float, float] | None,
+    creation_range: tuple[datetime, datetime] | None,
+) -> dict:
+    filters = {}
+    if group is not None:
+        filters["group"] = group
+
+    if creation_range is not None:
+        filters["created_at"] = {
+            "$gte": creation_range[0],
+            "$lte": creation_range[1],
+        }
+
+    if expires_range is not None:
+        filters["$or"] = [
+            {"expires_at": None},
+            {"expires_at": {"$gte": expires_range[0], "$lte": expires_range[1]}},
+        ]
+    else:
+        filters["$or"] = [
+            {"expires_at": None},
+            {"expires_at": {"$gt": ts_now()}},
+        ]
+
+    return filters
+
+
+def stats_pipeline(now: float) -> list[dict]:
+    """
+    Aggregation counting the stored values per group, sizes are the sizes of
+    their BSON documents.
+    """
+
+    expired = {"$and": [{"$ne": ["$expires_at", None]}, {"$lte": ["$expires_at", now]}]}
+    return [
+        {
+            "$group": {
+                "_id": "$group",
+                "entries": {"$sum": 1},
+                "bytes": {"$sum": {"$bsonSize": "$$ROOT"}},
+                "expired": {"$sum": {"$cond": [expired, 1, 0]}},
+            }
+        }
+    ]
+
+
+def stats_from_groups(docs: Iterable[Mapping[str, Any]]) -> CacheStats:
+    stats = CacheStats()
+    for doc in docs:
+        stats.entries += doc["entries"]
+        stats.bytes += doc["bytes"]
+        stats.expired += doc["expired"]
+        if doc["_id"] is not None:
+            stats.groups[doc["_id"]] = GroupStats(
+                entries=doc["entries"], bytes=doc["bytes"], expired=doc["expired"]
+            )
+    return stats
+
+
+def to_document(instance: CachedValue, codec: ValueCodec | None = None) -> dict:
+    if codec is None:
+        doc = instance.model_dump()
+    else:
+        doc = instance.model_dump(exclude={"value"})
+        doc["value"], doc[CODEC_FIELD] = codec.encode(instance.value)
+
+    doc["_id"] = doc.pop("key")
+    if instance.expires_at is not None:
+        doc[TTL_FIELD] = datetime.fromtimestamp(instance.expires_at, tz=timezone.utc)
+    return doc
+
+
+def document_value(doc: Mapping[str, Any], codec: ValueCodec | None = None) -> Any:
+    """
+    Value of a document, decoded when it was stored as an encoded payload.
+
+    Encoded payloads are only decoded by the configured codec.
+    """
+
+    if (tag := doc.get(CODEC_FIELD)) is None:
+        return doc["value"]
+    if codec is None:
+        raise ValueError(f"Payload encoded with '{tag}', no codec is configured")
+    return codec.decode(doc["value"], tag)
+
+
+def from_document(doc: dict, codec: ValueCodec | None = None) -> CachedValue:
+    key = doc.pop("_id")
+    doc.pop(TTL_FIELD, None)
+    doc["value"] = document_value(doc, codec)
+    doc.pop(CODEC_FIELD, None)
+    return CachedValue(key=key, **doc)
+
+
+def to_entry(doc: Mapping[str, Any], codec: ValueCodec | None = None) -> Entry:
+    """
+    Build a backend entry straight from a document, without validation.
+    """
+
+    return Entry(
+        doc["_id"],
+        document_value(doc, codec),
+        doc.get("group"),
+        doc.get("expires_at"),
+        doc["created_at"].timestamp(),
+    )
+
+
+def migrate(coll: Collection) -> None:
+    """
+    Upgrade a collection created by an older version: drops the text index on
+    'group' and backfills the date copy of 'expires_at' used by the TTL index.
+    """
+
+    if LEGACY_INDEX in coll.index_information():
+        coll.drop_index(LEGACY_INDEX)
+    coll.update_many(BACKFILL_FILTER, BACKFILL_UPDATE)
 
 
 class MongoCacheClient(CacheClient):
@@ -29,36 +226,348 @@ class MongoCacheClient(CacheClient):
         self._client = MongoClient(settings.CACHE_DB_URI)
         self._database = self._client[settings.CACHE_DB_NAME]
         self._coll = self._database[settings.CACHE_COLLECTION]
+        self._codec = codec_from_settings(settings)
         try:
-            self._coll.create_index(("group", pymongo.TEXT))
+            if LEGACY_INDEX in self._coll.index_information():
+                migrate(self._coll)
+            self._coll.create_indexes(INDEXES)
         except OperationFailure:
             pass
 
+        self._ready = threading.Event()
+        self._writer: WriteBehindQueue | None = None
+        self._batches: MongoBatchWriter | None = None
+        self._watcher: ChangeStreamWatcher | None = None
+        self._counters = {
+            "mirror_hits": 0,
+            "mirror_misses": 0,
+            "mongo_fallbacks": 0,
+            "negative_hits": 0,
+        }
+
+        # Filter of the keys stored in Mongo. It is rebuilt from a key only
+        # scan every 'CACHE_BLOOM_REFRESH_INTERVAL' seconds, which drops
+        # flushed keys and picks up keys written by other processes. Only
+        # with a watched change stream does it contain every stored key, then
+        # a key it does not contain is missing without asking Mongo.
+        self._bloom: BloomFilter | None = None
+        self._bloom_next: BloomFilter | None = None
+        self._bloom_capacity = settings.CACHE_BLOOM_CAPACITY
+        self._bloom_error_rate = settings.CACHE_BLOOM_ERROR_RATE
+        self._bloom_enabled = settings.CACHE_BLOOM_FILTER
+        self._bloom_stop = threading.Event()
+        if settings.CACHE_BLOOM_FILTER:
+            self._counters["bloom_negatives"] = 0
+            self._counters["bloom_false_positives"] = 0
+            self._counters["bloom_expired"] = 0
+
+        self._negative_ttl = 0.0
         if not settings.CACHE_USE_LOCAL_MEM or not settings.CACHE_PRELOAD:
             self._mem = None
+            if settings.CACHE_WATCH_CHANGES:
+                self._watcher = ChangeStreamWatcher(
+                    self._coll,
+                    on_upsert=lambda doc, replace: self._add_keys([doc["_id"]]),
+                    on_delete=lambda key: None,
+                    on_resync=self._build_bloom,
+                )
+            self._start_bloom(settings)
+            self._ready.set()
             return
 
-        self._mem = MemoryCacheClient(
-            MemoryCacheClientSettings(
-                CACHE_USE_MULTIPROCESSING=settings.CACHE_USE_MULTIPROCESSING
+        self._mem: MemoryCacheClient | StripedMemoryCacheClient
+        if settings.CACHE_USE_MULTIPROCESSING:
+            self._mem = MemoryCacheClient(
+                MemoryCacheClientSettings(
+                    CACHE_USE_MULTIPROCESSING=True,
+                    CACHE_MAX_ENTRIES=None,
+                    CACHE_MAX_BYTES=None,
+                )
+            )
+        else:
+            # API routes run on a threadpool, the mirror must be thread safe
+            self._mem = StripedMemoryCacheClient(
+                StripedMemoryCacheClientSettings(
+                    CACHE_MAX_ENTRIES=None,
+                    CACHE_MAX_BYTES=None,
+                )
+            )
+
+        # Keys recently missing from both the mirror and Mongo, so repeated
+        # lookups of absent keys do not all reach Mongo.
+        self._negative_ttl = settings.CACHE_NEGATIVE_TTL
+        self._negative = StripedMemoryCacheClient(
+            StripedMemoryCacheClientSettings(
+                CACHE_MAX_ENTRIES=settings.CACHE_NEGATIVE_MAX_ENTRIES,
+                CACHE_MAX_BYTES=None,
             )
         )
 
-        if settings.CACHE_PRELOAD:
-            for v in self._coll.find():
-                key = v.pop("_id")
-                self._mem.cache(CachedValue(**v, key=key))
+        # Keys flushed while preloading, so a batch fetched before the flush
+        # does not bring them back.
+        self._preload_lock = threading.Lock()
+        self._flushed: set[str] = set()
+        if settings.CACHE_WRITE_BEHIND:
+            self._batches = MongoBatchWriter(
+                self._coll,
+                interval=settings.CACHE_WRITE_BEHIND_INTERVAL,
+                on_conflict=self._reload,
+            )
+            self._writer = WriteBehindQueue(
+                self._batches.write,
+                batch_size=settings.CACHE_WRITE_BEHIND_BATCH_SIZE,
+                interval=settings.CACHE_WRITE_BEHIND_INTERVAL,
+                max_pending=settings.CACHE_WRITE_BEHIND_MAX_PENDING,
+            )
+            atexit.register(self.close)
+
+        # Watching starts before the preload, changes made while preloading
+        # are applied on top of it.
+        self._preload_batch_size = settings.CACHE_PRELOAD_BATCH_SIZE
+        if settings.CACHE_WATCH_CHANGES:
+            self._watcher = ChangeStreamWatcher(
+                self._coll,
+                on_upsert=self._apply_upsert,
+                on_delete=lambda key: self._forget([key]),
+                on_resync=self._resync,
+            )
+        # the first scan starts after the stream is opened, keys written in
+        # between are not missed
+        self._start_bloom(settings)
+
+        if settings.CACHE_PRELOAD_IN_BACKGROUND:
+            threading.Thread(
+                target=self._preload_in_background,
+                args=(settings.CACHE_PRELOAD_BATCH_SIZE,),
+                name="cacheia-preload",
+                daemon=True,
+            ).start()
+        else:
+            self._preload(settings.CACHE_PRELOAD_BATCH_SIZE)
+
+    def _preload(self, batch_size: int) -> None:
+        """
+        Stream non expired documents into the mirror.
+
+        Until it finishes, reads are served by Mongo.
+        """
+
+        assert self._mem is not None
+        cursor = self._coll.find(
+            {"$or": [{"expires_at": None}, {"expires_at": {"$gt": ts_now()}}]},
+            projection={TTL_FIELD: False},
+            batch_size=batch_size,
+        )
+        for doc in cursor:
+            entry = to_entry(doc, self._codec)
+            with self._preload_lock:
+                if self._ready.is_set():
+                    # cleared while preloading, nothing left to load
+                    cursor.close()
+                    return
+                if entry.key not in self._flushed:
+                    self._mem.load(entry)
+
+        with self._preload_lock:
+            self._flushed.clear()
+            self._ready.set()
+
+    def _preload_in_background(self, batch_size: int) -> None:
+        try:
+            self._preload(batch_size)
+        except Exception:
+            # the cache keeps serving from Mongo, it is just never ready
+            logger.exception("Preload failed")
+
+    def _reload(self, keys: list[str]) -> None:
+        """
+        Replace mirrored values with the ones stored in Mongo, used when a
+        buffered write lost against a value written elsewhere.
+        """
+
+        assert self._mem is not None
+        self._mem.flush_many(keys)
+        cursor = self._coll.find({"_id": {"$in": keys}}, projection={TTL_FIELD: False})
+        for doc in cursor:
+            self._mem.load(to_entry(doc, self._codec))
+
+    def _start_bloom(self, settings: MongoCacheClientSettings) -> None:
+        if settings.CACHE_BLOOM_FILTER:
+            threading.Thread(
+                target=self._refresh_bloom,
+                args=(settings.CACHE_BLOOM_REFRESH_INTERVAL,),
+                name="cacheia-bloom",
+                daemon=True,
+            ).start()
+
+    def _build_bloom(self) -> None:
+        capacity = max(self._bloom_capacity, 2 * self._coll.estimated_document_count())
+        fresh = BloomFilter(capacity, self._bloom_error_rate)
+        # keys cached while scanning are added to both filters
+        self._bloom_next = fresh
+        try:
+            cursor = self._coll.find(
+                build_filters(None, None, None), projection={"_id": True}
+            )
+            for doc in cursor:
+                fresh.add(doc["_id"])
+            self._bloom = fresh
+        finally:
+            self._bloom_next = None
+
+    def _refresh_bloom(self, interval: float | None) -> None:
+        while True:
+            try:
+                self._build_bloom()
+                wait = interval
+            except PyMongoError:
+                # lookups keep using the previous filter, or none at all
+                logger.exception("Bloom filter build failed")
+                wait = min(interval or 1.0, 1.0)
+
+            if wait is None or self._bloom_stop.wait(wait):
+                return
+
+    def _add_keys(self, keys: Iterable[str]) -> None:
+        if not self._bloom_enabled:
+            return
+        filters = [f for f in (self._bloom, self._bloom_next) if f is not None]
+        for key in keys:
+            for f in filters:
+                f.add(key)
+
+    def _definitely_missing(self, key: str) -> bool:
+        # between rebuilds keys written by other processes are only added
+        # from the change stream
+        bloom = self._bloom
+        if self._watcher is None or bloom is None or key in bloom:
+            return False
+        self._counters["bloom_negatives"] += 1
+        return True
+
+    def _forget(self, keys: list[str]) -> None:
+        """
+        Remove keys from the mirror, keys flushed while preloading are
+        remembered so the preload does not bring them back.
+        """
+
+        assert self._mem is not None
+        with self._preload_lock:
+            if not self._ready.is_set():
+                self._flushed.update(keys)
+            self._mem.flush_many(keys)
+
+    def _apply_upsert(self, doc: Mapping[str, Any], replace: bool) -> None:
+        assert self._mem is not None
+        entry = to_entry(doc, self._codec)
+        if entry.expires_at is not None and entry.expires_at <= ts_now():
+            self._forget([entry.key])
+            return
+
+        self._add_keys([entry.key])
+        with self._preload_lock:
+            # own writes come back as inserts of values already mirrored
+            if replace:
+                self._mem.flush_key(entry.key)
+            self._mem.load(entry)
+
+    def _resync(self) -> None:
+        """
+        Reload the mirror from scratch, changes may have been missed.
+        """
+
+        assert self._mem is not None
+        self._sync()
+        with self._preload_lock:
+            self._ready.clear()
+            self._flushed.clear()
+            self._mem.clear()
+        self._preload(self._preload_batch_size)
+
+    def _sync(self) -> None:
+        # buffered writes must reach Mongo before queries or deletes run there
+        if self._writer is not None:
+            self._writer.drain()
+
+    def close(self) -> None:
+        """
+        Write buffered values, stop watching changes and close the connection.
+        """
+
+        if self._writer is not None:
+            self._writer.close()
+        if self._watcher is not None:
+            self._watcher.close()
+        self._bloom_stop.set()
+        self._client.close()
+
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """
+        Block until the preload finishes.
+
+        :return: whether the cache is ready, False if 'timeout' expired
+        """
+
+        return self._ready.wait(timeout)
 
     def cache(self, instance: CachedValue) -> None:
+        if self._writer is not None:
+            assert self._mem is not None
+            self._mem.cache(instance)
+            self._add_keys([instance.key])
+            self._writer.put(to_document(instance, self._codec))
+            return
+
         try:
-            dict_instance = instance.model_dump()
-            dict_instance["_id"] = dict_instance.pop("key")
-            self._coll.insert_one(dict_instance)
+            self._coll.insert_one(to_document(instance, self._codec))
         except DuplicateKeyError:
             raise KeyAlreadyExists(instance.key)
+        self._add_keys([instance.key])
 
         if self._mem is not None:
-            self._mem.cache(instance)
+            # a stale mirrored value, e.g. flushed by another process, is replaced
+            self._mem.flush_key(instance.key)
+            self._mem.load(Entry.from_value(instance))
+
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        instances = list(instances)
+        if self._writer is not None:
+            assert self._mem is not None
+            result = self._mem.cache_many(instances)
+            self._add_keys(result.created)
+            created = set(result.created)
+            for instance in instances:
+                if instance.key in created:
+                    created.discard(instance.key)
+                    self._writer.put(to_document(instance, self._codec))
+            return result
+
+        result = CacheManyResult()
+        if not instances:
+            return result
+
+        existing: set[int] = set()
+        try:
+            self._coll.insert_many(
+                [to_document(instance, self._codec) for instance in instances],
+                ordered=False,
+            )
+        except BulkWriteError as e:
+            existing = duplicate_indexes(e)
+
+        for index, instance in enumerate(instances):
+            if index in existing:
+                result.existing.append(instance.key)
+                continue
+
+            result.created.append(instance.key)
+            if self._mem is not None:
+                self._mem.load(Entry.from_value(instance))
+        self._add_keys(result.created)
+        return result
 
     def get(
         self,
@@ -66,57 +575,109 @@ class MongoCacheClient(CacheClient):
         expires_range: tuple[float, float] | None = None,
         creation_range: tuple[datetime, datetime] | None = None,
     ) -> Iterable[CachedValue]:
-        filters = {}
-        if group is not None:
-            filters["group"] = group
-
-        if creation_range is not None:
-            filters["created_at"] = {
-                "$gte": creation_range[0],
-                "$lte": creation_range[1],
-            }
-
-        if expires_range is not None:
-            filters["$or"] = [
-                {"expires_at": None},
-                {"expires_at": {"$gte": expires_range[0], "$lte": expires_range[1]}},
-            ]
-        else:
-            filters["$or"] = [
-                {"expires_at": None},
-                {"expires_at": {"$gt": ts_now()}},
-            ]
+        filters = build_filters(group, expires_range, creation_range)
 
+        self._sync()
         for doc in self._coll.find(filters):
-            key = doc.pop("_id")
-            value = CachedValue.model_construct(key=key, **doc)
+            value = from_document(doc, self._codec)
             if self._mem is not None:
-                self._mem.cache(value)
+                self._mem.load(Entry.from_value(value))
             yield value
 
+    def _known_miss(self, key: str) -> bool:
+        if self._negative_ttl <= 0:
+            return False
+        try:
+            self._negative.get_key(key)
+        except KeyError:
+            return False
+        self._counters["negative_hits"] += 1
+        return True
+
+    def _remember_misses(self, keys: Iterable[str]) -> None:
+        if self._negative_ttl <= 0:
+            return
+        now = ts_now()
+        for key in keys:
+            self._negative.load(Entry(key, None, None, now + self._negative_ttl, now))
+
+    def _find(
+        self, keys: list[str], allow_expired: bool
+    ) -> tuple[dict[str, CachedValue], list[str]]:
+        """
+        Read values from Mongo, removing the expired ones, and mirror them.
+        Returns the values found and the keys of the expired ones.
+        """
+
+        now = ts_now()
+        found = {}
+        expired = []
+        cursor = self._coll.find({"_id": {"$in": keys}}, projection={TTL_FIELD: False})
+        for doc in cursor:
+            if not allow_expired:
+                if doc["expires_at"] is not None and doc["expires_at"] <= now:
+                    expired.append(doc["_id"])
+                    continue
+
+            value = from_document(doc, self._codec)
+            found[value.key] = value
+            if self._mem is not None:
+                self._mem.load(Entry.from_value(value))
+
+        if expired:
+            self._coll.delete_many({"_id": {"$in": expired}})
+        return found, expired
+
+    def _read_through(
+        self, keys: list[str], allow_expired: bool
+    ) -> dict[str, CachedValue]:
+        keys = [
+            key
+            for key in keys
+            if not self._definitely_missing(key) and not self._known_miss(key)
+        ]
+        if not keys:
+            return {}
+
+        self._counters["mongo_fallbacks"] += 1
+        found, expired = self._find(keys, allow_expired)
+        missing = [key for key in keys if key not in found]
+        self._remember_misses(missing)
+        if self._bloom is not None and self._watcher is not None:
+            # expired keys were stored, the filter was right about them
+            self._counters["bloom_expired"] += len(expired)
+            self._counters["bloom_false_positives"] += len(missing) - len(expired)
+        return found
+
     def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
         if self._mem is not None:
             try:
-                return self._mem.get_key(key, allow_expired=allow_expired)
-            except KeyError as e:
-                self._coll.delete_one({"_id": key})
-                raise e
+                value = self._mem.get_key(key, allow_expired=allow_expired)
+                self._counters["mirror_hits"] += 1
+                return value
+            except KeyError:
+                self._counters["mirror_misses"] += 1
 
-        now = ts_now()
-        doc = self._coll.find_one({"_id": key})
-        if not doc:
+        # read through, the value may have been written by another process
+        found = self._read_through([key], allow_expired)
+        if key not in found:
             raise KeyError(key)
+        return found[key]
 
-        if not allow_expired:
-            if doc["expires_at"] is not None and doc["expires_at"] <= now:
-                self._coll.delete_one({"_id": key})
-                raise KeyError(key)
-
-        key = doc.pop("_id")
-        value = CachedValue(key=key, **doc)
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        keys = list(keys)
+        found = {}
         if self._mem is not None:
-            self._mem.cache(value)
-        return value
+            found = self._mem.get_many(keys, allow_expired=allow_expired)
+            self._counters["mirror_hits"] += len(found)
+            self._counters["mirror_misses"] += len(keys) - len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            found.update(self._read_through(missing, allow_expired))
+        return {key: found[key] for key in keys if key in found}
 
     def flush(
         self,
@@ -124,42 +685,86 @@ class MongoCacheClient(CacheClient):
         expires_range: tuple[float, float] | None = None,
         creation_range: tuple[datetime, datetime] | None = None,
     ) -> DeletedResult:
-        filters = {}
-        if group is not None:
-            filters["group"] = group
-
-        if creation_range is not None:
-            filters["created_at"] = {
-                "$gte": creation_range[0],
-                "$lte": creation_range[1],
-            }
+        filters = build_filters(group, expires_range, creation_range)
 
-        if expires_range is not None:
-            filters["$or"] = [
-                {"expires_at": None},
-                {"expires_at": {"$gte": expires_range[0], "$lte": expires_range[1]}},
-            ]
-        else:
-            filters["$or"] = [
-                {"expires_at": None},
-                {"expires_at": {"$gt": ts_now()}},
-            ]
+        self._sync()
+        if self._mem is None:
+            r = self._coll.delete_many(filters)
+            return DeletedResult(deleted_count=r.deleted_count)
 
-        if self._mem is not None:
-            self._mem.clear()
+        # Delete exactly the matched keys so only those leave the mirror
+        count = 0
+        keys = []
+        for doc in self._coll.find(filters, projection={"_id": True}):
+            keys.append(doc["_id"])
+            if len(keys) == FLUSH_BATCH_SIZE:
+                count += self._flush_keys(keys)
+                keys = []
+        if keys:
+            count += self._flush_keys(keys)
+        # mirrored values Mongo no longer has, e.g. removed by the TTL index
+        self._mem.flush(group, expires_range, creation_range)
+        return DeletedResult(deleted_count=count)
 
-        r = self._coll.delete_many(filters)
-        return DeletedResult(deleted_count=r.deleted_count)
+    def _flush_keys(self, keys: list[str]) -> int:
+        self._forget(keys)
+        return self._coll.delete_many({"_id": {"$in": keys}}).deleted_count
 
     def flush_key(self, key: str) -> DeletedResult:
+        self._sync()
         if self._mem is not None:
-            self._mem.flush_key(key)
+            self._forget([key])
 
         r = self._coll.delete_one({"_id": key})
         return DeletedResult(deleted_count=r.deleted_count)
 
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        keys = list(keys)
+        self._sync()
+        if self._mem is not None:
+            self._forget(keys)
+
+        r = self._coll.delete_many({"_id": {"$in": keys}})
+        return DeletedResult(deleted_count=r.deleted_count)
+
     def clear(self) -> None:
+        self._sync()
         if self._mem is not None:
-            self._mem.clear()
+            with self._preload_lock:
+                self._mem.clear()
+                self._flushed.clear()
+                self._ready.set()
 
+        if self._bloom_enabled:
+            self._bloom = BloomFilter(self._bloom_capacity, self._bloom_error_rate)
         self._coll.delete_many({})
+
+    def stats(self) -> CacheStats:
+        """
+        Statistics of the local mirror, or without a mirror of the values
+        stored in Mongo, counted by an aggregation over the collection.
+        """
+
+        if self._mem is not None:
+            stats = self._mem.stats()
+        else:
+            self._sync()
+            stats = stats_from_groups(self._coll.aggregate(stats_pipeline(ts_now())))
+
+        stats.counters.update(self._counters)
+        if self._bloom_enabled:
+            if (bloom := self._bloom) is not None:
+                stats.counters["bloom_bytes"] = bloom.nbytes
+                stats.counters["bloom_keys"] = len(bloom)
+                stats.gauges["bloom_error_rate"] = bloom.error_rate
+            false_positives = self._counters["bloom_false_positives"]
+            checked = false_positives + self._counters["bloom_negatives"]
+            stats.gauges["bloom_false_positive_rate"] = (
+                false_positives / checked if checked else 0.0
+            )
+        if self._writer is not None:
+            assert self._batches is not None
+            stats.counters["write_behind_pending"] = self._writer.pending
+            stats.counters["write_conflicts"] = self._batches.conflict_count
+            stats.counters["write_failures"] = self._batches.failure_count
+        return stats
@@ -1,2 +1,359 @@
-# TODO: Implement Redis client
-# https://redis.io/docs/latest/commands/scan/
\ No newline at end of file
+import json
+from datetime import datetime
+from itertools import batched
+from math import inf
+from typing import Iterable
+
+from cacheia_schemas import (
+    CacheClient,
+    CacheClientSettings,
+    CachedValue,
+    CacheManyResult,
+    CacheStats,
+    DeletedResult,
+    GroupStats,
+    KeyAlreadyExists,
+)
+from redis import ConnectionPool, Redis
+from redis.client import Pipeline
+
+from .codecs import ValueCodec, codec_from_settings
+from .entry import Entry
+from .utils import ts_now
+
+
+class RedisCacheClientSettings(CacheClientSettings):
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_REDIS_PREFIX: str = "cacheia"
+    CACHE_REDIS_MAX_CONNECTIONS: int = 50
+    # Commands sent per pipeline round trip by bulk operations
+    CACHE_REDIS_BATCH_SIZE: int = 1_000
+
+
+def _bound(score: float, exclusive: bool) -> str:
+    if score == inf:
+        return "+inf"
+    if score == -inf:
+        return "-inf"
+    return f"({score!r}" if exclusive else repr(score)
+
+
+class RedisCacheClient(CacheClient):
+    """
+    Redis backend, values expire natively at their 'expires_at'.
+
+    Each value is a string holding a small JSON header (codec tag, group and
+    timestamps) followed by the encoded value, written with 'SET NX PXAT' so
+    creation is atomic. Sorted sets index the keys by creation time, by
+    expiration and per group, so filtered reads and flushes only visit the
+    matching keys, and a hash maps grouped keys to their group. Flushes remove
+    the index members with the values. Keys Redis expired are pruned from the
+    indexes a batch at a time on writes, and completely before filtered reads.
+
+    Redis removes expired values, so 'allow_expired' finds nothing more.
+    """
+
+    def __init__(
+        self,
+        settings: RedisCacheClientSettings,
+        pool: ConnectionPool | None = None,
+    ) -> None:
+        if pool is None:
+            pool = ConnectionPool.from_url(
+                settings.CACHE_REDIS_URL,
+                max_connections=settings.CACHE_REDIS_MAX_CONNECTIONS,
+            )
+        self._pool = pool
+        self._redis = Redis(connection_pool=pool)
+        self._codec = codec_from_settings(settings) or ValueCodec("pickle")
+        self._prefix = settings.CACHE_REDIS_PREFIX
+        self._batch_size = settings.CACHE_REDIS_BATCH_SIZE
+        self._created_key = f"{self._prefix}:created"
+        self._expires_key = f"{self._prefix}:expires"
+        self._groups_key = f"{self._prefix}:group-of"
+
+    def _value_key(self, key: str) -> str:
+        return f"{self._prefix}:value:{key}"
+
+    def _group_key(self, group: str) -> str:
+        return f"{self._prefix}:group:{group}"
+
+    def _encode(self, entry: Entry) -> bytes:
+        payload, tag = self._codec.encode(entry.value)
+        header = json.dumps([tag, entry.group, entry.created_at, entry.expires_at])
+        return header.encode() + b"\n" + payload
+
+    def _decode(self, key: str, record: bytes) -> Entry:
+        header, _, payload = record.partition(b"\n")
+        tag, group, created_at, expires_at = json.loads(header)
+        return Entry(
+            key, self._codec.decode(payload, tag), group, expires_at, created_at
+        )
+
+    def _write(self, entries: list[Entry]) -> list[bool]:
+        """
+        Store the entries whose keys are free and index them.
+
+        :return: whether each entry was stored
+        """
+
+        pipe = self._redis.pipeline(transaction=False)
+        for entry in entries:
+            pxat = None
+            if entry.expires_at is not None:
+                pxat = max(int(entry.expires_at * 1000), 1)
+            pipe.set(
+                self._value_key(entry.key), self._encode(entry), nx=True, pxat=pxat
+            )
+        stored = [bool(ok) for ok in pipe.execute()]
+
+        now = ts_now()
+        indexed = []
+        pipe = self._redis.pipeline(transaction=False)
+        for entry, ok in zip(entries, stored):
+            if not ok or (entry.expires_at is not None and entry.expires_at <= now):
+                continue
+
+            expires_at = entry.expires_at or inf
+            indexed.append(entry)
+            # the group of a previous value of the key, expired but not pruned
+            pipe.hget(self._groups_key, entry.key)
+            pipe.zadd(self._created_key, {entry.key: entry.created_at})
+            pipe.zadd(self._expires_key, {entry.key: expires_at})
+            if entry.group is not None:
+                pipe.zadd(self._group_key(entry.group), {entry.key: expires_at})
+                pipe.hset(self._groups_key, entry.key, entry.group)
+        pipe.zrangebyscore(
+            self._expires_key, "-inf", repr(now), start=0, num=self._batch_size
+        )
+        *results, expired = pipe.execute()
+
+        i = 0
+        pipe = self._redis.pipeline(transaction=False)
+        for entry in indexed:
+            previous = results[i]
+            i += 3 if entry.group is None else 5
+            if previous is not None and previous.decode() != entry.group:
+                pipe.zrem(self._group_key(previous.decode()), entry.key)
+                if entry.group is None:
+                    pipe.hdel(self._groups_key, entry.key)
+        self._unindex(pipe, [k.decode() for k in expired])
+        pipe.execute()
+        return stored
+
+    def _unindex(self, pipe: Pipeline, keys: list[str]) -> None:
+        """
+        Queue the removal of keys from every index on a pipeline.
+        """
+
+        if not keys:
+            return
+
+        groups = self._redis.hmget(self._groups_key, keys)
+        pipe.zrem(self._created_key, *keys)
+        pipe.zrem(self._expires_key, *keys)
+        for key, group in zip(keys, groups):
+            if group is not None:
+                pipe.zrem(self._group_key(group.decode()), key)
+        pipe.hdel(self._groups_key, *keys)
+
+    def _prune(self) -> None:
+        """
+        Drop every expired key from the indexes.
+        """
+
+        now = repr(ts_now())
+        while keys := self._redis.zrangebyscore(
+            self._expires_key, "-inf", now, start=0, num=self._batch_size
+        ):
+            pipe = self._redis.pipeline(transaction=False)
+            self._unindex(pipe, [k.decode() for k in keys])
+            pipe.execute()
+
+    def _candidates(
+        self,
+        group: str | None,
+        expires_range: tuple[float, float] | None,
+        creation_range: tuple[float, float] | None,
+        exclusive: bool,
+    ) -> list[str]:
+        """
+        Keys of the index that narrows the filters the most cheaply.
+        """
+
+        if group is None and expires_range is None and creation_range is not None:
+            lo, hi = creation_range
+            keys = self._redis.zrangebyscore(
+                self._created_key, _bound(lo, exclusive), _bound(hi, exclusive)
+            )
+            return [k.decode() for k in keys]
+
+        index = self._expires_key if group is None else self._group_key(group)
+        if expires_range is None:
+            keys = self._redis.zrangebyscore(index, _bound(ts_now(), True), "+inf")
+        else:
+            # values that never expire match any expiration range
+            lo, hi = expires_range
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.zrangebyscore(index, _bound(lo, exclusive), _bound(hi, exclusive))
+            if hi != inf:
+                pipe.zrangebyscore(index, "+inf", "+inf")
+            keys = [k for found in pipe.execute() for k in found]
+        return [k.decode() for k in keys]
+
+    def _load(self, keys: list[str]) -> Iterable[Entry]:
+        for batch in batched(keys, self._batch_size):
+            records = self._redis.mget([self._value_key(k) for k in batch])
+            missing = []
+            for key, record in zip(batch, records):
+                if record is None:
+                    missing.append(key)
+                else:
+                    yield self._decode(key, record)
+            # flushed between reading the index and the values
+            pipe = self._redis.pipeline(transaction=False)
+            self._unindex(pipe, missing)
+            pipe.execute()
+
+    def _select(
+        self,
+        group: str | None,
+        expires_range: tuple[float, float] | None,
+        creation_range: tuple[datetime, datetime] | None,
+        exclusive: bool,
+    ) -> Iterable[Entry]:
+        self._prune()
+        created = None
+        if creation_range is not None:
+            created = (creation_range[0].timestamp(), creation_range[1].timestamp())
+
+        def within(ts: float, lo: float, hi: float) -> bool:
+            if exclusive:
+                return lo < ts < hi
+            return lo <= ts <= hi
+
+        now = ts_now()
+        keys = self._candidates(group, expires_range, created, exclusive)
+        for entry in self._load(keys):
+            # indexes may be stale, e.g. a key flushed and cached in another group
+            if group is not None and entry.group != group:
+                continue
+            if created is not None and not within(entry.created_at, *created):
+                continue
+            if entry.expires_at is not None:
+                if expires_range is not None:
+                    if not within(entry.expires_at, *expires_range):
+                        continue
+                elif entry.expires_at <= now:
+                    continue
+            yield entry
+
+    def cache(self, instance: CachedValue) -> None:
+        if not self._write([Entry.from_value(instance)])[0]:
+            raise KeyAlreadyExists(instance.key)
+
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        result = CacheManyResult()
+        for batch in batched(instances, self._batch_size):
+            entries = [Entry.from_value(instance) for instance in batch]
+            for entry, stored in zip(entries, self._write(entries)):
+                if stored:
+                    result.created.append(entry.key)
+                else:
+                    result.existing.append(entry.key)
+        return result
+
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> Iterable[CachedValue]:
+        for entry in self._select(group, expires_range, creation_range, False):
+            yield entry.to_value()
+
+    def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        record = self._redis.get(self._value_key(key))
+        if record is None:
+            raise KeyError(key)
+        return self._decode(key, record).to_value()
+
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        values = {}
+        for batch in batched(keys, self._batch_size):
+            records = self._redis.mget([self._value_key(k) for k in batch])
+            for key, record in zip(batch, records):
+                if record is not None:
+                    values[key] = self._decode(key, record).to_value()
+        return values
+
+    def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        entries = self._select(group, expires_range, creation_range, True)
+        return self.flush_many([entry.key for entry in entries])
+
+    def flush_key(self, key: str) -> DeletedResult:
+        return self.flush_many([key])
+
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        count = 0
+        for batch in batched(keys, self._batch_size):
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.unlink(*(self._value_key(k) for k in batch))
+            self._unindex(pipe, list(batch))
+            count += pipe.execute()[0]
+        return DeletedResult(deleted_count=count)
+
+    def _sizes(self, index: str | bytes) -> Iterable[int]:
+        """
+        Sizes of the values of an index's members, members whose value is gone
+        are left out.
+        """
+
+        members = (member for member, _ in self._redis.zscan_iter(index))
+        for batch in batched(members, self._batch_size):
+            pipe = self._redis.pipeline(transaction=False)
+            for member in batch:
+                pipe.strlen(self._value_key(member.decode()))
+            for member, size in zip(batch, pipe.execute()):
+                if size:
+                    yield size
+
+    def stats(self) -> CacheStats:
+        """
+        Statistics read from the indexes, sizes are the lengths of the stored
+        strings. Redis removes expired values itself, none is counted.
+        """
+
+        stats = CacheStats()
+        for size in self._sizes(self._expires_key):
+            stats.entries += 1
+            stats.bytes += size
+
+        groups = self._redis.scan_iter(
+            match=self._group_key("*"), count=self._batch_size
+        )
+        start = len(self._group_key(""))
+        for index in groups:
+            g = GroupStats()
+            for size in self._sizes(index):
+                g.entries += 1
+                g.bytes += size
+            if g.entries:
+                stats.groups[index.decode()[start:]] = g
+        return stats
+
+    def clear(self) -> None:
+        # every key of this cache shares the prefix, SCAN walks them in batches
+        keys = self._redis.scan_iter(match=f"{self._prefix}:*", count=self._batch_size)
+        for batch in batched(keys, self._batch_size):
+            self._redis.unlink(*batch)
+
+    def close(self) -> None:
+        self._pool.disconnect()
@@ -1,2 +1,380 @@
-# TODO: Implement S3 client
-# https://boto3.amazonaws.com/v1/documentation/api/latest/guide/s3-examples.html
\ No newline at end of file
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import batched
+from typing import Any, Iterable, Mapping
+from urllib.parse import quote, unquote
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from cacheia_schemas import (
+    CacheClient,
+    CacheClientSettings,
+    CachedValue,
+    CacheManyResult,
+    CacheStats,
+    DeletedResult,
+    KeyAlreadyExists,
+)
+
+from .codecs import ValueCodec, codec_from_settings
+from .entry import Entry
+from .utils import count_value, ts_now
+
+# Most keys a single DeleteObjects request accepts
+DELETE_BATCH_SIZE = 1_000
+
+_MISSING = {"404", "NoSuchKey"}
+_EXISTS = {"PreconditionFailed", "ConditionalRequestConflict"}
+
+
+class S3CacheClientSettings(CacheClientSettings):
+    CACHE_S3_BUCKET: str = "cacheia"
+    CACHE_S3_PREFIX: str = "cacheia"
+    CACHE_S3_ENDPOINT_URL: str | None = None
+    CACHE_S3_REGION: str | None = None
+    # Values larger than a part are uploaded in parts and downloaded in ranges
+    # of this size, S3 rejects parts under 5MB.
+    CACHE_S3_PART_SIZE: int = 8 * 2**20
+    CACHE_S3_MAX_CONCURRENCY: int = 10
+
+
+def _error_code(e: ClientError) -> str:
+    return e.response.get("Error", {}).get("Code", "")
+
+
+def _to_metadata(entry: Entry, tag: str) -> dict[str, str]:
+    # metadata must be ASCII, groups are quoted
+    metadata = {"codec": tag, "created-at": repr(entry.created_at)}
+    if entry.group is not None:
+        metadata["group"] = quote(entry.group, safe="")
+    if entry.expires_at is not None:
+        metadata["expires-at"] = repr(entry.expires_at)
+    return metadata
+
+
+def _from_metadata(key: str, metadata: Mapping[str, str], value: Any) -> Entry:
+    group = metadata.get("group")
+    expires_at = metadata.get("expires-at")
+    return Entry(
+        key,
+        value,
+        unquote(group) if group is not None else None,
+        float(expires_at) if expires_at is not None else None,
+        float(metadata["created-at"]),
+    )
+
+
+class S3CacheClient(CacheClient):
+    """
+    S3 backend for large and long lived values.
+
+    Each value is an object under '{prefix}/values/{key}' whose metadata holds
+    its group, codec and timestamps. Grouped values also get an empty marker
+    under '{prefix}/groups/{group}/{key}', so a group is listed and flushed
+    without visiting other values. Objects are created with 'If-None-Match',
+    an existing key is never overwritten.
+
+    Large values are uploaded in parts and downloaded in ranges, concurrently.
+    Expired values are removed when read by key, filtered reads and flushes
+    read the metadata of every listed value.
+    """
+
+    def __init__(self, settings: S3CacheClientSettings) -> None:
+        concurrency = settings.CACHE_S3_MAX_CONCURRENCY
+        self._s3 = boto3.client(
+            "s3",
+            endpoint_url=settings.CACHE_S3_ENDPOINT_URL,
+            region_name=settings.CACHE_S3_REGION,
+            config=Config(max_pool_connections=2 * concurrency),
+        )
+        self._bucket = settings.CACHE_S3_BUCKET
+        self._prefix = settings.CACHE_S3_PREFIX
+        self._part_size = settings.CACHE_S3_PART_SIZE
+        self._codec = codec_from_settings(settings) or ValueCodec("pickle")
+        # parts never wait on other tasks, so keys can wait on parts safely
+        self._keys = ThreadPoolExecutor(concurrency, "cacheia-s3")
+        self._parts = ThreadPoolExecutor(concurrency, "cacheia-s3-parts")
+
+    def _value_object(self, key: str) -> str:
+        return f"{self._prefix}/values/{key}"
+
+    def _group_prefix(self, group: str) -> str:
+        return f"{self._prefix}/groups/{quote(group, safe='')}/"
+
+    def _list_objects(self, prefix: str) -> Iterable[dict]:
+        paginator = self._s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self._bucket, Prefix=prefix):
+            yield from page.get("Contents", [])
+
+    def _list(self, prefix: str) -> Iterable[str]:
+        for obj in self._list_objects(prefix):
+            yield obj["Key"]
+
+    def _delete(self, objects: Iterable[str]) -> None:
+        for batch in batched(objects, DELETE_BATCH_SIZE):
+            self._s3.delete_objects(
+                Bucket=self._bucket,
+                Delete={"Objects": [{"Key": o} for o in batch], "Quiet": True},
+            )
+
+    def _upload(self, name: str, payload: bytes, metadata: dict[str, str]) -> None:
+        if len(payload) <= self._part_size:
+            self._s3.put_object(
+                Bucket=self._bucket,
+                Key=name,
+                Body=payload,
+                Metadata=metadata,
+                IfNoneMatch="*",
+            )
+            return
+
+        upload_id = self._s3.create_multipart_upload(
+            Bucket=self._bucket, Key=name, Metadata=metadata
+        )["UploadId"]
+
+        def upload_part(number: int) -> dict:
+            start = (number - 1) * self._part_size
+            r = self._s3.upload_part(
+                Bucket=self._bucket,
+                Key=name,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=payload[start : start + self._part_size],
+            )
+            return {"ETag": r["ETag"], "PartNumber": number}
+
+        count = -(-len(payload) // self._part_size)
+        try:
+            parts = list(self._parts.map(upload_part, range(1, count + 1)))
+            self._s3.complete_multipart_upload(
+                Bucket=self._bucket,
+                Key=name,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+                IfNoneMatch="*",
+            )
+        except BaseException:
+            self._s3.abort_multipart_upload(
+                Bucket=self._bucket, Key=name, UploadId=upload_id
+            )
+            raise
+
+    def _download(self, key: str) -> tuple[Mapping[str, str], bytes] | None:
+        """
+        Metadata and payload of a value, None if it does not exist.
+
+        The first range also answers the metadata and total size, the other
+        ranges are downloaded concurrently.
+        """
+
+        name = self._value_object(key)
+        try:
+            first = self._s3.get_object(
+                Bucket=self._bucket, Key=name, Range=f"bytes=0-{self._part_size - 1}"
+            )
+        except ClientError as e:
+            if _error_code(e) in _MISSING:
+                return None
+            raise
+
+        size = int(first["ContentRange"].rpartition("/")[2])
+        chunks = [first["Body"].read()]
+
+        def download_range(start: int) -> bytes:
+            end = min(start + self._part_size, size) - 1
+            r = self._s3.get_object(
+                Bucket=self._bucket,
+                Key=name,
+                Range=f"bytes={start}-{end}",
+                IfMatch=first["ETag"],
+            )
+            return r["Body"].read()
+
+        starts = range(self._part_size, size, self._part_size)
+        chunks.extend(self._parts.map(download_range, starts))
+        return first["Metadata"], b"".join(chunks)
+
+    def _head(self, key: str) -> Entry | None:
+        """
+        Entry of a value without its value, None if it does not exist.
+        """
+
+        try:
+            r = self._s3.head_object(Bucket=self._bucket, Key=self._value_object(key))
+        except ClientError as e:
+            if _error_code(e) in _MISSING:
+                return None
+            raise
+        return _from_metadata(key, r["Metadata"], None)
+
+    def _fetch(self, key: str, allow_expired: bool) -> Entry | None:
+        found = self._download(key)
+        if found is None:
+            return None
+
+        metadata, payload = found
+        entry = _from_metadata(key, metadata, None)
+        if not allow_expired and entry.expires_at and entry.expires_at <= ts_now():
+            self._delete(self._objects(entry))
+            return None
+
+        entry.value = self._codec.decode(payload, metadata["codec"])
+        return entry
+
+    def _select(
+        self,
+        group: str | None,
+        expires_range: tuple[float, float] | None,
+        creation_range: tuple[datetime, datetime] | None,
+        exclusive: bool,
+    ) -> Iterable[Entry]:
+        """
+        Entries, without values, of the stored values matching the filters.
+        """
+
+        if group is None:
+            prefix = self._value_object("")
+        else:
+            prefix = self._group_prefix(group)
+        keys = [name[len(prefix) :] for name in self._list(prefix)]
+
+        created = None
+        if creation_range is not None:
+            created = (creation_range[0].timestamp(), creation_range[1].timestamp())
+
+        def within(ts: float, lo: float, hi: float) -> bool:
+            if exclusive:
+                return lo < ts < hi
+            return lo <= ts <= hi
+
+        now = ts_now()
+        stale = []
+        for key, entry in zip(keys, self._keys.map(self._head, keys)):
+            if entry is None or (group is not None and entry.group != group):
+                # the marker of a value flushed or cached again in another group
+                stale.append(prefix + key)
+                continue
+            if created is not None and not within(entry.created_at, *created):
+                continue
+            if entry.expires_at is not None:
+                if expires_range is not None:
+                    if not within(entry.expires_at, *expires_range):
+                        continue
+                elif entry.expires_at <= now:
+                    continue
+            yield entry
+
+        if group is not None:
+            self._delete(stale)
+
+    def _objects(self, entry: Entry) -> list[str]:
+        objects = [self._value_object(entry.key)]
+        if entry.group is not None:
+            objects.append(self._group_prefix(entry.group) + entry.key)
+        return objects
+
+    def cache(self, instance: CachedValue) -> None:
+        entry = Entry.from_value(instance)
+        payload, tag = self._codec.encode(entry.value)
+        try:
+            self._upload(
+                self._value_object(entry.key), payload, _to_metadata(entry, tag)
+            )
+        except ClientError as e:
+            if _error_code(e) in _EXISTS:
+                raise KeyAlreadyExists(instance.key)
+            raise
+
+        if entry.group is not None:
+            self._s3.put_object(
+                Bucket=self._bucket,
+                Key=self._group_prefix(entry.group) + entry.key,
+                Body=b"",
+            )
+
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        def cache(instance: CachedValue) -> bool:
+            try:
+                self.cache(instance)
+                return True
+            except KeyAlreadyExists:
+                return False
+
+        result = CacheManyResult()
+        instances = list(instances)
+        for instance, created in zip(instances, self._keys.map(cache, instances)):
+            if created:
+                result.created.append(instance.key)
+            else:
+                result.existing.append(instance.key)
+        return result
+
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> Iterable[CachedValue]:
+        keys = [
+            e.key for e in self._select(group, expires_range, creation_range, False)
+        ]
+        for entry in self._keys.map(lambda key: self._fetch(key, True), keys):
+            if entry is not None:
+                yield entry.to_value()
+
+    def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        entry = self._fetch(key, allow_expired)
+        if entry is None:
+            raise KeyError(key)
+        return entry.to_value()
+
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        keys = list(keys)
+        entries = self._keys.map(lambda key: self._fetch(key, allow_expired), keys)
+        return {key: e.to_value() for key, e in zip(keys, entries) if e is not None}
+
+    def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        entries = list(self._select(group, expires_range, creation_range, True))
+        self._delete(o for entry in entries for o in self._objects(entry))
+        return DeletedResult(deleted_count=len(entries))
+
+    def flush_key(self, key: str) -> DeletedResult:
+        return self.flush_many([key])
+
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        entries = [e for e in self._keys.map(self._head, keys) if e is not None]
+        self._delete(o for entry in entries for o in self._objects(entry))
+        return DeletedResult(deleted_count=len(entries))
+
+    def clear(self) -> None:
+        self._delete(self._list(f"{self._prefix}/"))
+
+    def stats(self) -> CacheStats:
+        """
+        Statistics of the stored values, sizes are the sizes of their objects.
+
+        The metadata of every value is read, a request per value.
+        """
+
+        prefix = self._value_object("")
+        sizes = {o["Key"][len(prefix) :]: o["Size"] for o in self._list_objects(prefix)}
+        now = ts_now()
+        stats = CacheStats()
+        for entry in self._keys.map(self._head, sizes):
+            if entry is not None:
+                expired = entry.expires_at is not None and entry.expires_at <= now
+                count_value(stats, entry.group, sizes[entry.key], expired)
+        return stats
+
+    def close(self) -> None:
+        self._keys.shutdown()
+        self._parts.shutdown()
+        self._s3.close()
@@ -0,0 +1,264 @@
+import bisect
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from hashlib import blake2b
+from typing import Any, Callable, Iterable, Iterator, Sequence, TypeVar
+
+from cacheia_schemas import (
+    CacheClient,
+    CacheClientSettings,
+    CachedValue,
+    CacheManyResult,
+    CacheStats,
+    DeletedResult,
+)
+
+from .utils import merge_stats
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+
+
+def _hash(data: str) -> int:
+    return int.from_bytes(blake2b(data.encode(), digest_size=8).digest(), "little")
+
+
+class HashRing:
+    """
+    Consistent hash ring of named nodes, each placed at 'vnodes' points.
+
+    Adding a node only moves the keys that land on its points, about
+    1 / (nodes + 1) of them, and keys never move between the other nodes.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 160) -> None:
+        self._vnodes = vnodes
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        for i in range(self._vnodes):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def node(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("The hash ring has no nodes")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+class ShardedCacheClientSettings(CacheClientSettings):
+    # Settings of each shard, dicts are resolved like the ones given to
+    # 'Cacheia.setup'. Shards are named by position on the ring, new shards
+    # must be appended.
+    CACHE_SHARDS: list[dict[str, Any] | CacheClientSettings] = []
+    CACHE_SHARD_VNODES: int = 160
+    CACHE_SHARD_MAX_WORKERS: int = 32
+    # Values read ahead from the shards while a merged query is consumed
+    CACHE_SHARD_PREFETCH: int = 1_000
+
+
+class ShardedCacheClient(CacheClient):
+    """
+    Spreads keys over several caches with a consistent hash ring.
+
+    Key operations go to the shard owning the key, bulk key operations are
+    split by shard and sent in parallel. Queries and flushes by filters run on
+    every shard in parallel, query results are streamed as shards produce
+    them.
+    """
+
+    def __init__(
+        self, settings: ShardedCacheClientSettings, shards: Sequence[CacheClient]
+    ) -> None:
+        if not shards:
+            raise ValueError("A sharded cache needs at least one shard")
+
+        self._vnodes = settings.CACHE_SHARD_VNODES
+        self._prefetch = settings.CACHE_SHARD_PREFETCH
+        self._shards: dict[str, CacheClient] = {}
+        self._ring = HashRing(vnodes=self._vnodes)
+        for shard in shards:
+            self._add(shard)
+        self._pool = ThreadPoolExecutor(
+            settings.CACHE_SHARD_MAX_WORKERS, "cacheia-shards"
+        )
+
+    def _add(self, shard: CacheClient) -> str:
+        name = f"shard{len(self._shards)}"
+        self._shards[name] = shard
+        self._ring.add(name)
+        return name
+
+    def _shard(self, key: str) -> CacheClient:
+        return self._shards[self._ring.node(key)]
+
+    def _split(self, items: Iterable[T], key: Callable[[T], str]) -> dict[str, list[T]]:
+        by_shard: dict[str, list[T]] = {}
+        for item in items:
+            by_shard.setdefault(self._ring.node(key(item)), []).append(item)
+        return by_shard
+
+    def _each(
+        self, call: Callable[[CacheClient, list[T]], R], items: dict[str, list[T]]
+    ) -> list[R]:
+        futures = [
+            self._pool.submit(call, self._shards[name], part)
+            for name, part in items.items()
+        ]
+        return [f.result() for f in futures]
+
+    def _all(self, call: Callable[[CacheClient], R]) -> list[R]:
+        futures = [self._pool.submit(call, shard) for shard in self._shards.values()]
+        return [f.result() for f in futures]
+
+    def _merge(self, call: Callable[[CacheClient], Iterable[T]]) -> Iterator[T]:
+        """
+        Iterate every shard in parallel, yielding items as they arrive.
+        """
+
+        results: queue.Queue = queue.Queue(maxsize=self._prefetch)
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce(shard: CacheClient) -> None:
+            try:
+                for item in call(shard):
+                    if not put(item):
+                        return
+            except BaseException as e:
+                put(e)
+            put(_DONE)
+
+        for shard in self._shards.values():
+            self._pool.submit(produce, shard)
+
+        try:
+            remaining = len(self._shards)
+            while remaining:
+                item = results.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, BaseException):
+                    raise item
+                else:
+                    yield item
+        finally:
+            # unblock producers when the consumer stops early
+            stop.set()
+
+    def add_shard(self, shard: CacheClient) -> int:
+        """
+        Add a shard and move to it the values it now owns.
+
+        Only values landing on the new shard's points move, the others stay.
+
+        :return: number of moved values
+        """
+
+        name = self._add(shard)
+
+        def move(source: CacheClient) -> int:
+            if source is shard:
+                return 0
+            values = [v for v in source.get() if self._ring.node(v.key) == name]
+            shard.cache_many(values)
+            return source.flush_many(v.key for v in values).deleted_count
+
+        return sum(self._all(move))
+
+    def cache(self, instance: CachedValue) -> None:
+        self._shard(instance.key).cache(instance)
+
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        instances = list(instances)
+        results = self._each(
+            lambda shard, part: shard.cache_many(part),
+            self._split(instances, lambda v: v.key),
+        )
+        existing = {key for r in results for key in r.existing}
+        result = CacheManyResult()
+        for instance in instances:
+            if instance.key in existing:
+                result.existing.append(instance.key)
+            else:
+                result.created.append(instance.key)
+        return result
+
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> Iterable[CachedValue]:
+        return self._merge(lambda s: s.get(group, expires_range, creation_range))
+
+    def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        return self._shard(key).get_key(key, allow_expired=allow_expired)
+
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        keys = list(keys)
+        results = self._each(
+            lambda shard, part: shard.get_many(part, allow_expired=allow_expired),
+            self._split(keys, lambda k: k),
+        )
+        found = {key: value for r in results for key, value in r.items()}
+        return {key: found[key] for key in keys if key in found}
+
+    def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        results = self._all(lambda s: s.flush(group, expires_range, creation_range))
+        return DeletedResult(deleted_count=sum(r.deleted_count for r in results))
+
+    def flush_key(self, key: str) -> DeletedResult:
+        return self._shard(key).flush_key(key)
+
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        results = self._each(
+            lambda shard, part: shard.flush_many(part),
+            self._split(keys, lambda k: k),
+        )
+        return DeletedResult(deleted_count=sum(r.deleted_count for r in results))
+
+    def clear(self) -> None:
+        self._all(lambda s: s.clear())
+
+    def ready(self) -> bool:
+        return all(shard.ready() for shard in self._shards.values())
+
+    def stats(self) -> CacheStats:
+        """
+        Statistics of every shard added together.
+        """
+
+        return merge_stats(self._all(lambda s: s.stats()))
+
+    def close(self) -> None:
+        for shard in self._shards.values():
+            close = getattr(shard, "close", None)
+            if close is not None:
+                close()
+        self._pool.shutdown()
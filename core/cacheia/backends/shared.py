@@ -0,0 +1,526 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from cacheia_schemas import (
+    CacheClient,
+    CacheClientSettings,
+    CachedValue,
+    CacheStats,
+    DeletedResult,
+    KeyAlreadyExists,
+)
+
+from .utils import count_value, ts_now
+
+_MAGIC = b"CACHEIA1"
+# magic, slots, max probe, arena size, arena used
+_HEADER = struct.Struct("<8sQQQQ")
+_HEADER_SIZE = 64
+_ARENA_USED_OFFSET = 32
+# seq, state, hash, created_at, expires_at, record offset, record length
+_SLOT = struct.Struct("<IB3xQddQI4x")
+# key length, group length (-1 when there is no group)
+_RECORD = struct.Struct("<Ii")
+
+_EMPTY = 0
+_USED = 1
+_DELETED = 2
+
+_SEQ_MASK = 0xFFFFFFFF
+# reads of a slot being written retry this many times before backing off
+_SPINS = 100
+_MAX_BACKOFF = 0.001
+
+
+def _default_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "cacheia")
+
+
+def _hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class SharedMemoryCacheClientSettings(CacheClientSettings):
+    CACHE_SHM_PATH: str | None = None
+    CACHE_SHM_SLOTS: int = 1 << 16
+    CACHE_SHM_MAX_PROBE: int = 64
+    CACHE_SHM_ARENA_BYTES: int = 256 * 1024 * 1024
+
+
+class SharedMemoryCacheClient(CacheClient):
+    """
+    Cache shared by every process that maps the same file.
+
+    Keys live in an open addressing hash table (linear probing) and records in
+    an arena. Readers never lock, they validate each slot and the record they
+    copied with a sequence counter. Writers lock the home bucket of their key
+    and the slot they write with 'fcntl' byte range locks, always in
+    ascending order. Within one process writers also serialize on a thread
+    lock, since record locks are owned by the process.
+
+    Records are appended to the arena. When it is full, live records are
+    compacted to its start under a lock of the whole file, dropping flushed
+    and expired values. A slot left half written by a process that died is
+    marked as deleted by the next reader finding its lock free.
+    """
+
+    def __init__(self, settings: SharedMemoryCacheClientSettings) -> None:
+        self._path = settings.CACHE_SHM_PATH or _default_path()
+        self._slots = settings.CACHE_SHM_SLOTS
+        self._max_probe = settings.CACHE_SHM_MAX_PROBE
+        self._arena_size = settings.CACHE_SHM_ARENA_BYTES
+        self._slots_offset = _HEADER_SIZE
+        # the table has 'max_probe' extra slots so probing never wraps around
+        self._arena_offset = (
+            self._slots_offset + (self._slots + self._max_probe) * _SLOT.size
+        )
+        self._thread_lock = threading.RLock()
+        # slots locked by this process, and whether the whole file is
+        self._held: set[int] = set()
+        self._holds_file = False
+
+        self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = self._arena_offset + self._arena_size
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                header = _HEADER.pack(
+                    _MAGIC, self._slots, self._max_probe, self._arena_size, 0
+                )
+                os.pwrite(self._fd, header, 0)
+            else:
+                header = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+                expected = (_MAGIC, self._slots, self._max_probe, self._arena_size)
+                if header[:4] != expected:
+                    m = f"Shared cache at '{self._path}' has a different layout"
+                    raise ValueError(m)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+
+        self._map = mmap.mmap(self._fd, size)
+
+    def _slot_offset(self, index: int) -> int:
+        return self._slots_offset + index * _SLOT.size
+
+    def _lock(self, index: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, self._slot_offset(index))
+        self._held.add(index)
+
+    def _unlock(self, index: int) -> None:
+        self._held.discard(index)
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._slot_offset(index))
+
+    def _lock_file(self) -> None:
+        # a lock over the whole file waits for every bucket and arena lock
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 0, 0)
+        self._holds_file = True
+
+    def _unlock_file(self) -> None:
+        self._holds_file = False
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 0, 0)
+
+    def _read_slot(self, index: int) -> tuple:
+        """
+        Read a consistent copy of a slot without taking any lock.
+        """
+
+        offset = self._slot_offset(index)
+        attempts = 0
+        while True:
+            slot = _SLOT.unpack_from(self._map, offset)
+            if not slot[0] & 1 and _SLOT.unpack_from(self._map, offset)[0] == slot[0]:
+                return slot
+
+            attempts += 1
+            if attempts > _SPINS:
+                time.sleep(min(_MAX_BACKOFF, 1e-6 * 2 ** (attempts - _SPINS)))
+                self._recover(index)
+
+    def _recover(self, index: int) -> None:
+        """
+        Mark a slot as deleted if it is still being written while nobody holds
+        its lock, e.g. when its writer died halfway through.
+        """
+
+        offset = self._slot_offset(index)
+        with self._thread_lock:
+            # writers of this process hold the thread lock while writing
+            owned = self._holds_file or index in self._held
+            if not owned:
+                try:
+                    fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+                except OSError:
+                    return
+            try:
+                seq = _SLOT.unpack_from(self._map, offset)[0]
+                if seq & 1:
+                    seq = (seq + 1) & _SEQ_MASK
+                    _SLOT.pack_into(self._map, offset, seq, _DELETED, 0, 0.0, 0.0, 0, 0)
+            finally:
+                if not owned:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+    def _begin_write(self, index: int) -> int:
+        offset = self._slot_offset(index)
+        seq = (_SLOT.unpack_from(self._map, offset)[0] + 1) & _SEQ_MASK
+        struct.pack_into("<I", self._map, offset, seq)
+        return seq
+
+    def _end_write(self, index: int, seq: int, *fields) -> None:
+        offset = self._slot_offset(index)
+        _SLOT.pack_into(self._map, offset, seq, *fields)
+        struct.pack_into("<I", self._map, offset, (seq + 1) & _SEQ_MASK)
+
+    def _write_slot(self, index: int, *fields) -> None:
+        self._end_write(index, self._begin_write(index), *fields)
+
+    def _snapshot(self, index: int) -> tuple[tuple, bytes]:
+        """
+        Read a slot and a copy of its record, consistent with each other.
+
+        Records only move or get overwritten after their slot changed, so the
+        copy is valid if the slot's sequence did not change meanwhile.
+        """
+
+        offset = self._slot_offset(index)
+        while True:
+            slot = self._read_slot(index)
+            if slot[1] != _USED:
+                return slot, b""
+            record = self._map[slot[5] : slot[5] + slot[6]]
+            if _SLOT.unpack_from(self._map, offset)[0] == slot[0]:
+                return slot, record
+
+    @staticmethod
+    def _parse_record(record: bytes) -> tuple[str, str | None, int]:
+        key_len, group_len = _RECORD.unpack_from(record)
+        start = _RECORD.size
+        key = record[start : start + key_len].decode()
+        start += key_len
+        group = None
+        if group_len >= 0:
+            group = record[start : start + group_len].decode()
+            start += group_len
+        return key, group, start
+
+    def _to_value(self, slot: tuple, record: bytes) -> CachedValue:
+        _, _, _, created_at, expires_at, _, _ = slot
+        key, group, start = self._parse_record(record)
+        return CachedValue.model_construct(
+            key=key,
+            value=pickle.loads(memoryview(record)[start:]),
+            group=group,
+            expires_at=expires_at or None,
+            created_at=datetime.fromtimestamp(created_at),
+        )
+
+    def _allocate(self, record: bytes) -> int | None:
+        """
+        Copy a record into the arena.
+
+        :return: its offset, None if the arena is full
+        """
+
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 8, _ARENA_USED_OFFSET)
+        try:
+            (used,) = struct.unpack_from("<Q", self._map, _ARENA_USED_OFFSET)
+            if used + len(record) > self._arena_size:
+                return None
+
+            offset = self._arena_offset + used
+            self._map[offset : offset + len(record)] = record
+            struct.pack_into("<Q", self._map, _ARENA_USED_OFFSET, used + len(record))
+            return offset
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 8, _ARENA_USED_OFFSET)
+
+    def _compact(self) -> None:
+        """
+        Move the live records to the start of the arena, dropping the space of
+        flushed and expired values.
+        """
+
+        with self._thread_lock:
+            self._lock_file()
+            try:
+                now = ts_now()
+                live = []
+                for index in range(self._slots + self._max_probe):
+                    slot = self._read_slot(index)
+                    if slot[1] != _USED:
+                        continue
+                    if slot[4] and slot[4] <= now:
+                        self._write_slot(index, _DELETED, *slot[2:])
+                    else:
+                        live.append((index, slot))
+
+                used = 0
+                for index, slot in sorted(live, key=lambda s: s[1][5]):
+                    offset, length = slot[5], slot[6]
+                    target = self._arena_offset + used
+                    if target != offset:
+                        # readers copying the record see the slot change
+                        seq = self._begin_write(index)
+                        self._map.move(target, offset, length)
+                        self._end_write(index, seq, *slot[1:5], target, length)
+                    used += length
+                struct.pack_into("<Q", self._map, _ARENA_USED_OFFSET, used)
+            finally:
+                self._unlock_file()
+
+    def _holds(self, slot: tuple, record: bytes, key: bytes, h: int) -> bool:
+        if slot[1] != _USED or slot[2] != h:
+            return False
+        key_len = _RECORD.unpack_from(record)[0]
+        return record[_RECORD.size : _RECORD.size + key_len] == key
+
+    def _find(self, key: bytes, h: int) -> tuple[int, tuple, bytes] | None:
+        home = h % self._slots
+        for index in range(home, home + self._max_probe):
+            slot = self._read_slot(index)
+            if slot[1] == _EMPTY:
+                return None
+            if slot[1] != _USED or slot[2] != h:
+                continue
+            slot, record = self._snapshot(index)
+            if self._holds(slot, record, key, h):
+                return index, slot, record
+        return None
+
+    def _live_slots(self) -> Iterator[tuple[int, tuple, bytes]]:
+        for index in range(self._slots + self._max_probe):
+            if self._read_slot(index)[1] == _USED:
+                slot, record = self._snapshot(index)
+                if slot[1] == _USED:
+                    yield index, slot, record
+
+    def cache(self, instance: CachedValue) -> None:
+        key = instance.key.encode()
+        group = instance.group.encode() if instance.group is not None else b""
+        record = b"".join(
+            (
+                _RECORD.pack(len(key), -1 if instance.group is None else len(group)),
+                key,
+                group,
+                pickle.dumps(instance.value, protocol=pickle.HIGHEST_PROTOCOL),
+            )
+        )
+        if len(record) > self._arena_size:
+            raise MemoryError(f"Value of '{instance.key}' is larger than the arena")
+
+        if not self._insert(instance, key, record):
+            # locks are released first, compacting takes the whole file
+            self._compact()
+            if not self._insert(instance, key, record):
+                raise MemoryError(f"Shared cache arena at '{self._path}' is full")
+
+    def _insert(self, instance: CachedValue, key: bytes, record: bytes) -> bool:
+        """
+        :return: False if the arena has no room left for the record
+        """
+
+        h = _hash(key)
+        home = h % self._slots
+        now = ts_now()
+
+        with self._thread_lock:
+            self._lock(home)
+            try:
+                target = None
+                for index in range(home, home + self._max_probe):
+                    slot = self._read_slot(index)
+                    if slot[1] == _EMPTY:
+                        target = index if target is None else target
+                        break
+                    if slot[1] == _DELETED:
+                        target = index if target is None else target
+                        continue
+                    if slot[2] != h:
+                        continue
+                    slot, stored = self._snapshot(index)
+                    if not self._holds(slot, stored, key, h):
+                        continue
+                    if slot[4] and slot[4] <= now:
+                        # expired values are replaced in place
+                        target = index
+                        break
+                    raise KeyAlreadyExists(instance.key)
+
+                while target is not None:
+                    locked = target
+                    if locked != home:
+                        self._lock(locked)
+                    try:
+                        # another key may have claimed this slot after we read it
+                        slot = self._read_slot(target)
+                        if slot[1] == _USED and slot[2] != h:
+                            target = self._next_free(target + 1, home)
+                            continue
+
+                        offset = self._allocate(record)
+                        if offset is None:
+                            return False
+                        self._write_slot(
+                            target,
+                            _USED,
+                            h,
+                            instance.created_at.timestamp(),
+                            instance.expires_at or 0.0,
+                            offset,
+                            len(record),
+                        )
+                        return True
+                    finally:
+                        if locked != home:
+                            self._unlock(locked)
+
+                raise MemoryError(f"Shared cache table at '{self._path}' is full")
+            finally:
+                self._unlock(home)
+
+    def _next_free(self, start: int, home: int) -> int | None:
+        for index in range(start, home + self._max_probe):
+            if self._read_slot(index)[1] != _USED:
+                return index
+        return None
+
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> Iterable[CachedValue]:
+        for _, slot, record in self._select(group, expires_range, creation_range, True):
+            yield self._to_value(slot, record)
+
+    def _select(
+        self,
+        group: str | None,
+        expires_range: tuple[float, float] | None,
+        creation_range: tuple[datetime, datetime] | None,
+        inclusive: bool,
+    ) -> Iterator[tuple[int, tuple, bytes]]:
+        created = None
+        if creation_range is not None:
+            created = (creation_range[0].timestamp(), creation_range[1].timestamp())
+
+        def within(lo: float, value: float, hi: float) -> bool:
+            return lo <= value <= hi if inclusive else lo < value < hi
+
+        now = ts_now()
+        for index, slot, record in self._live_slots():
+            _, _, _, created_at, expires_at, _, _ = slot
+            if created is not None and not within(created[0], created_at, created[1]):
+                continue
+
+            if expires_at:
+                if expires_range is not None:
+                    if not within(expires_range[0], expires_at, expires_range[1]):
+                        continue
+                elif expires_at <= now:
+                    continue
+
+            if group is not None and self._parse_record(record)[1] != group:
+                continue
+
+            yield index, slot, record
+
+    def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        found = self._find(key.encode(), _hash(key.encode()))
+        if found is None:
+            raise KeyError(key)
+
+        _, slot, record = found
+        if not allow_expired and slot[4] and slot[4] <= ts_now():
+            self._remove(key, slot)
+            raise KeyError(key)
+
+        return self._to_value(slot, record)
+
+    def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        count = 0
+        selected = list(self._select(group, expires_range, creation_range, False))
+        for _, slot, record in selected:
+            key, _, _ = self._parse_record(record)
+            count += self._remove(key, slot)
+
+        return DeletedResult(deleted_count=count)
+
+    def _remove(self, key: str, expected: tuple | None = None) -> bool:
+        """
+        Delete a key, when 'expected' is given only if its slot still holds
+        the value read in that slot, not one cached again by another process.
+        """
+
+        encoded = key.encode()
+        h = _hash(encoded)
+        home = h % self._slots
+        with self._thread_lock:
+            self._lock(home)
+            try:
+                found = self._find(encoded, h)
+                if found is None:
+                    return False
+
+                index, slot, _ = found
+                # records move when the arena is compacted, the offset may differ
+                if expected is not None and slot[2:5] != expected[2:5]:
+                    return False
+
+                if index != home:
+                    self._lock(index)
+                try:
+                    self._write_slot(index, _DELETED, *slot[2:])
+                finally:
+                    if index != home:
+                        self._unlock(index)
+                return True
+            finally:
+                self._unlock(home)
+
+    def flush_key(self, key: str) -> DeletedResult:
+        return DeletedResult(deleted_count=int(self._remove(key)))
+
+    def clear(self) -> None:
+        with self._thread_lock:
+            self._lock_file()
+            try:
+                for index in range(self._slots + self._max_probe):
+                    if self._read_slot(index)[1] != _EMPTY:
+                        self._write_slot(index, _EMPTY, 0, 0.0, 0.0, 0, 0)
+                struct.pack_into("<Q", self._map, _ARENA_USED_OFFSET, 0)
+            finally:
+                self._unlock_file()
+
+    def stats(self) -> CacheStats:
+        """
+        Statistics of the values in the slot table, sizes are the lengths of
+        their records.
+        """
+
+        stats = CacheStats()
+        now = ts_now()
+        for _, slot, record in self._live_slots():
+            expired = bool(slot[4]) and slot[4] <= now
+            count_value(stats, self._parse_record(record)[1], slot[6], expired)
+        return stats
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
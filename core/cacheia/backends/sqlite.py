@@ -0,0 +1,297 @@
+import sqlite3
+import threading
+from datetime import datetime
+from itertools import batched
+from typing import Iterable
+
+from cacheia_schemas import (
+    CacheClient,
+    CacheClientSettings,
+    CachedValue,
+    CacheManyResult,
+    CacheStats,
+    DeletedResult,
+    GroupStats,
+    KeyAlreadyExists,
+)
+
+from .codecs import ValueCodec, codec_from_settings
+from .entry import Entry
+from .utils import ts_now
+
+# Most parameters in one statement on SQLite builds older than 3.32
+MAX_PARAMETERS = 999
+
+
+class SQLiteCacheClientSettings(CacheClientSettings):
+    CACHE_SQLITE_PATH: str = "cacheia.db"
+    CACHE_SQLITE_TABLE: str = "cacheia"
+    CACHE_SQLITE_MMAP_SIZE: int = 256 * 2**20
+    CACHE_SQLITE_BUSY_TIMEOUT: float = 5.0
+    # Expired values are purged in batches of this size, at most once per
+    # 'CACHE_SQLITE_PURGE_INTERVAL' seconds of writes
+    CACHE_SQLITE_PURGE_BATCH_SIZE: int = 1_000
+    CACHE_SQLITE_PURGE_INTERVAL: float = 60.0
+
+
+class SQLiteCacheClient(CacheClient):
+    """
+    Persistent backend on a local SQLite database.
+
+    The database runs in WAL mode, so readers never block the writer and
+    several processes on one host (e.g. uvicorn workers) can share a file.
+    Each thread gets its own connection, whose statement cache keeps the
+    statements below prepared.
+    """
+
+    def __init__(self, settings: SQLiteCacheClientSettings) -> None:
+        self._path = settings.CACHE_SQLITE_PATH
+        self._timeout = settings.CACHE_SQLITE_BUSY_TIMEOUT
+        self._mmap_size = settings.CACHE_SQLITE_MMAP_SIZE
+        self._purge_batch_size = settings.CACHE_SQLITE_PURGE_BATCH_SIZE
+        self._purge_interval = settings.CACHE_SQLITE_PURGE_INTERVAL
+        self._codec = codec_from_settings(settings) or ValueCodec("pickle")
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._last_purge = ts_now()
+
+        t = settings.CACHE_SQLITE_TABLE
+        self._insert_sql = (
+            f"INSERT INTO {t} (key, value, codec, grp, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO NOTHING"
+        )
+        self._select_sql = f"SELECT * FROM {t}"
+        self._get_sql = f"SELECT * FROM {t} WHERE key = ?"
+        self._delete_sql = f"DELETE FROM {t} WHERE key = ?"
+        self._delete_expired_sql = f"DELETE FROM {t} WHERE key = ? AND expires_at <= ?"
+        self._purge_sql = (
+            f"DELETE FROM {t} WHERE key IN "
+            f"(SELECT key FROM {t} WHERE expires_at <= ? LIMIT ?)"
+        )
+        self._stats_sql = (
+            "SELECT grp, COUNT(*), SUM(LENGTH(value) + LENGTH(key)), "
+            "SUM(expires_at <= ?) "
+            f"FROM {t} GROUP BY grp"
+        )
+        self._table = t
+
+        self._conn.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS {t} (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                codec TEXT NOT NULL,
+                grp TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS {t}_grp ON {t} (grp);
+            CREATE INDEX IF NOT EXISTS {t}_created_at ON {t} (created_at);
+            CREATE INDEX IF NOT EXISTS {t}_expires_at ON {t} (expires_at);
+            """
+        )
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self._path,
+                timeout=self._timeout,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=64,
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(f"PRAGMA mmap_size = {int(self._mmap_size)}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _row(self, entry: Entry) -> tuple:
+        payload, tag = self._codec.encode(entry.value)
+        return (
+            entry.key,
+            payload,
+            tag,
+            entry.group,
+            entry.created_at,
+            entry.expires_at,
+        )
+
+    def _entry(self, row: tuple) -> Entry:
+        key, payload, tag, group, created_at, expires_at = row
+        return Entry(
+            key, self._codec.decode(payload, tag), group, expires_at, created_at
+        )
+
+    def _where(
+        self,
+        group: str | None,
+        expires_range: tuple[float, float] | None,
+        creation_range: tuple[datetime, datetime] | None,
+        exclusive: bool,
+    ) -> tuple[str, list]:
+        lo, hi = (">", "<") if exclusive else (">=", "<=")
+        clauses = []
+        params: list = []
+        if group is not None:
+            clauses.append("grp = ?")
+            params.append(group)
+
+        if creation_range is not None:
+            clauses.append(f"created_at {lo} ? AND created_at {hi} ?")
+            params.extend(ts.timestamp() for ts in creation_range)
+
+        # values that never expire match any expiration range
+        if expires_range is not None:
+            clauses.append(
+                f"(expires_at IS NULL OR (expires_at {lo} ? AND expires_at {hi} ?))"
+            )
+            params.extend(expires_range)
+        else:
+            clauses.append("(expires_at IS NULL OR expires_at > ?)")
+            params.append(ts_now())
+
+        return " WHERE " + " AND ".join(clauses), params
+
+    def purge_expired(self, limit: int | None = None) -> int:
+        """
+        Delete expired values, one short transaction per batch so writers of
+        other processes are not held back.
+
+        :param limit: delete at most about this many values, all when None
+        :return: number of deleted values
+        """
+
+        count = 0
+        now = ts_now()
+        while limit is None or count < limit:
+            deleted = self._conn.execute(
+                self._purge_sql, (now, self._purge_batch_size)
+            ).rowcount
+            count += deleted
+            if deleted < self._purge_batch_size:
+                break
+
+        self._last_purge = now
+        return count
+
+    def _maybe_purge(self) -> None:
+        if ts_now() - self._last_purge >= self._purge_interval:
+            self.purge_expired(limit=self._purge_batch_size)
+
+    def cache(self, instance: CachedValue) -> None:
+        self._maybe_purge()
+        row = self._row(Entry.from_value(instance))
+        if not self._conn.execute(self._insert_sql, row).rowcount:
+            raise KeyAlreadyExists(instance.key)
+
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        self._maybe_purge()
+        result = CacheManyResult()
+        # encode before taking the write lock
+        rows = [self._row(Entry.from_value(instance)) for instance in instances]
+        conn = self._conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for row in rows:
+                if conn.execute(self._insert_sql, row).rowcount:
+                    result.created.append(row[0])
+                else:
+                    result.existing.append(row[0])
+        return result
+
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> Iterable[CachedValue]:
+        where, params = self._where(group, expires_range, creation_range, False)
+        for row in self._conn.execute(self._select_sql + where, params):
+            yield self._entry(row).to_value()
+
+    def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        row = self._conn.execute(self._get_sql, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+
+        expires_at = row[5]
+        now = ts_now()
+        if not allow_expired and expires_at is not None and expires_at <= now:
+            # another client may have replaced the row since it was read
+            self._conn.execute(self._delete_expired_sql, (key, now))
+            raise KeyError(key)
+
+        return self._entry(row).to_value()
+
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        keys = list(keys)
+        now = ts_now()
+        found = {}
+        for batch in batched(keys, MAX_PARAMETERS):
+            marks = ", ".join("?" * len(batch))
+            sql = f"{self._select_sql} WHERE key IN ({marks})"
+            for row in self._conn.execute(sql, batch):
+                expires_at = row[5]
+                if allow_expired or expires_at is None or expires_at > now:
+                    found[row[0]] = self._entry(row).to_value()
+        return {key: found[key] for key in keys if key in found}
+
+    def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        where, params = self._where(group, expires_range, creation_range, True)
+        count = self._conn.execute(f"DELETE FROM {self._table}" + where, params)
+        return DeletedResult(deleted_count=count.rowcount)
+
+    def flush_key(self, key: str) -> DeletedResult:
+        count = self._conn.execute(self._delete_sql, (key,)).rowcount
+        return DeletedResult(deleted_count=count)
+
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        count = 0
+        conn = self._conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for key in keys:
+                count += conn.execute(self._delete_sql, (key,)).rowcount
+        return DeletedResult(deleted_count=count)
+
+    def clear(self) -> None:
+        self._conn.execute(f"DELETE FROM {self._table}")
+
+    def stats(self) -> CacheStats:
+        """
+        Statistics of the stored values, sizes are the length of the encoded
+        values and keys.
+        """
+
+        stats = CacheStats()
+        for group, entries, size, expired in self._conn.execute(
+            self._stats_sql, (ts_now(),)
+        ):
+            stats.entries += entries
+            stats.bytes += size
+            stats.expired += expired or 0
+            if group is not None:
+                stats.groups[group] = GroupStats(
+                    entries=entries, bytes=size, expired=expired or 0
+                )
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,159 @@
+import math
+import threading
+from datetime import datetime
+from typing import Callable, Iterable
+
+from cacheia_schemas import (
+    CacheClient,
+    CachedValue,
+    CacheManyResult,
+    CacheStats,
+    DeletedResult,
+)
+
+from .entry import Entry
+from .memory import MemoryCacheClient, MemoryCacheClientSettings
+from .utils import merge_stats
+
+
+class StripedMemoryCacheClientSettings(MemoryCacheClientSettings):
+    CACHE_SEGMENTS: int = 16
+
+
+class StripedMemoryCacheClient(CacheClient):
+    """
+    Thread safe memory cache split into independently locked segments.
+
+    Each key belongs to one segment chosen by its hash, so concurrent
+    operations on different segments never wait on each other. Bounds are
+    split evenly between segments. Segments always live in this process,
+    'CACHE_USE_MULTIPROCESSING' is ignored.
+    """
+
+    def __init__(self, settings: StripedMemoryCacheClientSettings) -> None:
+        count = settings.CACHE_SEGMENTS
+        segment_settings = MemoryCacheClientSettings(
+            CACHE_USE_MULTIPROCESSING=False,
+            CACHE_MAX_ENTRIES=self._split(settings.CACHE_MAX_ENTRIES, count),
+            CACHE_MAX_BYTES=self._split(settings.CACHE_MAX_BYTES, count),
+            CACHE_EVICTION_POLICY=settings.CACHE_EVICTION_POLICY,
+            CACHE_EXPIRATION_BUDGET=settings.CACHE_EXPIRATION_BUDGET,
+        )
+        self._segments = [MemoryCacheClient(segment_settings) for _ in range(count)]
+        self._locks = [threading.Lock() for _ in range(count)]
+
+    @staticmethod
+    def _split(bound: int | None, count: int) -> int | None:
+        if bound is None:
+            return None
+        return math.ceil(bound / count)
+
+    def _segment(self, key: str) -> tuple[MemoryCacheClient, threading.Lock]:
+        index = hash(key) % len(self._segments)
+        return self._segments[index], self._locks[index]
+
+    def _by_segment(self, items: Iterable, key: Callable) -> dict[int, list]:
+        batches: dict[int, list] = {}
+        count = len(self._segments)
+        for item in items:
+            batches.setdefault(hash(key(item)) % count, []).append(item)
+        return batches
+
+    @property
+    def evictions(self) -> int:
+        return sum(segment.evictions for segment in self._segments)
+
+    def cache(self, instance: CachedValue) -> None:
+        segment, lock = self._segment(instance.key)
+        with lock:
+            segment.cache(instance)
+
+    def load(self, entry: Entry) -> bool:
+        segment, lock = self._segment(entry.key)
+        with lock:
+            return segment.load(entry)
+
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> Iterable[CachedValue]:
+        for segment, lock in zip(self._segments, self._locks):
+            with lock:
+                values = list(
+                    segment.get(
+                        group=group,
+                        expires_range=expires_range,
+                        creation_range=creation_range,
+                    )
+                )
+            yield from values
+
+    def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        segment, lock = self._segment(key)
+        with lock:
+            return segment.get_key(key, allow_expired=allow_expired)
+
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        result = CacheManyResult()
+        for index, batch in self._by_segment(instances, lambda i: i.key).items():
+            with self._locks[index]:
+                r = self._segments[index].cache_many(batch)
+            result.created.extend(r.created)
+            result.existing.extend(r.existing)
+        return result
+
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        values = {}
+        for index, batch in self._by_segment(keys, lambda k: k).items():
+            with self._locks[index]:
+                values.update(
+                    self._segments[index].get_many(batch, allow_expired=allow_expired)
+                )
+        return values
+
+    def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        count = 0
+        for segment, lock in zip(self._segments, self._locks):
+            with lock:
+                r = segment.flush(
+                    group=group,
+                    expires_range=expires_range,
+                    creation_range=creation_range,
+                )
+            count += r.deleted_count
+
+        return DeletedResult(deleted_count=count)
+
+    def flush_key(self, key: str) -> DeletedResult:
+        segment, lock = self._segment(key)
+        with lock:
+            return segment.flush_key(key)
+
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        count = 0
+        for index, batch in self._by_segment(keys, lambda k: k).items():
+            with self._locks[index]:
+                count += self._segments[index].flush_many(batch).deleted_count
+        return DeletedResult(deleted_count=count)
+
+    def clear(self) -> None:
+        for segment, lock in zip(self._segments, self._locks):
+            with lock:
+                segment.clear()
+
+    def stats(self) -> CacheStats:
+        stats = []
+        for segment, lock in zip(self._segments, self._locks):
+            with lock:
+                stats.append(segment.stats())
+
+        return merge_stats(stats)
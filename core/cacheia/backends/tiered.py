@@ -0,0 +1,267 @@
+import atexit
+import threading
+from datetime import datetime
+from typing import Any, Iterable, Literal, Sequence
+
+from cacheia_schemas import (
+    CacheClient,
+    CacheClientSettings,
+    CachedValue,
+    CacheManyResult,
+    CacheStats,
+    DeletedResult,
+)
+
+from .utils import ts_now
+from .write_behind import WriteBehindQueue
+
+TierPolicy = Literal["read-through", "write-through", "write-behind"]
+
+
+class TieredCacheClientSettings(CacheClientSettings):
+    # Settings of each tier, fastest first. Dicts are resolved like the ones
+    # given to 'Cacheia.setup'.
+    CACHE_TIERS: list[dict[str, Any] | CacheClientSettings] = []
+    CACHE_TIER_POLICY: TierPolicy = "write-through"
+    # Values kept by the upper tiers expire after at most this many seconds
+    CACHE_TIER_TTL: float | None = None
+    CACHE_TIER_BATCH_SIZE: int = 1_000
+    CACHE_TIER_INTERVAL: float = 0.05
+    CACHE_TIER_MAX_PENDING: int = 100_000
+
+
+class TieredCacheClient(CacheClient):
+    """
+    Stack of caches, fastest first, where the last tier holds every value.
+
+    Values found in a lower tier are promoted, e.g. copied into the tiers
+    above it. Writes follow the policy:
+
+    - 'read-through': values are only written to the last tier, the upper
+      tiers are filled by reads.
+    - 'write-through': values are written to every tier, last tier first.
+    - 'write-behind': values are written to the first tier and demoted to the
+      lower ones by a worker thread. Writers block once 'CACHE_TIER_MAX_PENDING'
+      values are waiting. A value whose key a lower tier already holds is
+      dropped from the upper tiers and counted in 'write_conflicts'.
+
+    Queries and flushes by filters are answered by the last tier.
+    """
+
+    def __init__(
+        self, settings: TieredCacheClientSettings, tiers: Sequence[CacheClient]
+    ) -> None:
+        if len(tiers) < 2:
+            raise ValueError("A tiered cache needs at least two tiers")
+
+        self._tiers = list(tiers)
+        self._upper = self._tiers[:-1]
+        self._last = self._tiers[-1]
+        self._policy = settings.CACHE_TIER_POLICY
+        self._ttl = settings.CACHE_TIER_TTL
+        self._counters = {
+            f"tier{i}_{name}": 0
+            for i in range(len(self._tiers))
+            for name in ("hits", "misses", "promotions", "demotions")
+        }
+        self._counters["write_conflicts"] = 0
+        self._lock = threading.Lock()
+
+        self._pending: WriteBehindQueue | None = None
+        if self._policy == "write-behind":
+            self._pending = WriteBehindQueue(
+                self._demote,
+                batch_size=settings.CACHE_TIER_BATCH_SIZE,
+                interval=settings.CACHE_TIER_INTERVAL,
+                max_pending=settings.CACHE_TIER_MAX_PENDING,
+                name="cacheia-tiers",
+            )
+            atexit.register(self.close)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def _capped(self, instance: CachedValue) -> CachedValue:
+        """
+        The value as kept by the upper tiers, expiring within the tier TTL.
+        """
+
+        if self._ttl is None:
+            return instance
+
+        expires_at = ts_now() + self._ttl
+        if instance.expires_at is not None and instance.expires_at <= expires_at:
+            return instance
+        return instance.model_copy(update={"expires_at": expires_at})
+
+    def _promote(self, values: list[CachedValue], found_in: int) -> None:
+        if not values:
+            return
+
+        capped = [self._capped(v) for v in values]
+        for i in range(found_in):
+            created = self._tiers[i].cache_many(capped).created
+            self._count(f"tier{i}_promotions", len(created))
+
+    def _demote(self, values: list[CachedValue]) -> None:
+        conflicts: set[str] = set()
+        for i in range(1, len(self._tiers)):
+            result = self._tiers[i].cache_many(values)
+            self._count(f"tier{i}_demotions", len(result.created))
+            if i == len(self._tiers) - 1:
+                conflicts.update(result.existing)
+
+        if conflicts:
+            # the stored value wins, the next read promotes it
+            self._count("write_conflicts", len(conflicts))
+            for tier in self._tiers[:-1]:
+                tier.flush_many(conflicts)
+
+    def _sync(self) -> None:
+        # pending values must reach the last tier before it answers queries
+        if self._pending is not None:
+            self._pending.drain()
+
+    def cache(self, instance: CachedValue) -> None:
+        if self._pending is not None:
+            self._tiers[0].cache(self._capped(instance))
+            self._pending.put(instance)
+            return
+
+        self._last.cache(instance)
+        if self._policy == "write-through":
+            capped = self._capped(instance)
+            for tier in self._upper:
+                # a stale copy may be left by a value flushed from the last tier
+                tier.flush_key(instance.key)
+                tier.cache(capped)
+
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        instances = list(instances)
+        if self._pending is not None:
+            capped = [self._capped(instance) for instance in instances]
+            result = self._tiers[0].cache_many(capped)
+            created = set(result.created)
+            for instance in instances:
+                if instance.key in created:
+                    self._pending.put(instance)
+            return result
+
+        result = self._last.cache_many(instances)
+        if self._policy == "write-through" and result.created:
+            created = set(result.created)
+            capped = [self._capped(v) for v in instances if v.key in created]
+            for tier in self._upper:
+                tier.flush_many(created)
+                tier.cache_many(capped)
+        return result
+
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> Iterable[CachedValue]:
+        self._sync()
+        return self._last.get(group, expires_range, creation_range)
+
+    def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        for i, tier in enumerate(self._tiers):
+            try:
+                value = tier.get_key(key, allow_expired=allow_expired)
+            except KeyError:
+                self._count(f"tier{i}_misses")
+                continue
+
+            self._count(f"tier{i}_hits")
+            self._promote([value], i)
+            return value
+
+        raise KeyError(key)
+
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        keys = list(keys)
+        found: dict[str, CachedValue] = {}
+        missing = keys
+        for i, tier in enumerate(self._tiers):
+            values = tier.get_many(missing, allow_expired=allow_expired)
+            self._count(f"tier{i}_hits", len(values))
+            self._count(f"tier{i}_misses", len(missing) - len(values))
+            self._promote(list(values.values()), i)
+            found.update(values)
+            missing = [key for key in missing if key not in values]
+            if not missing:
+                break
+        return {key: found[key] for key in keys if key in found}
+
+    def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        self._sync()
+        r = self._last.flush(group, expires_range, creation_range)
+        if self._ttl is not None:
+            # upper tiers may have shortened the expiration of their copies,
+            # which then must be flushed regardless of 'expires_range'
+            expires_range = None
+        for tier in self._upper:
+            tier.flush(group, expires_range, creation_range)
+        return r
+
+    def flush_key(self, key: str) -> DeletedResult:
+        self._sync()
+        for tier in self._upper:
+            tier.flush_key(key)
+        return self._last.flush_key(key)
+
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        self._sync()
+        keys = list(keys)
+        for tier in self._upper:
+            tier.flush_many(keys)
+        return self._last.flush_many(keys)
+
+    def clear(self) -> None:
+        self._sync()
+        for tier in self._tiers:
+            tier.clear()
+
+    def ready(self) -> bool:
+        return all(tier.ready() for tier in self._tiers)
+
+    def stats(self) -> CacheStats:
+        """
+        Statistics of the first tier with the hit, miss, promotion and
+        demotion counters of every tier.
+        """
+
+        try:
+            stats = self._tiers[0].stats()
+        except NotImplementedError:
+            stats = CacheStats()
+
+        with self._lock:
+            stats.counters.update(self._counters)
+        if self._pending is not None:
+            stats.counters["write_behind_pending"] = self._pending.pending
+        return stats
+
+    def close(self) -> None:
+        """
+        Demote pending values and close the tiers.
+        """
+
+        if self._pending is not None:
+            if self._pending.closed:
+                return
+            self._pending.close()
+
+        for tier in self._tiers:
+            close = getattr(tier, "close", None)
+            if close is not None:
+                close()
@@ -1,5 +1,76 @@
+import pickle
+import sys
 from datetime import datetime
+from typing import Iterable
+
+from cacheia_schemas import CachedValue, CacheStats, GroupStats
+from pymongo.errors import BulkWriteError
+
+from .entry import Entry
+
+DUPLICATE_KEY = 11000
 
 
 def ts_now() -> float:
     return datetime.now().timestamp()
+
+
+def estimate_size(instance: CachedValue | Entry) -> int:
+    """
+    Estimate how many bytes a cached value occupies using its pickled length.
+
+    Values that can not be pickled fall back to their shallow size.
+    """
+
+    try:
+        size = len(pickle.dumps(instance.value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        size = sys.getsizeof(instance.value)
+
+    return size + len(instance.key) + len(instance.group or "")
+
+
+def count_value(stats: CacheStats, group: str | None, size: int, expired: bool) -> None:
+    """
+    Add one stored value to the totals of 'stats' and of its group.
+    """
+
+    stats.entries += 1
+    stats.bytes += size
+    stats.expired += expired
+    if group is not None:
+        g = stats.groups.setdefault(group, GroupStats())
+        g.entries += 1
+        g.bytes += size
+        g.expired += expired
+
+
+def merge_stats(stats: Iterable[CacheStats]) -> CacheStats:
+    merged = CacheStats()
+    for s in stats:
+        merged.entries += s.entries
+        merged.bytes += s.bytes
+        merged.expired += s.expired
+        for group, g in s.groups.items():
+            m = merged.groups.setdefault(group, GroupStats())
+            m.entries += g.entries
+            m.bytes += g.bytes
+            m.expired += g.expired
+        for name, value in s.counters.items():
+            merged.counters[name] = merged.counters.get(name, 0) + value
+
+    return merged
+
+
+def duplicate_indexes(error: BulkWriteError) -> set[int]:
+    """
+    Positions of the operations of an unordered bulk write that failed
+    because their key already exists.
+
+    :raises BulkWriteError: if any operation failed for another reason
+    """
+
+    errors = error.details.get("writeErrors", [])
+    if any(e["code"] != DUPLICATE_KEY for e in errors):
+        raise error
+    return {e["index"] for e in errors}
@@ -0,0 +1,126 @@
+import logging
+import threading
+from typing import Any, Callable, Mapping
+
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# The resume token is older than the oplog, changes were missed.
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+class ChangeStreamWatcher:
+    """
+    Follow the changes of a collection in a background thread.
+
+    Inserted, replaced and updated documents are passed to 'on_upsert',
+    deleted keys to 'on_delete'. When changes may have been missed (the
+    collection was dropped or the stream could not be resumed) 'on_resync' is
+    called so the caller can reload everything.
+
+    The stream is opened in the constructor, changes made after it returns are
+    never missed. Change streams need a replica set or a sharded cluster.
+    """
+
+    def __init__(
+        self,
+        coll: Collection,
+        on_upsert: Callable[[Mapping[str, Any], bool], None],
+        on_delete: Callable[[str], None],
+        on_resync: Callable[[], None],
+        retry_interval: float = 1.0,
+    ) -> None:
+        self._coll = coll
+        self._on_upsert = on_upsert
+        self._on_delete = on_delete
+        self._on_resync = on_resync
+        self._retry_interval = retry_interval
+        self._token: Mapping[str, Any] | None = None
+        self._needs_resync = False
+        self._stream = self._open()
+        self._closed = threading.Event()
+        self._worker = threading.Thread(
+            target=self._run, name="cacheia-change-stream", daemon=True
+        )
+        self._worker.start()
+
+    def _open(self):
+        return self._coll.watch(
+            full_document="updateLookup",
+            resume_after=self._token,
+            max_await_time_ms=500,
+        )
+
+    def close(self) -> None:
+        self._closed.set()
+        self._worker.join()
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            try:
+                if self._stream is None:
+                    self._stream = self._open()
+                if self._needs_resync:
+                    # the new stream is open, nothing is missed while reloading
+                    self._needs_resync = False
+                    self._resync()
+
+                change = self._stream.try_next()
+                self._token = self._stream.resume_token
+                if change is not None:
+                    self._apply(change)
+            except OperationFailure as e:
+                self._reset()
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    self._start_over()
+                else:
+                    self._retry(e)
+            except PyMongoError as e:
+                self._reset()
+                self._retry(e)
+            except Exception as e:
+                # a change that can not be applied is skipped
+                self._retry(e)
+
+        self._reset()
+
+    def _apply(self, change: Mapping[str, Any]) -> None:
+        match change["operationType"]:
+            case "insert" | "replace" | "update":
+                doc = change.get("fullDocument")
+                if doc is None:
+                    # deleted before the update could be looked up
+                    self._on_delete(change["documentKey"]["_id"])
+                else:
+                    self._on_upsert(doc, change["operationType"] != "insert")
+            case "delete":
+                self._on_delete(change["documentKey"]["_id"])
+            case "drop" | "rename" | "dropDatabase" | "invalidate":
+                # the stream is closed after these
+                self._reset()
+                self._start_over()
+
+    def _start_over(self) -> None:
+        self._token = None
+        self._needs_resync = True
+
+    def _resync(self) -> None:
+        try:
+            self._on_resync()
+        except Exception as e:
+            self._needs_resync = True
+            self._retry(e)
+
+    def _reset(self) -> None:
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except PyMongoError:
+                pass
+            self._stream = None
+
+    def _retry(self, error: Exception) -> None:
+        logger.error("Change stream failed", exc_info=error)
+        self._closed.wait(self._retry_interval)
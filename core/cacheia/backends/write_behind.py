@@ -0,0 +1,178 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+from pymongo import InsertOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from .utils import duplicate_indexes
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    Buffer of items passed to 'write' in batches by a worker thread.
+
+    'put' blocks while 'max_pending' items are waiting, so a slow or
+    unavailable store slows writers down instead of growing the buffer
+    without bounds. Errors raised by 'write' are logged and the batch is
+    dropped, 'write' handles its own retries.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[list[Any]], None],
+        batch_size: int,
+        interval: float,
+        max_pending: int,
+        name: str = "cacheia-write-behind",
+    ) -> None:
+        self._write = write
+        self._batch_size = batch_size
+        self._interval = interval
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_pending)
+        # Items are numbered in queue order, so a drain waits for the ones
+        # queued before it without waiting for the queue to be empty.
+        self._put_lock = threading.Lock()
+        self._queued = 0
+        self._done = 0
+        self._progress = threading.Condition()
+        self._closing = False
+        self._closed = threading.Event()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def closed(self) -> bool:
+        return self._closing
+
+    def put(self, item: Any) -> None:
+        with self._put_lock:
+            if self._closing:
+                raise RuntimeError("write behind queue is closed")
+            self._queue.put(item)
+            self._queued += 1
+
+    def drain(self) -> None:
+        """
+        Block until every item queued so far has been written, items queued
+        meanwhile are not waited for.
+        """
+
+        target = self._queued
+        with self._progress:
+            self._progress.wait_for(lambda: self._done >= target)
+
+    def close(self) -> None:
+        """
+        Write the pending items and stop the worker.
+        """
+
+        with self._put_lock:
+            if self._closing:
+                return
+            self._closing = True
+        self.drain()
+        self._closed.set()
+        self._worker.join()
+
+    def _next_batch(self) -> list[Any]:
+        try:
+            batch = [self._queue.get(timeout=self._interval)]
+        except queue.Empty:
+            return []
+
+        # wait up to 'interval' for the batch to fill, unless it is full already
+        deadline = time.monotonic() + self._interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            try:
+                self._write(batch)
+            except Exception:
+                # the worker must survive, or writers would block forever
+                logger.exception("Write behind failed")
+            finally:
+                with self._progress:
+                    self._done += len(batch)
+                    self._progress.notify_all()
+
+
+class MongoBatchWriter:
+    """
+    Inserts batches of documents into Mongo, retrying failed batches.
+
+    Documents rejected because their key already exists are passed to
+    'on_conflict' and remembered in 'conflicts'.
+    """
+
+    RETRIES = 3
+
+    def __init__(
+        self,
+        coll: Collection,
+        interval: float,
+        on_conflict: Callable[[list[str]], None] | None = None,
+    ) -> None:
+        self._coll = coll
+        self._interval = interval
+        self._on_conflict = on_conflict
+        self.conflicts: deque[str] = deque(maxlen=1000)
+        self.conflict_count = 0
+        self.failure_count = 0
+
+    def write(self, batch: list[dict]) -> None:
+        for attempt in range(1, self.RETRIES + 1):
+            try:
+                self._coll.bulk_write([InsertOne(doc) for doc in batch], ordered=False)
+                return
+            except BulkWriteError as e:
+                try:
+                    indexes = duplicate_indexes(e)
+                except BulkWriteError:
+                    error: PyMongoError = e
+                else:
+                    # a retried batch is written whole again, its duplicates
+                    # may be documents written by the failed attempt
+                    if attempt == 1:
+                        self._conflict([batch[i]["_id"] for i in sorted(indexes)])
+                    return
+            except PyMongoError as e:
+                error = e
+
+            if attempt == self.RETRIES:
+                self.failure_count += len(batch)
+                logger.error(
+                    "Dropped %d write behind documents", len(batch), exc_info=error
+                )
+                return
+            time.sleep(self._interval * attempt)
+
+    def _conflict(self, keys: list[str]) -> None:
+        self.conflicts.extend(keys)
+        self.conflict_count += len(keys)
+        if self._on_conflict is not None:
+            self._on_conflict(keys)
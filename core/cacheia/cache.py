@@ -1,33 +1,85 @@
 from typing import Callable
 
-from cacheia_schemas import CacheClient, CacheClientSettings, InvalidSettings
-from pydantic import BaseModel
+from cacheia_schemas import (
+    AsyncCacheClient,
+    CacheClient,
+    CacheClientSettings,
+    InvalidSettings,
+)
 
 from .backends import (
+    AsyncMongoCacheClient,
+    AsyncMongoCacheClientSettings,
+    FileCacheClient,
+    FileCacheClientSettings,
     MemoryCacheClient,
     MemoryCacheClientSettings,
     MongoCacheClient,
     MongoCacheClientSettings,
+    RedisCacheClient,
+    RedisCacheClientSettings,
+    S3CacheClient,
+    S3CacheClientSettings,
+    ShardedCacheClient,
+    ShardedCacheClientSettings,
+    SharedMemoryCacheClient,
+    SharedMemoryCacheClientSettings,
+    SQLiteCacheClient,
+    SQLiteCacheClientSettings,
+    StripedMemoryCacheClient,
+    StripedMemoryCacheClientSettings,
+    TieredCacheClient,
+    TieredCacheClientSettings,
 )
 
-CacheType = MemoryCacheClient | MongoCacheClient
-SettingsType = MemoryCacheClientSettings | MongoCacheClientSettings
+CacheType = (
+    MemoryCacheClient
+    | MongoCacheClient
+    | SharedMemoryCacheClient
+    | StripedMemoryCacheClient
+    | AsyncMongoCacheClient
+    | RedisCacheClient
+    | S3CacheClient
+    | SQLiteCacheClient
+    | TieredCacheClient
+    | ShardedCacheClient
+    | FileCacheClient
+)
+SettingsType = (
+    MemoryCacheClientSettings
+    | MongoCacheClientSettings
+    | SharedMemoryCacheClientSettings
+    | StripedMemoryCacheClientSettings
+    | AsyncMongoCacheClientSettings
+    | RedisCacheClientSettings
+    | S3CacheClientSettings
+    | SQLiteCacheClientSettings
+    | TieredCacheClientSettings
+    | ShardedCacheClientSettings
+    | FileCacheClientSettings
+)
 MappingKey = type[CacheClientSettings]
-
-
-class AnySettings(BaseModel):
-    settings: SettingsType
+AnyClient = CacheClient | AsyncCacheClient
 
 
 class Cacheia:
     _cache: CacheType | None = None
-    _client_mapping: dict[MappingKey, Callable[[MappingKey], CacheClient]] = {
+    _client_mapping: dict[MappingKey, Callable[[MappingKey], AnyClient]] = {
         MemoryCacheClientSettings: lambda sets: MemoryCacheClient(sets),  # type: ignore
         MongoCacheClientSettings: lambda sets: MongoCacheClient(sets),  # type: ignore
+        SharedMemoryCacheClientSettings: lambda sets: SharedMemoryCacheClient(sets),  # type: ignore
+        StripedMemoryCacheClientSettings: lambda sets: StripedMemoryCacheClient(sets),  # type: ignore
+        AsyncMongoCacheClientSettings: lambda sets: AsyncMongoCacheClient(sets),  # type: ignore
+        RedisCacheClientSettings: lambda sets: RedisCacheClient(sets),  # type: ignore
+        S3CacheClientSettings: lambda sets: S3CacheClient(sets),  # type: ignore
+        SQLiteCacheClientSettings: lambda sets: SQLiteCacheClient(sets),  # type: ignore
+        TieredCacheClientSettings: lambda sets: Cacheia._build_tiered(sets),  # type: ignore
+        ShardedCacheClientSettings: lambda sets: Cacheia._build_sharded(sets),  # type: ignore
+        FileCacheClientSettings: lambda sets: FileCacheClient(sets),  # type: ignore
     }
 
     @classmethod
-    def extend(cls, settings: CacheClientSettings, client: type[CacheClient]):
+    def extend(cls, settings: CacheClientSettings, client: type[AnyClient]):
         cls._client_mapping[type(settings)] = lambda sets: client(sets)  # type: ignore
 
     @classmethod
@@ -38,17 +90,45 @@ class Cacheia:
         if settings is None:
             settings = {}
 
+        cls._cache = cls.build(settings)  # type: ignore
+
+    @classmethod
+    def build(cls, settings: CacheClientSettings | dict) -> AnyClient:
+        """
+        Create the client for the given settings without setting it up, e.g.
+        to compose it into another client.
+        """
+
         if isinstance(settings, dict):
-            any_sets = AnySettings(settings=settings)  # type: ignore
-            settings = any_sets.settings
+            settings = cls._settings_from_dict(settings)
 
         if type(settings) not in cls._client_mapping:
             raise InvalidSettings(str(type(settings)))
 
-        cls._cache = cls._client_mapping[type(settings)](settings)  # type: ignore
+        return cls._client_mapping[type(settings)](settings)  # type: ignore
+
+    @classmethod
+    def _build_tiered(cls, settings: TieredCacheClientSettings) -> TieredCacheClient:
+        tiers = [cls.build(tier) for tier in settings.CACHE_TIERS]
+        return TieredCacheClient(settings, tiers)  # type: ignore
+
+    @classmethod
+    def _build_sharded(cls, settings: ShardedCacheClientSettings) -> ShardedCacheClient:
+        shards = [cls.build(shard) for shard in settings.CACHE_SHARDS]
+        return ShardedCacheClient(settings, shards)  # type: ignore
+
+    @classmethod
+    def _settings_from_dict(cls, data: dict) -> CacheClientSettings:
+        # The settings type sharing most fields with 'data' wins, ties (such as
+        # an empty dict) go to the first registered type.
+        settings_type = max(
+            cls._client_mapping,
+            key=lambda t: len(data.keys() & t.model_fields.keys()),
+        )
+        return settings_type(**data)
 
     @classmethod
-    def get(cls) -> CacheClient:
+    def get(cls) -> AnyClient:
         if cls._cache is None:
             m = "Cacheia is not setup yet. Please call `Cacheia.setup` before using `Cacheia.get`"
             raise RuntimeError(m)
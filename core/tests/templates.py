@@ -1,5 +1,7 @@
 import pytest
-from cacheia.utils import ts_now
+from cacheia_schemas import CacheClient, CachedValue, KeyAlreadyExists
+
+from cacheia.backends.utils import ts_now
 
 from .conftest import Backends
 from .utils import create, flush_all, flush_key, flush_some, get, get_all
@@ -108,3 +110,49 @@ def flush_key_test_template(backend: Backends, use_multi_proc: bool = False):
     r = flush_key(backend, "test1", use_multi_proc=use_multi_proc)
     assert isinstance(r, int), r
     assert r == 1, f"Expected 1, got {r}"
+
+
+def cache_and_get_key_test_template(client: CacheClient, allow_expired: bool = True):
+    client.cache(CachedValue(key="a", value={"x": [1, 2]}, group="g"))
+    value = client.get_key("a")
+    assert value.value == {"x": [1, 2]}
+    assert value.group == "g"
+
+    with pytest.raises(KeyAlreadyExists):
+        client.cache(CachedValue(key="a", value=2))
+
+    client.cache(CachedValue(key="old", value=1, expires_at=ts_now() - 10))
+    if allow_expired:
+        assert client.get_key("old", allow_expired=True).value == 1
+    with pytest.raises(KeyError):
+        client.get_key("old")
+    assert [v.key for v in client.get()] == ["a"]
+
+
+def many_test_template(client: CacheClient):
+    client.cache(CachedValue(key="k0", value=0))
+    result = client.cache_many(CachedValue(key=f"k{i}", value=i) for i in range(5))
+    assert result.existing == ["k0"]
+    assert result.created == ["k1", "k2", "k3", "k4"]
+
+    values = client.get_many(["k4", "missing", "k1"])
+    assert list(values) == ["k4", "k1"]
+    assert values["k4"].value == 4
+
+    assert client.flush_many(["k1", "k2", "missing"]).deleted_count == 2
+    assert sorted(v.key for v in client.get()) == ["k0", "k3", "k4"]
+
+
+def flush_group_test_template(client: CacheClient):
+    client.cache_many(
+        CachedValue(key=f"{group}{i}", value=i, group=group)
+        for group in ("a", "b")
+        for i in range(3)
+    )
+    # moved to another group, it must not be flushed with its old group
+    client.flush_key("a0")
+    client.cache(CachedValue(key="a0", value=0, group="b"))
+
+    assert client.flush(group="a").deleted_count == 2
+    assert list(client.get(group="a")) == []
+    assert sorted(v.key for v in client.get(group="b")) == ["a0", "b0", "b1", "b2"]
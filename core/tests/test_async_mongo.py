@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from cacheia_schemas import CachedValue, KeyAlreadyExists
+
+from cacheia.backends import AsyncMongoCacheClient, AsyncMongoCacheClientSettings
+from cacheia.backends.utils import ts_now
+
+
+async def _operations():
+    client = AsyncMongoCacheClient(
+        AsyncMongoCacheClientSettings(CACHE_DB_URI="mongodb://localhost:27017/test")
+    )
+    try:
+        await client.clear()
+        await client.cache(CachedValue(key="a", value=1, group="g"))
+        await client.cache(CachedValue(key="b", value=2))
+        await client.cache(CachedValue(key="c", value=3, expires_at=ts_now() - 1))
+        with pytest.raises(KeyAlreadyExists):
+            await client.cache(CachedValue(key="a", value=1))
+
+        assert (await client.get_key("a")).value == 1
+        with pytest.raises(KeyError):
+            await client.get_key("c")
+        assert [v.key async for v in client.get(group="g")] == ["a"]
+        stats = await client.stats()
+        assert stats.entries == 2
+        assert stats.groups["g"].entries == 1
+
+        assert (await client.flush_key("b")).deleted_count == 1
+        assert (await client.flush(group="g")).deleted_count == 1
+        assert [v async for v in client.get()] == []
+    finally:
+        await client.close()
+
+
+def test_operations():
+    asyncio.run(_operations())
+
+
+async def _indexes_on_first_read() -> dict:
+    client = AsyncMongoCacheClient(
+        AsyncMongoCacheClientSettings(
+            CACHE_DB_URI="mongodb://localhost:27017/test", CACHE_COLLECTION="fresh"
+        )
+    )
+    try:
+        await client._coll.drop()
+        with pytest.raises(KeyError):
+            await client.get_key("a")
+        return await client._coll.index_information()
+    finally:
+        await client._coll.drop()
+        await client.close()
+
+
+def test_indexes_on_first_read():
+    indexes = asyncio.run(_indexes_on_first_read())
+    assert any(index.get("expireAfterSeconds") == 0 for index in indexes.values())
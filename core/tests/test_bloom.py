@@ -0,0 +1,15 @@
+from cacheia.backends.bloom import BloomFilter
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"key{i}")
+
+    assert all(f"key{i}" in bloom for i in range(10_000))
+    false_positives = sum(f"other{i}" in bloom for i in range(10_000))
+    assert false_positives / 10_000 < 0.02
+    assert len(bloom) == 10_000
+    assert 0.005 < bloom.error_rate < 0.015
+    # about 9.6 bits per key for a 1% error rate
+    assert bloom.nbytes < 10_000 * 10 / 8
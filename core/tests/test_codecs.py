@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cacheia_schemas import CacheClientSettings, CachedValue
+
+from cacheia.backends.codecs import ValueCodec, codec_from_settings
+from cacheia.backends.mongo import from_document, to_document, to_entry
+
+VALUE = {"html": "<p>cacheia</p>" * 200, "scores": [0.5, 1.5], "n": 3}
+
+
+@pytest.mark.parametrize("codec", ["pickle", "msgpack", "orjson"])
+@pytest.mark.parametrize("compression", [None, "zlib", "zstd", "lz4"])
+def test_round_trip(codec: str, compression: str | None):
+    pytest.importorskip({"msgpack": "msgpack", "orjson": "orjson"}.get(codec, "pickle"))
+    if compression is not None:
+        pytest.importorskip(
+            {"zstd": "zstandard", "lz4": "lz4"}.get(compression, "zlib")
+        )
+
+    payload, tag = ValueCodec(codec, compression, threshold=1024).encode(VALUE)
+    assert isinstance(payload, bytes)
+    assert tag == (codec if compression is None else f"{codec}+{compression}")
+    assert ValueCodec(codec).decode(payload, tag) == VALUE
+
+
+def test_threshold():
+    codec = ValueCodec("pickle", "zlib", threshold=1024)
+    assert codec.encode("small")[1] == "pickle"
+    assert codec.encode("large" * 1024)[1] == "pickle+zlib"
+
+
+def test_other_codecs_rejected():
+    payload, tag = ValueCodec("pickle").encode(VALUE)
+    # other compression settings stay readable, other codecs do not
+    assert ValueCodec("pickle", "zlib").decode(payload, tag) == VALUE
+    with pytest.raises(ValueError):
+        ValueCodec("pickle").decode(payload, "orjson")
+    with pytest.raises(ValueError):
+        from_document({"_id": "a", "value": payload, "codec": tag})
+
+
+def test_zstd_threads():
+    pytest.importorskip("zstandard")
+    codec = ValueCodec("pickle", "zstd")
+    values = [{"n": i, "text": str(i) * 1000} for i in range(8)]
+
+    def round_trip(value: dict) -> bool:
+        return all(codec.decode(*codec.encode(value)) == value for _ in range(50))
+
+    with ThreadPoolExecutor(8) as pool:
+        assert all(pool.map(round_trip, values))
+
+
+def test_documents():
+    instance = CachedValue(key="a", value=VALUE, group="g")
+    codec = codec_from_settings(CacheClientSettings(CACHE_COMPRESSION="zlib"))
+
+    doc = to_document(instance, codec)
+    assert doc["codec"] == "pickle+zlib"
+    assert to_entry(doc, codec).value == VALUE
+    assert from_document(doc, codec) == instance
+    # documents written without a codec are read as they are
+    assert from_document(to_document(instance)) == instance
+    assert codec_from_settings(CacheClientSettings()) is None
@@ -0,0 +1,125 @@
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from cacheia_schemas import CachedValue
+
+from cacheia.backends import FileCacheClient, FileCacheClientSettings
+from cacheia.backends.utils import ts_now
+
+from .templates import (
+    cache_and_get_key_test_template,
+    flush_group_test_template,
+    many_test_template,
+)
+
+
+@pytest.fixture
+def settings(tmp_path) -> FileCacheClientSettings:
+    return FileCacheClientSettings(
+        CACHE_FS_PATH=str(tmp_path / "cache"), CACHE_FS_MMAP_THRESHOLD=1024
+    )
+
+
+@pytest.fixture
+def client(settings: FileCacheClientSettings):
+    client = FileCacheClient(settings)
+    yield client
+    client.close()
+
+
+def test_cache_and_get_key(client: FileCacheClient):
+    cache_and_get_key_test_template(client)
+
+
+def test_many(client: FileCacheClient):
+    many_test_template(client)
+
+
+def test_flush_group(client: FileCacheClient):
+    flush_group_test_template(client)
+
+
+def test_binary_values(client: FileCacheClient):
+    large = bytes(range(256)) * 16
+    client.cache(CachedValue(key="small", value=b"abc"))
+    client.cache(CachedValue(key="large", value=large))
+
+    assert client.get_key("small").value == b"abc"
+    # only raw bytes are served from their file
+    client.cache(CachedValue(key="encoded", value={"x": [1, 2]}))
+    assert client.file_path("encoded") is None
+    view = client.get_key("large").value
+    assert isinstance(view, memoryview)
+    assert view == large
+    assert client.file_path("large").read_bytes() == large
+
+    # a value still in use survives its removal
+    client.flush_key("large")
+    assert view[:3] == large[:3]
+    with pytest.raises(KeyError):
+        client.file_path("large")
+
+
+def test_flush_while_caching(client: FileCacheClient, monkeypatch):
+    path = client._path
+    removing = threading.Event()
+    cached = threading.Event()
+
+    def slow_path(key: str) -> Path:
+        # the flush stalls right before removing the file
+        if threading.current_thread().name == "flush":
+            removing.set()
+            cached.wait(0.2)
+        return path(key)
+
+    def cache() -> None:
+        client.cache(CachedValue(key="k", value=2))
+        cached.set()
+
+    client.cache(CachedValue(key="k", value=1))
+    monkeypatch.setattr(client, "_path", slow_path)
+    flush = threading.Thread(target=client.flush_key, args=("k",), name="flush")
+    flush.start()
+    removing.wait()
+    writer = threading.Thread(target=cache)
+    writer.start()
+    flush.join()
+    writer.join()
+
+    # the file of the value cached during the flush is not removed
+    assert client.get_key("k").value == 2
+
+
+def test_filters(client: FileCacheClient):
+    now = datetime.now()
+    soon = ts_now() + 60
+    client.cache(CachedValue(key="old", value=1, created_at=now - timedelta(days=1)))
+    client.cache(
+        CachedValue(key="new", value=2, group="g", created_at=now, expires_at=soon)
+    )
+
+    created = client.get(creation_range=(now - timedelta(hours=1), now))
+    assert [v.key for v in created] == ["new"]
+    assert client.stats().groups["g"].entries == 1
+    assert client.flush(group="g").deleted_count == 1
+    assert client.flush().deleted_count == 1
+
+
+def test_index_is_persisted(settings: FileCacheClientSettings):
+    client = FileCacheClient(settings)
+    for i in range(3_000):
+        client.cache(CachedValue(key=str(i), value=i, group=str(i % 3)))
+    client.flush(group="0")
+    client.close()
+
+    client = FileCacheClient(settings)
+    assert client.stats().entries == 2_000
+    assert client.get_key("1").value == 1
+    with pytest.raises(KeyError):
+        client.get_key("0")
+
+    client.clear()
+    client.close()
+    assert FileCacheClient(settings).stats().entries == 0
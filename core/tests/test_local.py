@@ -1,3 +1,17 @@
+from datetime import datetime
+
+import pytest
+from cacheia_schemas import CachedValue
+
+from cacheia.backends import (
+    MemoryCacheClient,
+    MemoryCacheClientSettings,
+    StripedMemoryCacheClient,
+    StripedMemoryCacheClientSettings,
+)
+from cacheia.backends.entry import Entry
+from cacheia.backends.utils import ts_now
+
 from .templates import (
     create_test_template,
     flush_all_test_template,
@@ -54,3 +68,217 @@ def test_flush_key_with_multiprocessing():
 
 def test_flush_some_with_multiprocessing():
     flush_some_test_template("memory", True)
+
+
+def test_max_entries_lru():
+    client = MemoryCacheClient(MemoryCacheClientSettings(CACHE_MAX_ENTRIES=2))
+    client.cache(CachedValue(key="a", value="a"))
+    client.cache(CachedValue(key="b", value="b"))
+    client.get_key("a")
+    client.cache(CachedValue(key="c", value="c"))
+
+    assert {v.key for v in client.get()} == {"a", "c"}
+    assert client.evictions == 1
+
+
+def test_max_entries_lfu():
+    client = MemoryCacheClient(
+        MemoryCacheClientSettings(CACHE_MAX_ENTRIES=2, CACHE_EVICTION_POLICY="lfu")
+    )
+    client.cache(CachedValue(key="a", value="a"))
+    client.cache(CachedValue(key="b", value="b"))
+    client.get_key("a")
+    client.get_key("a")
+    client.get_key("b")
+    client.cache(CachedValue(key="c", value="c"))
+    client.cache(CachedValue(key="d", value="d"))
+
+    assert {v.key for v in client.get()} == {"a", "d"}
+    assert client.evictions == 2
+
+
+def test_max_entries_fifo():
+    client = MemoryCacheClient(
+        MemoryCacheClientSettings(CACHE_MAX_ENTRIES=2, CACHE_EVICTION_POLICY="fifo")
+    )
+    client.cache(CachedValue(key="a", value="a"))
+    client.cache(CachedValue(key="b", value="b"))
+    client.get_key("a")
+    client.cache(CachedValue(key="c", value="c"))
+
+    assert {v.key for v in client.get()} == {"b", "c"}
+
+
+def test_max_bytes():
+    client = MemoryCacheClient(MemoryCacheClientSettings(CACHE_MAX_BYTES=1024))
+    for i in range(10):
+        client.cache(CachedValue(key=str(i), value="x" * 300))
+
+    assert len(list(client.get())) == 3
+    assert client.evictions == 7
+
+
+@pytest.mark.parametrize("use_multi_proc", [False, True])
+def test_group_index(use_multi_proc: bool):
+    client = MemoryCacheClient(
+        MemoryCacheClientSettings(CACHE_USE_MULTIPROCESSING=use_multi_proc)
+    )
+    client.cache(CachedValue(key="a1", value="a1", group="A"))
+    client.cache(CachedValue(key="a2", value="a2", group="A"))
+    client.cache(CachedValue(key="b1", value="b1", group="B"))
+    client.cache(CachedValue(key="c1", value="c1", group="C", expires_at=ts_now() - 1))
+
+    assert {v.key for v in client.get(group="A")} == {"a1", "a2"}
+
+    client.flush_key("a1")
+    assert [v.key for v in client.get(group="A")] == ["a2"]
+
+    with pytest.raises(KeyError):
+        client.get_key("c1")
+    assert "C" not in client._groups
+
+    assert client.flush(group="B").deleted_count == 1
+    assert "B" not in client._groups
+    assert [v.key for v in client.get()] == ["a2"]
+
+    client.clear()
+    assert list(client.get(group="A")) == []
+
+
+def test_active_expiration():
+    client = MemoryCacheClient(MemoryCacheClientSettings(CACHE_EXPIRATION_BUDGET=1))
+    for i in range(5):
+        client.cache(CachedValue(key=f"old{i}", value=i, expires_at=ts_now() - 1))
+    client.cache(CachedValue(key="new", value="new", expires_at=ts_now() + 60))
+
+    # each write reclaims the value expired by the previous one
+    assert list(client._mem) == ["new"]
+
+
+def test_active_expiration_on_scan():
+    client = MemoryCacheClient(MemoryCacheClientSettings(CACHE_EXPIRATION_BUDGET=0))
+    for i in range(5):
+        client.cache(CachedValue(key=f"old{i}", value=i, expires_at=ts_now() - 1))
+    client.cache(CachedValue(key="new", value="new"))
+    assert len(client._mem) == 6
+
+    assert [v.key for v in client.get()] == ["new"]
+    assert list(client._mem) == ["new"]
+    assert len(client._expires) == 1
+
+
+@pytest.mark.parametrize("policy_bound", [False, True])
+def test_shared_values_replaced_by_other_process(policy_bound: bool):
+    settings = MemoryCacheClientSettings(
+        CACHE_USE_MULTIPROCESSING=True, CACHE_MAX_ENTRIES=1 if policy_bound else None
+    )
+    first = MemoryCacheClient(settings)
+    second = MemoryCacheClient(settings)
+    second._mem, second._groups = first._mem, first._groups
+
+    expires_at = None if policy_bound else ts_now() - 1
+    first.cache(CachedValue(key="a", value="old", expires_at=expires_at))
+    second.flush_key("a")
+    second.cache(CachedValue(key="a", value="new"))
+
+    # the stale records of the first client must not remove the new value
+    if policy_bound:
+        first.cache(CachedValue(key="b", value="b"))
+    else:
+        first._reclaim()
+    assert second.get_key("a").value == "new"
+    assert "a" not in first._meta
+
+
+@pytest.mark.parametrize("use_multi_proc", [False, True])
+def test_time_ranges(use_multi_proc: bool):
+    client = MemoryCacheClient(
+        MemoryCacheClientSettings(CACHE_USE_MULTIPROCESSING=use_multi_proc)
+    )
+    now = ts_now()
+    for i in range(10):
+        client.cache(
+            CachedValue(
+                key=str(i),
+                value=i,
+                created_at=datetime.fromtimestamp(now - 100 * i),
+                expires_at=now + 100 * i if i % 2 else None,
+            )
+        )
+
+    creation_range = (
+        datetime.fromtimestamp(now - 300),
+        datetime.fromtimestamp(now - 100),
+    )
+    values = client.get(creation_range=creation_range)
+    assert sorted(v.key for v in values) == ["1", "2", "3"]
+
+    # values without expiration always match an expiration range
+    values = client.get(expires_range=(now + 200, now + 500))
+    assert sorted(v.key for v in values) == ["0", "2", "3", "4", "5", "6", "8"]
+
+    # flush ranges are exclusive
+    r = client.flush(creation_range=creation_range)
+    assert r.deleted_count == 1
+    assert "2" not in {v.key for v in client.get()}
+
+
+def test_stats():
+    client = MemoryCacheClient(MemoryCacheClientSettings(CACHE_EXPIRATION_BUDGET=0))
+    client.cache(CachedValue(key="a1", value="x" * 100, group="A"))
+    client.cache(CachedValue(key="a2", value="x" * 100, group="A"))
+    client.cache(CachedValue(key="b1", value="x", group="B", expires_at=ts_now() - 1))
+    client.cache(CachedValue(key="c", value="x"))
+
+    stats = client.stats()
+    assert stats.entries == 4
+    assert stats.expired == 1
+    assert stats.groups["A"].entries == 2
+    assert stats.groups["A"].bytes > 200
+    assert stats.groups["B"].expired == 1
+    assert stats.bytes > stats.groups["A"].bytes + stats.groups["B"].bytes
+
+    client.flush_key("a1")
+    list(client.get())
+    stats = client.stats()
+    assert stats.entries == 2
+    assert stats.groups["A"].entries == 1
+    assert "B" not in stats.groups
+    assert stats.counters["expirations"] == 1
+
+
+def test_load_entries():
+    client = MemoryCacheClient(MemoryCacheClientSettings(CACHE_MAX_ENTRIES=2))
+    client.cache(CachedValue(key="a", value="a"))
+
+    assert not client.load(Entry("a", "other", None, None, ts_now()))
+    assert client.load(Entry("b", "b", "B", ts_now() + 60, ts_now()))
+    assert client.get_key("a").value == "a"
+    assert [v.key for v in client.get(group="B")] == ["b"]
+    assert client.stats().groups["B"].entries == 1
+
+
+@pytest.mark.parametrize("client_type", ["memory", "striped"])
+def test_many(client_type: str):
+    if client_type == "memory":
+        client = MemoryCacheClient(MemoryCacheClientSettings())
+    else:
+        client = StripedMemoryCacheClient(StripedMemoryCacheClientSettings())
+    client.cache(CachedValue(key="a", value="a"))
+
+    r = client.cache_many(
+        [
+            CachedValue(key="a", value="other"),
+            CachedValue(key="b", value="b"),
+            CachedValue(key="c", value="c", expires_at=ts_now() - 1),
+        ]
+    )
+    assert sorted(r.created) == ["b", "c"]
+    assert r.existing == ["a"]
+
+    values = client.get_many(["a", "b", "c", "missing"])
+    assert {k: v.value for k, v in values.items()} == {"a": "a", "b": "b"}
+    assert list(client.get_many(["c"], allow_expired=True)) == []
+
+    assert client.flush_many(["a", "b", "missing"]).deleted_count == 2
+    assert list(client.get()) == []
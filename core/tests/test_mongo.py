@@ -1,3 +1,17 @@
+import threading
+import time
+from datetime import datetime
+
+import pymongo
+import pytest
+from cacheia_schemas import CachedValue
+from pymongo import MongoClient
+
+from cacheia.backends import MongoCacheClient, MongoCacheClientSettings
+from cacheia.backends.mongo import LEGACY_INDEX, TTL_FIELD
+from cacheia.backends.utils import ts_now
+from cacheia.backends.write_behind import WriteBehindQueue
+
 from .templates import (
     create_test_template,
     flush_all_test_template,
@@ -30,3 +44,284 @@ def test_flush_key():
 
 def test_flush_some():
     flush_some_test_template("mongo")
+
+
+def test_migrate_legacy_collection():
+    uri = "mongodb://localhost:27017/test"
+    coll = MongoClient(uri)["cacheia"]["legacy"]
+    coll.drop()
+    coll.create_index([("group", pymongo.TEXT)])
+    coll.insert_one({"_id": "a", "value": 1, "group": "g", "expires_at": 1.5})
+
+    MongoCacheClient(
+        MongoCacheClientSettings(CACHE_DB_URI=uri, CACHE_COLLECTION="legacy")
+    )
+
+    indexes = coll.index_information()
+    assert LEGACY_INDEX not in indexes
+    assert any(index.get("expireAfterSeconds") == 0 for index in indexes.values())
+    assert coll.find_one({"_id": "a"})[TTL_FIELD] == datetime(
+        1970, 1, 1, 0, 0, 1, 500000
+    )
+    coll.drop()
+
+
+def test_background_preload():
+    uri = "mongodb://localhost:27017/test"
+    coll = MongoClient(uri)["cacheia"]["preload"]
+    coll.drop()
+    client = MongoCacheClient(
+        MongoCacheClientSettings(CACHE_DB_URI=uri, CACHE_COLLECTION="preload")
+    )
+    client.cache(CachedValue(key="a", value=1))
+    client.cache(CachedValue(key="b", value=2, expires_at=ts_now() - 1))
+
+    client = MongoCacheClient(
+        MongoCacheClientSettings(
+            CACHE_DB_URI=uri,
+            CACHE_COLLECTION="preload",
+            CACHE_PRELOAD_IN_BACKGROUND=True,
+        )
+    )
+    # served by Mongo until the preload finishes
+    assert client.get_key("a").value == 1
+    assert client.wait_ready(timeout=10)
+    assert client.get_key("a").value == 1
+    assert client.stats().entries == 1
+    coll.drop()
+
+
+def test_many():
+    uri = "mongodb://localhost:27017/test"
+    client = MongoCacheClient(MongoCacheClientSettings(CACHE_DB_URI=uri))
+    client.clear()
+    client.cache(CachedValue(key="a", value="a"))
+
+    r = client.cache_many(
+        [CachedValue(key="a", value="other"), CachedValue(key="b", value="b")]
+    )
+    assert r.created == ["b"]
+    assert r.existing == ["a"]
+    assert {k: v.value for k, v in client.get_many(["a", "b", "x"]).items()} == {
+        "a": "a",
+        "b": "b",
+    }
+    assert client.flush_many(["a", "b"]).deleted_count == 2
+    client.clear()
+
+
+def test_write_behind():
+    uri = "mongodb://localhost:27017/test"
+    coll = MongoClient(uri)["cacheia"]["write_behind"]
+    coll.drop()
+    coll.insert_one({"_id": "taken", "value": "theirs", "created_at": datetime.now()})
+    client = MongoCacheClient(
+        MongoCacheClientSettings(
+            CACHE_DB_URI=uri,
+            CACHE_COLLECTION="write_behind",
+            CACHE_PRELOAD=True,
+            CACHE_WRITE_BEHIND=True,
+        )
+    )
+    client._mem.flush_key("taken")
+
+    client.cache(CachedValue(key="a", value=1))
+    client.cache(CachedValue(key="taken", value="ours"))
+    assert client.get_key("a").value == 1
+    client.close()
+
+    assert coll.find_one({"_id": "a"})["value"] == 1
+    assert client.get_key("taken").value == "theirs"
+    assert client.stats().counters["write_conflicts"] == 1
+    coll.drop()
+
+
+def wait_for(condition, timeout: float = 10) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_watch_changes():
+    # change streams need a replica set, e.g. 'mongod --replSet rs0' followed by
+    # 'mongosh --eval "rs.initiate()"'
+    uri = "mongodb://localhost:27017/test?directConnection=true"
+    sets = MongoCacheClientSettings(
+        CACHE_DB_URI=uri, CACHE_COLLECTION="watched", CACHE_WATCH_CHANGES=True
+    )
+    MongoClient(uri)["cacheia"]["watched"].drop()
+    first = MongoCacheClient(sets)
+    second = MongoCacheClient(sets)
+
+    first.cache(CachedValue(key="a", value=1))
+    assert wait_for(lambda: second.get_many(["a"]) != {})
+    assert second.get_key("a").value == 1
+
+    first.flush_key("a")
+    assert wait_for(lambda: second.get_many(["a"]) == {})
+
+    first.close()
+    second.close()
+
+
+def test_read_through():
+    uri = "mongodb://localhost:27017/test"
+    sets = MongoCacheClientSettings(CACHE_DB_URI=uri, CACHE_COLLECTION="read")
+    MongoClient(uri)["cacheia"]["read"].drop()
+    first = MongoCacheClient(sets)
+    second = MongoCacheClient(sets)
+
+    first.cache(CachedValue(key="a", value=1))
+    assert second.get_key("a").value == 1
+    assert second.get_key("a").value == 1
+    for _ in range(2):
+        with pytest.raises(KeyError):
+            second.get_key("missing")
+    assert first.get_key("a").value == 1
+
+    counters = second.stats().counters
+    assert counters["mirror_hits"] == 1
+    assert counters["mirror_misses"] == 3
+    assert counters["mongo_fallbacks"] == 2
+    assert counters["negative_hits"] == 1
+
+
+def test_bloom_filter():
+    # the filter only answers lookups when a change stream keeps it current
+    uri = "mongodb://localhost:27017/test?directConnection=true"
+    coll = MongoClient(uri)["cacheia"]["bloom"]
+    coll.drop()
+    coll.insert_one({"_id": "a", "value": 1, "created_at": datetime.now()})
+    client = MongoCacheClient(
+        MongoCacheClientSettings(
+            CACHE_DB_URI=uri,
+            CACHE_COLLECTION="bloom",
+            CACHE_USE_LOCAL_MEM=False,
+            CACHE_BLOOM_FILTER=True,
+            CACHE_WATCH_CHANGES=True,
+        )
+    )
+    assert wait_for(lambda: client._bloom is not None)
+    # written by another process after the filter was built, already expired
+    coll.insert_one(
+        {"_id": "old", "value": 1, "created_at": datetime.now(), "expires_at": 1.0}
+    )
+    assert wait_for(lambda: "old" in client._bloom)
+
+    assert client.get_key("a").value == 1
+    client.cache(CachedValue(key="b", value=2))
+    assert client.get_key("b").value == 2
+    with pytest.raises(KeyError):
+        client.get_key("old")
+    for i in range(100):
+        with pytest.raises(KeyError):
+            client.get_key(f"missing{i}")
+
+    coll.insert_one(
+        {"_id": "c", "value": 3, "created_at": datetime.now(), "expires_at": None}
+    )
+    assert wait_for(lambda: "c" in client._bloom)
+    assert client.get_key("c").value == 3
+
+    stats = client.stats()
+    assert stats.counters["bloom_negatives"] >= 90
+    assert stats.counters["bloom_expired"] == 1
+    assert stats.gauges["bloom_false_positive_rate"] < 0.1
+    client.close()
+    coll.drop()
+
+
+def test_bloom_filter_without_watching():
+    uri = "mongodb://localhost:27017/test"
+    coll = MongoClient(uri)["cacheia"]["bloom_unwatched"]
+    coll.drop()
+    client = MongoCacheClient(
+        MongoCacheClientSettings(
+            CACHE_DB_URI=uri,
+            CACHE_COLLECTION="bloom_unwatched",
+            CACHE_USE_LOCAL_MEM=False,
+            CACHE_BLOOM_FILTER=True,
+        )
+    )
+    assert wait_for(lambda: client._bloom is not None)
+
+    # missing from the filter, but stale filters never skip Mongo
+    coll.insert_one(
+        {"_id": "a", "value": 1, "created_at": datetime.now(), "expires_at": None}
+    )
+    assert client.get_key("a").value == 1
+    assert client.stats().counters["bloom_negatives"] == 0
+    client.close()
+    coll.drop()
+
+
+def test_flush_keeps_other_groups_mirrored():
+    uri = "mongodb://localhost:27017/test"
+    MongoClient(uri)["cacheia"]["flush_groups"].drop()
+    client = MongoCacheClient(
+        MongoCacheClientSettings(CACHE_DB_URI=uri, CACHE_COLLECTION="flush_groups")
+    )
+    client.cache_many(
+        CachedValue(key=f"{group}{i}", value=i, group=group)
+        for group in ("a", "b")
+        for i in range(10)
+    )
+
+    assert client.flush(group="a").deleted_count == 10
+    assert client.stats().entries == 10
+    assert len(client.get_many(f"b{i}" for i in range(10))) == 10
+    assert client.get_many(f"a{i}" for i in range(10)) == {}
+    assert client.stats().counters["mirror_hits"] == 10
+    client.close()
+
+
+def test_stats_without_mirror():
+    uri = "mongodb://localhost:27017/test"
+    MongoClient(uri)["cacheia"]["stats"].drop()
+    client = MongoCacheClient(
+        MongoCacheClientSettings(
+            CACHE_DB_URI=uri, CACHE_COLLECTION="stats", CACHE_USE_LOCAL_MEM=False
+        )
+    )
+    client.cache(CachedValue(key="a", value="a", group="g"))
+    client.cache(CachedValue(key="b", value="b", expires_at=ts_now() - 1))
+
+    stats = client.stats()
+    assert stats.entries == 2
+    assert stats.expired == 1
+    assert stats.groups["g"].entries == 1
+    assert stats.bytes > 0
+    client.close()
+
+
+def test_write_behind_drain_under_steady_writes():
+    written = []
+
+    def write(batch: list[dict]) -> None:
+        time.sleep(0.01)
+        written.extend(batch)
+
+    writer = WriteBehindQueue(write, batch_size=10, interval=0.01, max_pending=100)
+    stop = threading.Event()
+
+    def write() -> None:
+        i = 0
+        while not stop.is_set():
+            writer.put({"_id": f"later{i}"})
+            i += 1
+
+    writer.put({"_id": "first"})
+    thread = threading.Thread(target=write)
+    thread.start()
+    try:
+        # returns once 'first' is written, the queue is never empty meanwhile
+        writer.drain()
+        assert written[0] == {"_id": "first"}
+    finally:
+        stop.set()
+        thread.join()
+    writer.close()
+    assert writer.pending == 0
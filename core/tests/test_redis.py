@@ -0,0 +1,94 @@
+import time
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+from cacheia_schemas import CachedValue
+from redis import ConnectionPool
+
+from cacheia.backends import RedisCacheClient, RedisCacheClientSettings
+from cacheia.backends.utils import ts_now
+
+from .templates import (
+    cache_and_get_key_test_template,
+    flush_group_test_template,
+    many_test_template,
+)
+
+
+@pytest.fixture
+def client():
+    pool = ConnectionPool(
+        connection_class=fakeredis.FakeRedisConnection, server=fakeredis.FakeServer()
+    )
+    client = RedisCacheClient(RedisCacheClientSettings(CACHE_REDIS_BATCH_SIZE=3), pool)
+    yield client
+    client.close()
+
+
+def test_cache_and_get_key(client: RedisCacheClient):
+    # Redis removes expired values, they can not be read anyway
+    cache_and_get_key_test_template(client, allow_expired=False)
+
+
+def test_many(client: RedisCacheClient):
+    many_test_template(client)
+
+
+def test_flush_group(client: RedisCacheClient):
+    flush_group_test_template(client)
+
+
+def test_indexes_cleaned(client: RedisCacheClient):
+    client.cache(CachedValue(key="a", value="a", group="h"))
+    client.flush_many(["a"])
+    assert client._redis.zcard(client._group_key("h")) == 0
+
+    client.cache_many(
+        CachedValue(key=f"k{i}", value=i, group="g", expires_at=ts_now() + 0.05)
+        for i in range(2)
+    )
+    time.sleep(0.1)
+    # expired keys are pruned by writes, even if their group is never read
+    client.cache(CachedValue(key="k0", value=0))
+    client.cache(CachedValue(key="b", value="b"))
+    assert client._redis.zcard(client._group_key("g")) == 0
+    assert client._redis.zcard(client._expires_key) == 2
+    assert client._redis.hlen(client._groups_key) == 0
+
+
+def test_ranges(client: RedisCacheClient):
+    now = datetime.now()
+    soon = ts_now() + 60
+    client.cache(CachedValue(key="old", value=1, created_at=now - timedelta(days=1)))
+    client.cache(CachedValue(key="new", value=2, created_at=now, expires_at=soon))
+    client.cache(CachedValue(key="later", value=3, expires_at=soon + 60))
+
+    created = client.get(creation_range=(now - timedelta(days=2), now))
+    assert sorted(v.key for v in created) == ["new", "old"]
+
+    # values that never expire match any expiration range
+    expiring = client.get(expires_range=(soon - 1, soon + 1))
+    assert sorted(v.key for v in expiring) == ["new", "old"]
+
+    assert client.flush(expires_range=(soon, soon + 120)).deleted_count == 2
+    assert sorted(v.key for v in client.get()) == ["new"]
+
+
+def test_clear(client: RedisCacheClient):
+    client.cache_many(CachedValue(key=str(i), value=i, group="g") for i in range(10))
+    client.clear()
+    assert list(client.get()) == []
+    assert client._redis.dbsize() == 0
+
+
+def test_stats(client: RedisCacheClient):
+    client.cache_many(CachedValue(key=str(i), value=i, group="g") for i in range(4))
+    client.cache(CachedValue(key="other", value="x" * 100))
+    client.flush_key("0")
+
+    stats = client.stats()
+    assert stats.entries == 4
+    assert stats.bytes > 100
+    assert stats.groups["g"].entries == 3
+    assert stats.expired == 0
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import boto3
+import pytest
+from cacheia_schemas import CachedValue
+from moto import mock_aws
+
+from cacheia.backends import S3CacheClient, S3CacheClientSettings
+from cacheia.backends.utils import ts_now
+
+from .templates import (
+    cache_and_get_key_test_template,
+    flush_group_test_template,
+    many_test_template,
+)
+
+PART_SIZE = 5 * 2**20
+
+
+@pytest.fixture
+def client():
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="cacheia")
+        client = S3CacheClient(
+            S3CacheClientSettings(
+                CACHE_S3_REGION="us-east-1", CACHE_S3_PART_SIZE=PART_SIZE
+            )
+        )
+        yield client
+        client.close()
+
+
+def test_cache_and_get_key(client: S3CacheClient):
+    cache_and_get_key_test_template(client)
+
+
+def test_quoted_names(client: S3CacheClient):
+    client.cache(CachedValue(key="a/b", value=1, group="g/é"))
+    assert client.get_key("a/b").group == "g/é"
+    assert [v.key for v in client.get(group="g/é")] == ["a/b"]
+    assert client.flush(group="g/é").deleted_count == 1
+
+
+def test_large_value(client: S3CacheClient):
+    # uploaded in 3 parts and downloaded in 3 ranges
+    value = bytes(range(256)) * (PART_SIZE * 2 // 256 + 1)
+    client.cache(CachedValue(key="large", value=value))
+    assert client.get_key("large").value == value
+
+
+def test_many(client: S3CacheClient):
+    many_test_template(client)
+
+
+def test_flush_group(client: S3CacheClient):
+    flush_group_test_template(client)
+
+
+def test_ranges(client: S3CacheClient):
+    now = datetime.now()
+    soon = ts_now() + 60
+    client.cache(CachedValue(key="old", value=1, created_at=now - timedelta(days=1)))
+    client.cache(CachedValue(key="new", value=2, created_at=now, expires_at=soon))
+
+    created = client.get(creation_range=(now - timedelta(hours=1), now))
+    assert [v.key for v in created] == ["new"]
+    assert client.flush(expires_range=(soon - 1, soon + 1)).deleted_count == 2
+
+
+def test_clear(client: S3CacheClient):
+    client.cache_many(CachedValue(key=str(i), value=i, group="g") for i in range(5))
+    client.clear()
+    assert list(client.get()) == []
+    assert list(client.get(group="g")) == []
+
+
+def test_stats(client: S3CacheClient):
+    client.cache(CachedValue(key="a", value=b"x" * 100, group="g"))
+    client.cache(CachedValue(key="b", value=1, expires_at=ts_now() - 1))
+
+    stats = client.stats()
+    assert stats.entries == 2
+    assert stats.expired == 1
+    assert stats.groups["g"].entries == 1
+    assert stats.groups["g"].bytes >= 100
@@ -0,0 +1,24 @@
+from cacheia import Cacheia
+from cacheia.backends import (
+    MemoryCacheClientSettings,
+    MongoCacheClientSettings,
+    SharedMemoryCacheClientSettings,
+    SQLiteCacheClientSettings,
+    StripedMemoryCacheClientSettings,
+)
+
+
+def test_settings_from_dict():
+    resolve = Cacheia._settings_from_dict
+    assert type(resolve({})) is MemoryCacheClientSettings
+    assert type(resolve({"CACHE_CODEC": "orjson"})) is MemoryCacheClientSettings
+    assert type(resolve({"CACHE_MAX_ENTRIES": 10})) is MemoryCacheClientSettings
+    assert type(resolve({"CACHE_SEGMENTS": 4})) is StripedMemoryCacheClientSettings
+    assert type(resolve({"CACHE_SHM_PATH": "/tmp/x"})) is (
+        SharedMemoryCacheClientSettings
+    )
+    assert type(resolve({"CACHE_SQLITE_PATH": "x.db"})) is SQLiteCacheClientSettings
+
+    settings = resolve({"CACHE_DB_URI": "mongodb://localhost/test", "other": 1})
+    assert type(settings) is MongoCacheClientSettings
+    assert settings.CACHE_DB_URI == "mongodb://localhost/test"
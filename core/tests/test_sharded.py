@@ -0,0 +1,80 @@
+from collections import Counter
+
+import pytest
+from cacheia_schemas import CachedValue, KeyAlreadyExists
+
+from cacheia import Cacheia
+from cacheia.backends import (
+    MemoryCacheClient,
+    MemoryCacheClientSettings,
+    ShardedCacheClient,
+    ShardedCacheClientSettings,
+)
+from cacheia.backends.sharded import HashRing
+
+
+def sharded(count: int) -> ShardedCacheClient:
+    shards = [MemoryCacheClient(MemoryCacheClientSettings()) for _ in range(count)]
+    return ShardedCacheClient(ShardedCacheClientSettings(), shards)
+
+
+def test_hash_ring_moves_few_keys():
+    keys = [f"key{i}" for i in range(20_000)]
+    ring = HashRing([f"shard{i}" for i in range(4)])
+    before = {key: ring.node(key) for key in keys}
+    spread = Counter(before.values())
+    assert min(spread.values()) > len(keys) / 4 * 0.7
+
+    ring.add("shard4")
+    moved = [key for key in keys if ring.node(key) != before[key]]
+    assert all(ring.node(key) == "shard4" for key in moved)
+    assert len(moved) / len(keys) == pytest.approx(1 / 5, abs=0.06)
+
+
+def test_routing():
+    client = sharded(3)
+    result = client.cache_many(
+        CachedValue(key=str(i), value=i, group="g") for i in range(30)
+    )
+    assert len(result.created) == 30
+    assert all(shard.stats().entries > 0 for shard in client._shards.values())
+
+    with pytest.raises(KeyAlreadyExists):
+        client.cache(CachedValue(key="7", value=7))
+    assert client.get_key("7").value == 7
+    assert list(client.get_many(["3", "missing", "1"])) == ["3", "1"]
+
+    assert sorted(int(v.key) for v in client.get(group="g")) == list(range(30))
+    assert client.stats().entries == 30
+    assert client.flush_many(["1", "2", "missing"]).deleted_count == 2
+    assert client.flush_key("3").deleted_count == 1
+    assert client.flush(group="g").deleted_count == 27
+    client.close()
+
+
+def test_stream_stops_early():
+    client = sharded(4)
+    client.cache_many(CachedValue(key=str(i), value=i) for i in range(100))
+    stream = iter(client.get())
+    first = next(stream)
+    stream.close()
+    assert client.get_key(first.key).value == first.value
+    client.close()
+
+
+def test_add_shard():
+    client = sharded(3)
+    client.cache_many(CachedValue(key=str(i), value=i) for i in range(3_000))
+
+    new = MemoryCacheClient(MemoryCacheClientSettings())
+    moved = client.add_shard(new)
+    assert moved == new.stats().entries
+    assert 0 < moved < 1_000
+    assert client.stats().entries == 3_000
+    assert len(client.get_many(str(i) for i in range(3_000))) == 3_000
+
+
+def test_setup_from_settings():
+    client = Cacheia.build({"CACHE_SHARDS": [{}, {"CACHE_MAX_ENTRIES": 10}]})
+    assert isinstance(client, ShardedCacheClient)
+    assert len(client._shards) == 2
@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import struct
+from pathlib import Path
+
+import pytest
+from cacheia_schemas import CachedValue, KeyAlreadyExists
+
+from cacheia.backends import SharedMemoryCacheClient, SharedMemoryCacheClientSettings
+from cacheia.backends.shared import _hash
+from cacheia.backends.utils import ts_now
+
+
+def settings(path: Path) -> SharedMemoryCacheClientSettings:
+    return SharedMemoryCacheClientSettings(
+        CACHE_SHM_PATH=str(path / "cacheia"),
+        CACHE_SHM_SLOTS=1024,
+        CACHE_SHM_ARENA_BYTES=1024 * 1024,
+    )
+
+
+def writer(sets: SharedMemoryCacheClientSettings, start: int):
+    client = SharedMemoryCacheClient(sets)
+    for i in range(start, start + 100):
+        client.cache(CachedValue(key=str(i), value={"i": i}, group=str(i % 2)))
+
+
+def die_writing(sets: SharedMemoryCacheClientSettings, key: str):
+    client = SharedMemoryCacheClient(sets)
+    index, _, _ = client._find(key.encode(), _hash(key.encode()))
+    client._lock(index)
+    client._begin_write(index)
+    os._exit(0)
+
+
+def test_cache_and_get(tmp_path: Path):
+    client = SharedMemoryCacheClient(settings(tmp_path))
+    client.cache(CachedValue(key="a", value=[1, 2, 3], group="A"))
+
+    value = client.get_key("a")
+    assert value.key == "a"
+    assert value.value == [1, 2, 3]
+    assert value.group == "A"
+
+    with pytest.raises(KeyAlreadyExists):
+        client.cache(CachedValue(key="a", value="other"))
+
+    client.cache(CachedValue(key="b", value="b", expires_at=ts_now() - 1))
+    with pytest.raises(KeyError):
+        client.get_key("b")
+
+    # expired values can be replaced
+    client.cache(CachedValue(key="b", value="new"))
+    assert client.get_key("b").value == "new"
+
+
+def test_expired_value_replaced_while_read(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    first = SharedMemoryCacheClient(settings(tmp_path))
+    second = SharedMemoryCacheClient(settings(tmp_path))
+    first.cache(CachedValue(key="a", value="old", expires_at=ts_now() - 1))
+    find = first._find
+
+    def find_then_replace(key: bytes, h: int):
+        # another process replaces the expired value right after it was found
+        found = find(key, h)
+        monkeypatch.setattr(first, "_find", find)
+        second.cache(CachedValue(key="a", value="new"))
+        return found
+
+    monkeypatch.setattr(first, "_find", find_then_replace)
+    with pytest.raises(KeyError):
+        first.get_key("a")
+    assert second.get_key("a").value == "new"
+
+
+def test_flush(tmp_path: Path):
+    client = SharedMemoryCacheClient(settings(tmp_path))
+    for i in range(10):
+        client.cache(CachedValue(key=str(i), value=i, group=str(i % 2)))
+
+    assert client.flush(group="0").deleted_count == 5
+    assert sorted(v.key for v in client.get()) == ["1", "3", "5", "7", "9"]
+    assert client.flush_key("1").deleted_count == 1
+    assert client.flush_key("1").deleted_count == 0
+
+    client.clear()
+    assert list(client.get()) == []
+
+
+def test_shared_between_processes(tmp_path: Path):
+    sets = settings(tmp_path)
+    client = SharedMemoryCacheClient(sets)
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=writer, args=(sets, i * 100)) for i in range(4)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+        assert p.exitcode == 0
+
+    assert len(list(client.get())) == 400
+    assert len(list(client.get(group="1"))) == 200
+    assert client.get_key("399").value == {"i": 399}
+
+
+def test_arena_compaction(tmp_path: Path):
+    client = SharedMemoryCacheClient(settings(tmp_path))
+    client.cache(CachedValue(key="kept", value="kept", group="A"))
+    client.cache(CachedValue(key="old", value="x" * 1000, expires_at=ts_now() - 1))
+
+    # churn writes several times the arena size
+    for i in range(500):
+        client.cache(CachedValue(key=str(i), value="x" * 10_000))
+        client.flush_key(str(i))
+
+    assert client.get_key("kept").value == "kept"
+    assert client.get_key("kept").group == "A"
+    with pytest.raises(KeyError):
+        client.get_key("old", allow_expired=True)
+
+    with pytest.raises(MemoryError):
+        client.cache(CachedValue(key="huge", value="x" * 2 * 1024 * 1024))
+
+
+def test_sequence_wraps(tmp_path: Path):
+    client = SharedMemoryCacheClient(settings(tmp_path))
+    client.cache(CachedValue(key="a", value=1))
+    index, _, _ = client._find(b"a", _hash(b"a"))
+    struct.pack_into("<I", client._map, client._slot_offset(index), 0xFFFFFFFE)
+
+    client.flush_key("a")
+    client.cache(CachedValue(key="a", value=2))
+    assert client.get_key("a").value == 2
+
+
+def test_writer_died_mid_write(tmp_path: Path):
+    sets = settings(tmp_path)
+    client = SharedMemoryCacheClient(sets)
+    client.cache(CachedValue(key="a", value=1))
+    client.cache(CachedValue(key="b", value=2))
+
+    process = multiprocessing.get_context("spawn").Process(
+        target=die_writing, args=(sets, "a")
+    )
+    process.start()
+    process.join()
+
+    with pytest.raises(KeyError):
+        client.get_key("a")
+    assert [v.key for v in client.get()] == ["b"]
+    client.cache(CachedValue(key="a", value=3))
+    assert client.get_key("a").value == 3
+
+
+def test_stats(tmp_path: Path):
+    client = SharedMemoryCacheClient(settings(tmp_path))
+    client.cache(CachedValue(key="a", value="x" * 100, group="A"))
+    client.cache(CachedValue(key="b", value="b", group="A", expires_at=ts_now() - 1))
+    client.cache(CachedValue(key="c", value="c"))
+    client.flush_key("c")
+
+    stats = client.stats()
+    assert stats.entries == 2
+    assert stats.expired == 1
+    assert stats.groups["A"].entries == 2
+    assert stats.groups["A"].expired == 1
+    assert stats.bytes > 100
@@ -0,0 +1,102 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from cacheia_schemas import CachedValue
+
+from cacheia.backends import SQLiteCacheClient, SQLiteCacheClientSettings
+from cacheia.backends.utils import ts_now
+
+from .templates import (
+    cache_and_get_key_test_template,
+    flush_group_test_template,
+    many_test_template,
+)
+
+
+@pytest.fixture
+def settings(tmp_path) -> SQLiteCacheClientSettings:
+    return SQLiteCacheClientSettings(
+        CACHE_SQLITE_PATH=str(tmp_path / "cache.db"), CACHE_SQLITE_PURGE_BATCH_SIZE=3
+    )
+
+
+@pytest.fixture
+def client(settings: SQLiteCacheClientSettings):
+    client = SQLiteCacheClient(settings)
+    yield client
+    client.close()
+
+
+def test_cache_and_get_key(client: SQLiteCacheClient):
+    cache_and_get_key_test_template(client)
+
+
+def test_many(client: SQLiteCacheClient):
+    many_test_template(client)
+
+
+def test_flush_group(client: SQLiteCacheClient):
+    flush_group_test_template(client)
+
+
+def test_filters(client: SQLiteCacheClient):
+    now = datetime.now()
+    soon = ts_now() + 60
+    client.cache(CachedValue(key="old", value=1, created_at=now - timedelta(days=1)))
+    client.cache(
+        CachedValue(key="new", value=2, group="g", created_at=now, expires_at=soon)
+    )
+
+    created = client.get(creation_range=(now - timedelta(hours=1), now))
+    assert [v.key for v in created] == ["new"]
+    assert [v.key for v in client.get(group="g")] == ["new"]
+    # values that never expire match any expiration range
+    assert client.flush(expires_range=(soon - 1, soon + 1)).deleted_count == 2
+
+
+def test_purge_expired(client: SQLiteCacheClient):
+    client.cache_many(
+        CachedValue(key=str(i), value=i, expires_at=ts_now() - 1) for i in range(10)
+    )
+    client.cache(CachedValue(key="live", value=1))
+    assert client.stats().expired == 10
+
+    assert client.purge_expired() == 10
+    stats = client.stats()
+    assert stats.entries == 1
+    assert stats.expired == 0
+
+
+def test_shared_between_clients(settings: SQLiteCacheClientSettings):
+    first = SQLiteCacheClient(settings)
+    second = SQLiteCacheClient(settings)
+
+    def write(start: int) -> None:
+        first.cache_many(
+            CachedValue(key=str(i), value=i) for i in range(start, start + 50)
+        )
+
+    threads = [threading.Thread(target=write, args=(i * 50,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(second.get_many(str(i) for i in range(200))) == 200
+    assert second.stats().entries == 200
+    first.close()
+    second.close()
+
+
+def test_expired_value_replaced_while_read(client: SQLiteCacheClient):
+    client.cache(CachedValue(key="a", value=2))
+    # reads an expired version of the row, as if another client replaced it
+    # between the select and the delete
+    client._get_sql = (
+        "SELECT key, value, codec, grp, created_at, 1.0 "
+        f"FROM {client._table} WHERE key = ?"
+    )
+    with pytest.raises(KeyError):
+        client.get_key("a")
+    assert client.get_many(["a"])["a"].value == 2
@@ -0,0 +1,68 @@
+import threading
+
+from cacheia_schemas import CachedValue, KeyAlreadyExists
+
+from cacheia.backends import (
+    StripedMemoryCacheClient,
+    StripedMemoryCacheClientSettings,
+)
+
+
+def test_operations():
+    client = StripedMemoryCacheClient(StripedMemoryCacheClientSettings())
+    for i in range(20):
+        client.cache(CachedValue(key=str(i), value=i, group=str(i % 2)))
+
+    assert client.get_key("3").value == 3
+    assert len(list(client.get(group="0"))) == 10
+    assert client.flush(group="0").deleted_count == 10
+    assert client.flush_key("3").deleted_count == 1
+    assert len(list(client.get())) == 9
+
+    client.clear()
+    assert list(client.get()) == []
+
+
+def test_bounds_are_split():
+    client = StripedMemoryCacheClient(
+        StripedMemoryCacheClientSettings(CACHE_SEGMENTS=4, CACHE_MAX_ENTRIES=8)
+    )
+    for i in range(100):
+        client.cache(CachedValue(key=str(i), value=i))
+
+    assert len(list(client.get())) <= 8
+    assert client.evictions >= 92
+
+
+def test_concurrent_cache_of_same_keys():
+    client = StripedMemoryCacheClient(StripedMemoryCacheClientSettings())
+    created = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        for i in range(500):
+            try:
+                client.cache(CachedValue(key=str(i), value=i))
+                created.append(i)
+            except KeyAlreadyExists:
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(created) == list(range(500))
+
+
+def test_stats():
+    client = StripedMemoryCacheClient(StripedMemoryCacheClientSettings())
+    for i in range(20):
+        client.cache(CachedValue(key=str(i), value=i, group=str(i % 2)))
+
+    stats = client.stats()
+    assert stats.entries == 20
+    assert stats.groups["0"].entries == 10
+    assert stats.groups["1"].entries == 10
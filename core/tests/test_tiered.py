@@ -0,0 +1,106 @@
+import pytest
+from cacheia_schemas import CachedValue, KeyAlreadyExists
+
+from cacheia import Cacheia
+from cacheia.backends import (
+    MemoryCacheClient,
+    MemoryCacheClientSettings,
+    SQLiteCacheClient,
+    TieredCacheClient,
+    TieredCacheClientSettings,
+)
+from cacheia.backends.tiered import TierPolicy
+from cacheia.backends.utils import ts_now
+
+
+def tiered(policy: TierPolicy, **settings) -> TieredCacheClient:
+    tiers = [
+        MemoryCacheClient(MemoryCacheClientSettings(CACHE_MAX_ENTRIES=5)),
+        MemoryCacheClient(MemoryCacheClientSettings()),
+    ]
+    return TieredCacheClient(
+        TieredCacheClientSettings(CACHE_TIER_POLICY=policy, **settings), tiers
+    )
+
+
+@pytest.mark.parametrize("policy", ["read-through", "write-through", "write-behind"])
+def test_policies(policy: TierPolicy):
+    client = tiered(policy)
+    l1, l2 = client._tiers
+    client.cache_many(CachedValue(key=str(i), value=i, group="g") for i in range(10))
+    client._sync()
+    assert l2.stats().entries == 10
+    assert l1.stats().entries == (0 if policy == "read-through" else 5)
+
+    with pytest.raises(KeyAlreadyExists):
+        client.cache(CachedValue(key="9", value=9))
+
+    assert {k: v.value for k, v in client.get_many(["0", "9"]).items()} == {
+        "0": 0,
+        "9": 9,
+    }
+    assert client.get_key("0").value == 0
+    assert len(list(client.get(group="g"))) == 10
+
+    assert client.flush(group="g").deleted_count == 10
+    with pytest.raises(KeyError):
+        client.get_key("0")
+    client.close()
+
+
+def test_promotion_counters():
+    client = tiered("read-through")
+    client.cache(CachedValue(key="a", value=1))
+    assert client.get_key("a").value == 1
+    assert client.get_key("a").value == 1
+    with pytest.raises(KeyError):
+        client.get_key("missing")
+
+    counters = client.stats().counters
+    assert counters["tier0_hits"] == 1
+    assert counters["tier0_misses"] == 2
+    assert counters["tier1_hits"] == 1
+    assert counters["tier1_misses"] == 1
+    assert counters["tier0_promotions"] == 1
+
+
+def test_tier_ttl():
+    client = tiered("write-through", CACHE_TIER_TTL=60)
+    client.cache(CachedValue(key="a", value=1))
+    client.cache(CachedValue(key="b", value=2, expires_at=ts_now() + 10))
+
+    l1, l2 = client._tiers
+    assert l1.get_key("a").expires_at == pytest.approx(ts_now() + 60, abs=1)
+    assert l1.get_key("b").expires_at == l2.get_key("b").expires_at
+    assert l2.get_key("a").expires_at is None
+
+
+def test_write_behind_conflicts():
+    client = tiered("write-behind")
+    l1, l2 = client._tiers
+    l2.cache(CachedValue(key="a", value="stored"))
+    client.cache(CachedValue(key="a", value="new"))
+    client._sync()
+
+    assert client.get_key("a").value == "stored"
+    counters = client.stats().counters
+    assert counters["write_conflicts"] == 1
+    assert counters["tier1_demotions"] == 0
+
+
+def test_setup_from_settings(tmp_path):
+    client = Cacheia.build(
+        {
+            "CACHE_TIERS": [
+                {"CACHE_MAX_ENTRIES": 100},
+                {"CACHE_SQLITE_PATH": str(tmp_path / "cache.db")},
+            ]
+        }
+    )
+    assert isinstance(client, TieredCacheClient)
+    assert isinstance(client._tiers[0], MemoryCacheClient)
+    assert isinstance(client._tiers[1], SQLiteCacheClient)
+
+    client.cache(CachedValue(key="a", value=1))
+    assert client.get_key("a").value == 1
+    client.close()
@@ -1,12 +1,30 @@
 from .exceptions import InvalidSettings, KeyAlreadyExists
-from .interfaces import CacheClient, CacheClientSettings
-from .values import CachedValue, DeletedResult
+from .interfaces import (
+    AsyncCacheClient,
+    CacheClient,
+    CacheClientSettings,
+    CodecName,
+    CompressionName,
+)
+from .values import (
+    CachedValue,
+    CacheManyResult,
+    CacheStats,
+    DeletedResult,
+    GroupStats,
+)
 
 __all__ = [
+    "AsyncCacheClient",
     "CacheClient",
     "CacheClientSettings",
     "CachedValue",
+    "CacheManyResult",
+    "CacheStats",
+    "CodecName",
+    "CompressionName",
     "DeletedResult",
+    "GroupStats",
     "InvalidSettings",
     "KeyAlreadyExists",
 ]
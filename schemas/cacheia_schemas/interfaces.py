@@ -1,14 +1,24 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Iterable
+from typing import AsyncIterator, Iterable, Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from .values import CachedValue, DeletedResult
+from .exceptions import KeyAlreadyExists
+from .values import CachedValue, CacheManyResult, CacheStats, DeletedResult
+
+
+CodecName = Literal["pickle", "msgpack", "orjson"]
+CompressionName = Literal["zlib", "zstd", "lz4"]
 
 
 class CacheClientSettings(BaseSettings):
     CACHE_USE_MULTIPROCESSING: bool = False
+    # Backends that store binary payloads encode values with 'CACHE_CODEC',
+    # payloads of at least 'CACHE_COMPRESSION_THRESHOLD' bytes are compressed.
+    CACHE_CODEC: CodecName | None = None
+    CACHE_COMPRESSION: CompressionName | None = None
+    CACHE_COMPRESSION_THRESHOLD: int = 1024
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -96,3 +106,219 @@ class CacheClient(ABC):
         for a full cleanup to by pass any filters and delete all values.
         """
         ...
+
+    def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        """
+        Cache several values, keys that already exist are left untouched.
+
+        Backends should override it with a native bulk write, the default
+        caches values one by one.
+
+        :param instances: CachedValue instances
+        :return: CacheManyResult with the created and the existing keys
+        """
+
+        result = CacheManyResult()
+        for instance in instances:
+            try:
+                self.cache(instance)
+                result.created.append(instance.key)
+            except KeyAlreadyExists:
+                result.existing.append(instance.key)
+        return result
+
+    def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        """
+        Get several values by key, missing and expired keys are left out.
+
+        :param keys: keys to search for
+        :param allow_expired: if True, expired values will be returned anyway
+        :return: found values by key
+        """
+
+        values = {}
+        for key in keys:
+            try:
+                values[key] = self.get_key(key, allow_expired=allow_expired)
+            except KeyError:
+                pass
+        return values
+
+    def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        """
+        Delete several keys from cache if found.
+        """
+
+        count = 0
+        for key in keys:
+            count += self.flush_key(key).deleted_count
+        return DeletedResult(deleted_count=count)
+
+    def ready(self) -> bool:
+        """
+        Whether the cache is warm, e.g. done loading values from its backing
+        store. Backends without a warm up phase are always ready.
+        """
+        return True
+
+    def stats(self) -> CacheStats:
+        """
+        Get entry counts, estimated sizes and counters of the cache, in total
+        and per group.
+
+        Values that are expired but not yet removed are counted in 'expired'.
+
+        :return: CacheStats object
+        :raises NotImplementedError: if the backend does not keep statistics
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not keep statistics")
+
+
+class AsyncCacheClient(ABC):
+    """
+    Asynchronous counterpart of CacheClient, every method is awaited and 'get'
+    returns an async iterator.
+    """
+
+    @abstractmethod
+    def __init__(self, settings: CacheClientSettings) -> None: ...
+
+    @abstractmethod
+    async def cache(self, instance: CachedValue) -> None:
+        """
+        Cache a value.
+
+        :param instance: CachedValue instance
+        :raises KeyAlreadyExists: if key already exists in cache
+        """
+        ...
+
+    @abstractmethod
+    def get(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> AsyncIterator[CachedValue]:
+        """
+        Get all values that matches given filters.
+
+        :param expires_range: (start, end) range of expiration time, if empty
+        defaults to all non-expired values (e.g. 'expires_at' greater than now).
+        :param creation_range: (start, end) range of creation time.
+        :param group: group name
+        :return: an async iterator of CachedValue objects
+        """
+        ...
+
+    @abstractmethod
+    async def get_key(self, key: str, allow_expired: bool = False) -> CachedValue:
+        """
+        Get a value by key if found in cache.
+
+        If 'allow_expired' is True and the value is expired, it will be returned anyway.
+        Otherwise it will be removed from the cache and raise KeyError.
+
+        :param key: key to search for
+        :param allow_expired: if True, expired values will be returned anyway
+        :return: instance of CachedValue object
+        :raises KeyError: if key does not exist or is expired
+        """
+        ...
+
+    @abstractmethod
+    async def flush(
+        self,
+        group: str | None = None,
+        expires_range: tuple[float, float] | None = None,
+        creation_range: tuple[datetime, datetime] | None = None,
+    ) -> DeletedResult:
+        """
+        Flush all values that matches given filters.
+
+        :param expires_range: (start, end) range of expiration time, if empty
+        defaults to all non-expired values (e.g. 'expires_at' greater than now).
+        > Note: 'start' and 'end' are exclusive.
+        :param creation_range: (start, end) range of creation time.
+        > Note: 'start' and 'end' are exclusive.
+        :param group: group name
+        :return: DeletedResult object
+        """
+        ...
+
+    @abstractmethod
+    async def flush_key(self, key: str) -> DeletedResult:
+        """
+        Delete a key from cache if found.
+        """
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """
+        Delete all cached values.
+        """
+        ...
+
+    async def cache_many(self, instances: Iterable[CachedValue]) -> CacheManyResult:
+        """
+        Cache several values, keys that already exist are left untouched.
+
+        :param instances: CachedValue instances
+        :return: CacheManyResult with the created and the existing keys
+        """
+
+        result = CacheManyResult()
+        for instance in instances:
+            try:
+                await self.cache(instance)
+                result.created.append(instance.key)
+            except KeyAlreadyExists:
+                result.existing.append(instance.key)
+        return result
+
+    async def get_many(
+        self, keys: Iterable[str], allow_expired: bool = False
+    ) -> dict[str, CachedValue]:
+        """
+        Get several values by key, missing and expired keys are left out.
+
+        :param keys: keys to search for
+        :param allow_expired: if True, expired values will be returned anyway
+        :return: found values by key
+        """
+
+        values = {}
+        for key in keys:
+            try:
+                values[key] = await self.get_key(key, allow_expired=allow_expired)
+            except KeyError:
+                pass
+        return values
+
+    async def flush_many(self, keys: Iterable[str]) -> DeletedResult:
+        """
+        Delete several keys from cache if found.
+        """
+
+        count = 0
+        for key in keys:
+            count += (await self.flush_key(key)).deleted_count
+        return DeletedResult(deleted_count=count)
+
+    def ready(self) -> bool:
+        """
+        Whether the cache is warm, e.g. done loading values from its backing
+        store. Backends without a warm up phase are always ready.
+        """
+        return True
+
+    async def stats(self) -> CacheStats:
+        """
+        Get entry counts, estimated sizes and counters of the cache.
+
+        :raises NotImplementedError: if the backend does not keep statistics
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not keep statistics")
@@ -14,3 +14,23 @@ class CachedValue(BaseModel):
 
 class DeletedResult(BaseModel):
     deleted_count: int
+
+
+class CacheManyResult(BaseModel):
+    created: list[str] = Field(default_factory=list)
+    existing: list[str] = Field(default_factory=list)
+
+
+class GroupStats(BaseModel):
+    entries: int = 0
+    bytes: int = 0
+    expired: int = 0
+
+
+class CacheStats(BaseModel):
+    entries: int = 0
+    bytes: int = 0
+    expired: int = 0
+    groups: dict[str, GroupStats] = Field(default_factory=dict)
+    counters: dict[str, int] = Field(default_factory=dict)
+    gauges: dict[str, float] = Field(default_factory=dict)